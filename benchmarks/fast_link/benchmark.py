@@ -0,0 +1,259 @@
+"""Compare the time needed to relink a debug build of a sample project after a one-line change with each linker supported by 'build.py --fast-link'"""
+
+import glob
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from typing import Dict, List, Tuple
+
+from benchmarks import project
+from tests.test import Test
+
+
+# Linkers that are compared (with their executables) if they are installed
+linkers: Dict[str, str] = {
+    "bfd": "ld.bfd",
+    "gold": "ld.gold",
+    "lld": "ld.lld",
+    "mold": "mold",
+}
+
+# Source file that is changed before each timed build
+edited_source: str = "unit_0.cpp"
+
+# Line of the edited source file that is changed before each timed build
+edited_line: str = "constexpr long edit = {};\n"
+
+
+def _unit_source(index: int, functions: int, edit: int) -> str:
+    """Returns a source file with a lot of debug information (from the standard library types it instantiates)"""
+
+    name: str = "unit_" + str(index)
+    body: str = ""
+    for function in range(functions):
+        record: str = "record_" + str(function)
+        body += (
+            "struct "
+            + record
+            + " {\n"
+            + "    std::string name;\n"
+            + "    std::vector<long> values;\n"
+            + "    std::map<std::string, long> index;\n"
+            + "};\n\n"
+            + "long function_"
+            + str(function)
+            + "(long value) {\n"
+            + "    "
+            + record
+            + ' record{"'
+            + record
+            + '", {}, {}};\n'
+            + "    record.values.push_back(value);\n"
+            + "    record.index[record.name] = value * "
+            + str(function + 1)
+            + ";\n"
+            + "    return static_cast<long>(record.values.size() + record.index.size()) + record.index[record.name];\n"
+            + "}\n\n"
+        )
+    return (
+        "#include <map>\n"
+        + "#include <string>\n"
+        + "#include <vector>\n\n"
+        + '#include "units.hpp"\n\n'
+        + "namespace bench::"
+        + name
+        + " {\n\n"
+        + edited_line.format(edit)
+        + "\n"
+        + body
+        + "long run(long value) {\n"
+        + "    return edit"
+        + "".join(
+            " + function_" + str(function) + "(value)" for function in range(functions)
+        )
+        + ";\n"
+        + "}\n\n"
+        + "} // namespace bench::"
+        + name
+        + "\n"
+    )
+
+
+def write_sources(files_dir: str, units: int, functions: int) -> List[str]:
+    """Write the sources of the sample project and return their names"""
+
+    with open(os.path.join(files_dir, "src", "units.hpp"), "w") as header:
+        header.write(
+            "#pragma once\n\n"
+            + "".join(
+                "namespace bench::unit_"
+                + str(index)
+                + " {\nlong run(long value);\n} // namespace bench::unit_"
+                + str(index)
+                + "\n\n"
+                for index in range(units)
+            )
+        )
+
+    sources: List[str] = []
+    for index in range(units):
+        name: str = "unit_" + str(index) + ".cpp"
+        with open(os.path.join(files_dir, "src", name), "w") as source:
+            source.write(_unit_source(index, functions, 0))
+        sources.append(name)
+
+    with open(os.path.join(files_dir, "src", "main.cpp"), "w") as main:
+        main.write(
+            '#include "units.hpp"\n\n'
+            + "int main(int argc, char** argv) {\n"
+            + "    long total = 0;\n"
+            + "".join(
+                "    total += ::bench::unit_" + str(index) + "::run(argc);\n"
+                for index in range(units)
+            )
+            + "    return static_cast<int>(total % 2);\n"
+            + "}\n"
+        )
+    return sources
+
+
+def build_args(linker: str) -> List[str]:
+    """Returns the arguments given to 'build.py' for a debug build that is linked with the given linker"""
+
+    return ["--fast-link", linker, "-s:h", "&:build_type=Debug"]
+
+
+def prepare(linker: str, work_dir: str, units: int, functions: int) -> Test:
+    """Configure the sample project for the given linker and build it once so dependencies are installed before timing"""
+
+    test = project.configure(
+        os.path.join(work_dir, linker),
+        "A sample project for comparing the relink times of linkers",
+    )
+
+    binary_config: Dict[str, dict] = project.read_binary_config(test)
+    sources = write_sources(test.files_dir, units, functions)
+    binary_config["my_app"]["sources"] += [["src", source] for source in sources]
+    project.write_binary_config(test, binary_config)
+
+    test.run("first_build", "build.py", build_args(linker))
+    return test
+
+
+def link_seconds(test: Test) -> float:
+    """Returns the number of seconds spent linking the application of the sample project in its most recent build (read from the ninja log)"""
+
+    ninja_logs: List[str] = glob.glob(
+        os.path.join(test.files_dir, "build", "*", ".ninja_log")
+    )
+    if len(ninja_logs) != 1:
+        raise RuntimeError("Expected exactly one build folder in " + test.files_dir)
+
+    seconds: float = 0
+    with open(ninja_logs[0], "r") as ninja_log:
+        for line in ninja_log:
+            if line.startswith("#"):
+                continue
+            start, end, _, output, _ = line.split("\t")
+            if output == "my_app":
+                # Later entries replace earlier entries for the same output
+                seconds = (int(end) - int(start)) / 1000
+    return seconds
+
+
+def time_relink(test: Test, linker: str, edit: int) -> Tuple[float, float]:
+    """Change one line of the sample project and return the number of seconds needed to rebuild it and to relink it"""
+
+    source_path: str = os.path.join(test.files_dir, "src", edited_source)
+    with open(source_path, "r") as source:
+        lines: List[str] = source.readlines()
+    lines = [
+        edited_line.format(edit) if line.startswith("constexpr long edit") else line
+        for line in lines
+    ]
+    with open(source_path, "w") as source:
+        source.writelines(lines)
+
+    start: float = time.monotonic()
+    test.run("build", "build.py", build_args(linker))
+    return time.monotonic() - start, link_seconds(test)
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python -m benchmarks.fast_link.benchmark",
+        description="This benchmark generates a sample project, builds it in debug mode with each installed linker ("
+        + ", ".join(linkers.keys())
+        + ") through 'build.py --fast-link', and compares the time needed to relink it after a one-line change (dependencies are installed and Meson is configured before timing begins).",
+    )
+    arg_parser.add_argument(
+        "--units",
+        type=int,
+        default=64,
+        help="number of source files",
+    )
+    arg_parser.add_argument(
+        "--functions",
+        type=int,
+        default=32,
+        help="number of functions within each source file",
+    )
+    arg_parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=3,
+        help="number of relinks timed for each linker",
+    )
+    arg_parser.add_argument(
+        "--work-dir",
+        default=os.path.join(tempfile.gettempdir(), "cpp_template_fast_link_benchmark"),
+        help="directory in which the sample projects are generated",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+
+    # The sample projects are generated outside of this project since they are copies of it
+    work_dir: str = os.path.abspath(args.work_dir)
+
+    installed: List[str] = [
+        linker
+        for linker, executable in linkers.items()
+        if shutil.which(executable) is not None
+    ]
+    if len(installed) == 0:
+        raise RuntimeError("None of the compared linkers are installed")
+
+    results: Dict[str, List[Tuple[float, float]]] = {}
+    for linker in installed:
+        test = prepare(linker, work_dir, args.units, args.functions)
+        results[linker] = [
+            time_relink(test, linker, edit + 1) for edit in range(args.repetitions)
+        ]
+
+    # Report the relink time of each linker
+    print("\n", end="")
+    width: int = max(len(linker) for linker in installed)
+    for linker, seconds in results.items():
+        print(
+            "\033[34;1m"
+            + linker.ljust(width)
+            + "\033[0m: link median {:>8.3f}s  min {:>8.3f}s  rebuild median {:>8.2f}s".format(
+                statistics.median(link for _, link in seconds),
+                min(link for _, link in seconds),
+                statistics.median(rebuild for rebuild, _ in seconds),
+            )
+        )
+    for linker in installed[1:]:
+        print(
+            "Link speedup of {} over {}: {:.2f}x".format(
+                linker,
+                installed[0],
+                statistics.median(link for _, link in results[installed[0]])
+                / statistics.median(link for _, link in results[linker]),
+            )
+        )
@@ -0,0 +1,281 @@
+"""Compare the clean-build time of a sample project that uses headers with the same project converted to C++20 modules"""
+
+import os
+import statistics
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from typing import Dict, List
+
+from benchmarks import project
+from tests.test import Test
+
+
+# Kinds of sample projects that are compared
+variants: List[str] = ["headers", "modules"]
+
+
+# Number of components that every other component depends on
+core_components: int = 4
+
+
+def _dependencies(index: int) -> List[int]:
+    """Returns the indices of the components that the component with the given index depends on. The core components depend on each other in sequence and every other component depends on all of them"""
+
+    if index < core_components:
+        return [index - 1] if index > 0 else []
+    return list(range(core_components))
+
+
+def _component_body(index: int, functions: int, depth: int) -> str:
+    """Returns the declarations shared by the header and module versions of a component"""
+
+    name: str = "component_" + str(index)
+    body: str = (
+        "template <int N>\n"
+        + "struct series {\n"
+        + "    static constexpr long value = (series<N - 1>::value * 31 + N) % 1000003;\n"
+        + "};\n\n"
+        + "template <>\n"
+        + "struct series<0> {\n"
+        + "    static constexpr long value = "
+        + str(index)
+        + ";\n"
+        + "};\n\n"
+        + "inline constexpr long seed = series<"
+        + str(depth)
+        + ">::value;\n\n"
+    )
+    for function in range(functions):
+        calls: str = "".join(
+            " + ::bench::component_"
+            + str(dep)
+            + "::function_"
+            + str(function)
+            + "(value)"
+            for dep in _dependencies(index)
+        )
+        body += (
+            "template <typename T>\n"
+            + "constexpr T function_"
+            + str(function)
+            + "(T value) {\n"
+            + "    return value * "
+            + str(function + 1)
+            + " + static_cast<T>(seed)"
+            + calls
+            + ";\n"
+            + "}\n\n"
+        )
+    return "namespace bench::" + name + " {\n\n" + body
+
+
+def _compute_body(functions: int) -> str:
+    """Returns the body of the function that uses every template of a component"""
+
+    return (
+        "long compute(long value) {\n"
+        + "    return "
+        + " + ".join(
+            "function_" + str(function) + "(value)" for function in range(functions)
+        )
+        + ";\n"
+        + "}\n"
+    )
+
+
+def write_headers(
+    files_dir: str, components: int, functions: int, depth: int
+) -> List[str]:
+    """Write the header version of the sample project and return the names of its sources"""
+
+    sources: List[str] = []
+    for index in range(components):
+        name: str = "component_" + str(index)
+        includes: str = "".join(
+            '#include "component_' + str(dep) + '.hpp"\n'
+            for dep in _dependencies(index)
+        )
+        with open(os.path.join(files_dir, "src", name + ".hpp"), "w") as header:
+            header.write(
+                "#pragma once\n\n"
+                + includes
+                + "\n"
+                + _component_body(index, functions, depth)
+                + "long compute(long value);\n\n"
+                + "} // namespace bench::"
+                + name
+                + "\n"
+            )
+        with open(os.path.join(files_dir, "src", name + ".cpp"), "w") as source:
+            source.write(
+                '#include "'
+                + name
+                + '.hpp"\n\n'
+                + "namespace bench::"
+                + name
+                + " {\n\n"
+                + _compute_body(functions)
+                + "\n} // namespace bench::"
+                + name
+                + "\n"
+            )
+        sources.append(name + ".cpp")
+
+    with open(os.path.join(files_dir, "src", "main.cpp"), "w") as main:
+        main.write(
+            "".join(
+                '#include "component_' + str(index) + '.hpp"\n'
+                for index in range(components)
+            )
+            + "\nint main(int argc, char** argv) {\n"
+            + "    long total = 0;\n"
+            + "".join(
+                "    total += ::bench::component_" + str(index) + "::compute(argc);\n"
+                for index in range(components)
+            )
+            + "    return static_cast<int>(total % 2);\n"
+            + "}\n"
+        )
+    return sources
+
+
+def write_modules(
+    files_dir: str, components: int, functions: int, depth: int
+) -> List[str]:
+    """Write the module version of the sample project and return the names of its module interface units"""
+
+    modules: List[str] = []
+    for index in range(components):
+        name: str = "component_" + str(index)
+        imports: str = "".join(
+            "import bench.component_" + str(dep) + ";\n" for dep in _dependencies(index)
+        )
+        with open(os.path.join(files_dir, "src", name + ".cppm"), "w") as module:
+            module.write(
+                "export module bench."
+                + name
+                + ";\n\n"
+                + imports
+                + "\nexport "
+                + _component_body(index, functions, depth)
+                + _compute_body(functions)
+                + "\n} // namespace bench::"
+                + name
+                + "\n"
+            )
+        modules.append(name + ".cppm")
+
+    with open(os.path.join(files_dir, "src", "main.cpp"), "w") as main:
+        main.write(
+            "".join(
+                "import bench.component_" + str(index) + ";\n"
+                for index in range(components)
+            )
+            + "\nint main(int argc, char** argv) {\n"
+            + "    long total = 0;\n"
+            + "".join(
+                "    total += ::bench::component_" + str(index) + "::compute(argc);\n"
+                for index in range(components)
+            )
+            + "    return static_cast<int>(total % 2);\n"
+            + "}\n"
+        )
+    return modules
+
+
+def prepare(
+    variant: str, work_dir: str, components: int, functions: int, depth: int
+) -> Test:
+    """Configure the sample project for the given variant and build it once so dependencies are installed before timing"""
+
+    test = project.configure(
+        os.path.join(work_dir, variant),
+        "A sample project for comparing headers with C++20 modules",
+    )
+
+    binary_config: Dict[str, dict] = project.read_binary_config(test)
+    if variant == "headers":
+        sources = write_headers(test.files_dir, components, functions, depth)
+        binary_config["my_app"]["sources"] += [["src", source] for source in sources]
+    else:
+        modules = write_modules(test.files_dir, components, functions, depth)
+        binary_config["my_app"]["modules"] = [["src", module] for module in modules]
+    project.write_binary_config(test, binary_config)
+
+    test.run("first_build", "build.py")
+    return test
+
+
+def time_clean_build(test: Test) -> float:
+    """Remove all object files of the sample project and return the number of seconds needed to build it again"""
+
+    test.run("clean", "clean.py", ["--objects"])
+    start: float = time.monotonic()
+    test.run("build", "build.py")
+    return time.monotonic() - start
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python -m benchmarks.modules.benchmark",
+        description="This benchmark generates a sample project as headers and as C++20 modules and compares their clean-build times (dependencies are installed and Meson is configured before timing begins).",
+    )
+    arg_parser.add_argument(
+        "--components",
+        type=int,
+        default=24,
+        help="number of components (each is a header and source or a module interface unit)",
+    )
+    arg_parser.add_argument(
+        "--functions",
+        type=int,
+        default=64,
+        help="number of function templates within each component",
+    )
+    arg_parser.add_argument(
+        "--depth",
+        type=int,
+        default=256,
+        help="number of template instantiations evaluated at compile-time within each component",
+    )
+    arg_parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=3,
+        help="number of clean builds timed for each variant",
+    )
+    arg_parser.add_argument(
+        "--work-dir",
+        default=os.path.join(tempfile.gettempdir(), "cpp_template_modules_benchmark"),
+        help="directory in which the sample projects are generated",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+
+    # The sample projects are generated outside of this project since they are copies of it
+    work_dir: str = os.path.abspath(args.work_dir)
+
+    results: Dict[str, List[float]] = {}
+    for variant in variants:
+        test = prepare(variant, work_dir, args.components, args.functions, args.depth)
+        results[variant] = [time_clean_build(test) for _ in range(args.repetitions)]
+
+    # Report the clean-build time of each variant
+    print("\n", end="")
+    for variant, seconds in results.items():
+        print(
+            "\033[34;1m"
+            + variant.ljust(max(len(variant) for variant in variants))
+            + "\033[0m: median {:>8.2f}s  min {:>8.2f}s".format(
+                statistics.median(seconds), min(seconds)
+            )
+        )
+    print(
+        "Speedup of modules over headers: {:.2f}x".format(
+            statistics.median(results["headers"])
+            / statistics.median(results["modules"])
+        )
+    )
@@ -0,0 +1,165 @@
+"""Compare the startup time and size of the application binaries of a sample project built with the active profile and with 'build.py --optimized'"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from benchmarks import project
+from tests.test import Test
+
+
+# Configurations that are compared (with the arguments given to 'build.py' for each)
+configurations: Dict[str, List[str]] = {
+    "default": [],
+    "optimized": ["--optimized"],
+}
+
+# Statistics written by the dynamic loader of glibc when LD_DEBUG=statistics is set
+loader_statistics = re.compile(r"total startup time in dynamic loader: (\d+) cycles")
+
+
+@dataclass
+class Measurement:
+    """The size and startup time of one application binary in one configuration"""
+
+    size: int
+    startup_seconds: float
+    loader_cycles: Optional[int]
+
+
+def application_names(test: Test) -> List[str]:
+    """Returns the names of the application binaries of the sample project"""
+
+    return [
+        name
+        for name, binary in project.read_binary_config(test).items()
+        if binary["type"] == "application"
+    ]
+
+
+def build_dir(test: Test, configuration: str) -> str:
+    """Returns the build folder of the sample project for the given configuration"""
+
+    root: str = os.path.join(test.files_dir, "build")
+    folders: List[str] = [
+        folder
+        for folder in os.listdir(root)
+        if os.path.isfile(os.path.join(root, folder, "build.ninja"))
+        and folder.startswith("optimized") == (configuration == "optimized")
+    ]
+    if len(folders) != 1:
+        raise RuntimeError(
+            "Expected exactly one build folder for the "
+            + configuration
+            + " configuration in "
+            + root
+        )
+    return os.path.join(root, folders[0])
+
+
+def loader_cycles(binary_path: str) -> Optional[int]:
+    """Returns the number of cycles the dynamic loader spent starting a binary (or None if it is not reported, e.g. on platforms other than Linux with glibc)"""
+
+    if not sys.platform.startswith("linux"):
+        return None
+    result = subprocess.run(
+        [binary_path],
+        env=dict(os.environ, LD_DEBUG="statistics"),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    statistics_match = loader_statistics.search(result.stderr)
+    return int(statistics_match.group(1)) if statistics_match is not None else None
+
+
+def measure(binary_path: str, repetitions: int) -> Measurement:
+    """Run a binary repeatedly and return its size and median startup time"""
+
+    seconds: List[float] = []
+    for _ in range(repetitions):
+        start: float = time.perf_counter()
+        subprocess.run([binary_path], stdout=subprocess.DEVNULL, check=True)
+        seconds.append(time.perf_counter() - start)
+    return Measurement(
+        size=os.path.getsize(binary_path),
+        startup_seconds=statistics.median(seconds),
+        loader_cycles=loader_cycles(binary_path),
+    )
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python -m benchmarks.optimized.benchmark",
+        description="This benchmark generates a sample project, builds it with the active profile and with 'build.py --optimized' (static dependencies, link-time optimization, unused code removal, and hidden library symbols), and compares the size and startup time (including the time spent in the dynamic loader) of each application binary.",
+    )
+    arg_parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=50,
+        help="number of times each binary is started",
+    )
+    arg_parser.add_argument(
+        "--work-dir",
+        default=os.path.join(tempfile.gettempdir(), "cpp_template_optimized_benchmark"),
+        help="directory in which the sample project is generated",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+
+    # The sample project is generated outside of this project since it is a copy of it
+    test = project.configure(
+        os.path.abspath(args.work_dir),
+        "A sample project for comparing default and optimized binaries",
+    )
+    applications: List[str] = application_names(test)
+    executable_suffix: str = ".exe" if os.name == "nt" else ""
+
+    results: Dict[str, Dict[str, Measurement]] = {}
+    for configuration, build_args in configurations.items():
+        test.run("build_" + configuration, "build.py", build_args)
+        folder: str = build_dir(test, configuration)
+        results[configuration] = {
+            application: measure(
+                os.path.join(folder, application + executable_suffix),
+                args.repetitions,
+            )
+            for application in applications
+        }
+
+    # Report the size and startup time of each application in each configuration
+    print("\n", end="")
+    width: int = max(len(configuration) for configuration in configurations.keys())
+    for application in applications:
+        print("\033[34;1m" + application + "\033[0m")
+        for configuration in configurations.keys():
+            measurement: Measurement = results[configuration][application]
+            cycles: str = (
+                "{:>10}".format(measurement.loader_cycles)
+                if measurement.loader_cycles is not None
+                else "{:>10}".format("unknown")
+            )
+            print(
+                "  "
+                + configuration.ljust(width)
+                + ": size {:>10} bytes  startup median {:>8.3f}ms  dynamic loader {} cycles".format(
+                    measurement.size, 1000 * measurement.startup_seconds, cycles
+                )
+            )
+        default: Measurement = results["default"][application]
+        optimized: Measurement = results["optimized"][application]
+        print(
+            "  Size ratio (optimized / default): {:.2f}  Startup speedup: {:.2f}x".format(
+                optimized.size / default.size,
+                default.startup_seconds / optimized.startup_seconds,
+            )
+        )
@@ -0,0 +1,50 @@
+"""Generate the sample projects measured by the benchmarks"""
+
+import json
+import os
+from typing import Dict
+
+from tests.test import Test
+
+
+# Configuration of every sample project (the description is given by each benchmark)
+template_config: str = """[template_config]
+
+package_name = my_app
+namespace = app
+conan = true
+package_type = application
+dependencies = [ "gtest/[*]" ]
+author = Caden Shmookler
+email = cshmookler@gmail.com
+license = Zlib
+website_url = https://github.com/cshmookler/my_app
+git_url = https://github.com/cshmookler/my_app.git
+description = {description}
+topics = []
+"""
+
+
+def configure(test_dir: str, description: str) -> Test:
+    """Copy this template project to the given directory and configure it as a sample project"""
+
+    os.makedirs(test_dir, exist_ok=True)
+    test = Test(test_dir)
+    with open(os.path.join(test.files_dir, "template_config.ini"), "w") as config:
+        config.write(template_config.format(description=description))
+    test.run("config", "config.py")
+    return test
+
+
+def read_binary_config(test: Test) -> Dict[str, dict]:
+    """Returns the binary configuration of a sample project"""
+
+    with open(os.path.join(test.files_dir, "binary_config.json"), "r") as file:
+        return json.load(file)
+
+
+def write_binary_config(test: Test, binary_config: Dict[str, dict]) -> None:
+    """Replace the binary configuration of a sample project"""
+
+    with open(os.path.join(test.files_dir, "binary_config.json"), "w") as file:
+        json.dump(binary_config, file, indent=4)
@@ -0,0 +1,495 @@
+"""Measure how the configure, clean-build, no-op rebuild, and one-file-edit rebuild times of generated sample projects grow with the number of binaries and dependency components"""
+
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from benchmarks import project
+from tests.test import Test
+
+
+# Name and version of the generated dependency whose components are used by every generated binary
+components_package: str = "scale_components"
+components_version: str = "1.0.0"
+
+# Types of the generated binaries (assigned in turn)
+binary_types: List[str] = ["library", "application", "test"]
+
+# Line of the edited source file that is changed before each timed one-file-edit rebuild
+edited_line: str = "constexpr long edit = {};\n"
+
+# Exports the generated dependency with the Conan executable of the virtual environment of a sample project (given the path to the sample project and to the recipe)
+export_script: str = """import subprocess
+import sys
+sys.path.insert(0, sys.argv[1])
+import this_venv
+if not this_venv.exists():
+    this_venv.create()
+subprocess.run([this_venv.conan(), "export", sys.argv[2]], check=True)
+"""
+
+
+@dataclass
+class Measurement:
+    """The size of one sample project and the time needed to configure and build it"""
+
+    scale: int
+    binaries: int
+    sources: int
+    headers: int
+    components: int
+    generate_seconds: float
+    configure_seconds: float
+    clean_build_seconds: float
+    noop_rebuild_seconds: float
+    edit_rebuild_seconds: float
+
+
+# Timed metrics of each measurement (in the order they are reported)
+metrics: List[str] = [
+    "generate_seconds",
+    "configure_seconds",
+    "clean_build_seconds",
+    "noop_rebuild_seconds",
+    "edit_rebuild_seconds",
+]
+
+
+def _components_recipe(components: int) -> str:
+    """Returns a Conan recipe for a header-only package that declares the given number of components"""
+
+    return (
+        "from conan import ConanFile\n\n\n"
+        + "class ScaleComponents(ConanFile):\n"
+        + '    name = "'
+        + components_package
+        + '"\n'
+        + '    version = "'
+        + components_version
+        + '"\n'
+        + '    package_type = "header-library"\n'
+        + '    build_policy = "missing"\n\n'
+        + "    def package_info(self):\n"
+        + "        for index in range("
+        + str(components)
+        + "):\n"
+        + '            component = self.cpp_info.components["component_" + str(index)]\n'
+        + "            component.bindirs = []\n"
+        + "            component.libdirs = []\n"
+    )
+
+
+def _header(binary_name: str, index: int) -> str:
+    """Returns a header of a generated binary"""
+
+    return (
+        "#pragma once\n\n"
+        + "inline long "
+        + binary_name
+        + "_header_"
+        + str(index)
+        + "(long value) {\n"
+        + "    return value * "
+        + str(index + 2)
+        + " + "
+        + str(index)
+        + ";\n"
+        + "}\n"
+    )
+
+
+def _source(binary_name: str, binary_type: str, index: int, headers: int) -> str:
+    """Returns a source of a generated binary that uses every header of the binary"""
+
+    function: str = binary_name + "_unit_" + str(index)
+    body: str = (
+        "".join(
+            '#include "' + binary_name + "_header_" + str(header) + '.hpp"\n'
+            for header in range(headers)
+        )
+        + "\n"
+        + edited_line.format(0)
+        + "\n"
+        + "long "
+        + function
+        + "(long value) {\n"
+        + "    return edit"
+        + "".join(
+            " + " + binary_name + "_header_" + str(header) + "(value)"
+            for header in range(headers)
+        )
+        + ";\n"
+        + "}\n"
+    )
+    if binary_type == "test":
+        body = (
+            "#include <gtest/gtest.h>\n\n"
+            + body
+            + "\nTEST("
+            + function
+            + ", runs) {\n"
+            + "    EXPECT_EQ("
+            + function
+            + "(0), "
+            + function
+            + "(0));\n"
+            + "}\n"
+        )
+    return body
+
+
+def _main(binary_name: str, sources: int) -> str:
+    """Returns the source with the 'main' function of a generated application"""
+
+    return (
+        "".join(
+            "long " + binary_name + "_unit_" + str(index) + "(long value);\n"
+            for index in range(sources)
+        )
+        + "\nint main(int argc, char** argv) {\n"
+        + "    long total = 0;\n"
+        + "".join(
+            "    total += " + binary_name + "_unit_" + str(index) + "(argc);\n"
+            for index in range(sources)
+        )
+        + "    return static_cast<int>(total % 2);\n"
+        + "}\n"
+    )
+
+
+def _write(path: str, content: str) -> None:
+    """Write a generated file (and create its directory if needed)"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def generate(
+    test: Test, binaries: int, sources: int, headers: int, components: int
+) -> None:
+    """Add the given number of binaries (each with the given number of sources and headers) and a dependency with the given number of components to a sample project"""
+
+    files_dir: str = test.files_dir
+    _write(
+        os.path.join(files_dir, components_package, "conanfile.py"),
+        _components_recipe(components),
+    )
+
+    dependency_config_path: str = os.path.join(files_dir, "dependency_config.json")
+    with open(dependency_config_path, "r") as file:
+        dependency_config: Dict[str, dict] = json.load(file)
+    dependency_config[components_package] = {"version": components_version}
+    with open(dependency_config_path, "w") as file:
+        json.dump(dependency_config, file, indent=4)
+
+    binary_config: Dict[str, dict] = project.read_binary_config(test)
+    for binary in range(binaries):
+        binary_type: str = binary_types[binary % len(binary_types)]
+        binary_name: str = "binary_" + str(binary)
+        binary_dir: List[str] = ["src", binary_name]
+
+        for header in range(headers):
+            _write(
+                os.path.join(
+                    files_dir,
+                    *binary_dir,
+                    binary_name + "_header_" + str(header) + ".hpp"
+                ),
+                _header(binary_name, header),
+            )
+        for source in range(sources):
+            _write(
+                os.path.join(files_dir, *binary_dir, "unit_" + str(source) + ".cpp"),
+                _source(binary_name, binary_type, source, headers),
+            )
+
+        # Components are enabled by the first build
+        dependencies: Dict[str, dict] = {components_package: {}}
+        if binary_type == "test":
+            dependencies["gtest"] = {}
+        entry: dict = {
+            "type": binary_type,
+            "dependencies": dependencies,
+            "sources": [
+                binary_dir + ["unit_" + str(source) + ".cpp"]
+                for source in range(sources)
+            ],
+        }
+        if binary_type == "library":
+            entry["headers"] = [
+                binary_dir + [binary_name + "_header_" + str(header) + ".hpp"]
+                for header in range(headers)
+            ]
+        if binary_type == "application":
+            _write(
+                os.path.join(files_dir, *binary_dir, "main.cpp"),
+                _main(binary_name, sources),
+            )
+            entry["main"] = binary_dir + ["main.cpp"]
+        binary_config[binary_name] = entry
+    project.write_binary_config(test, binary_config)
+
+
+def prepare(
+    work_dir: str,
+    scale: int,
+    binaries: int,
+    sources: int,
+    headers: int,
+    components: int,
+) -> Test:
+    """Configure and generate the sample project for the given scale and install its dependencies so they are not part of the timed builds"""
+
+    test = project.configure(
+        os.path.join(work_dir, "scale_" + str(scale)),
+        "A sample project for measuring how the build scales with the size of the project",
+    )
+    generate(test, binaries, sources, headers, components)
+    test.call(
+        "export",
+        [
+            sys.executable,
+            "-c",
+            export_script,
+            test.files_dir,
+            os.path.join(test.files_dir, components_package),
+        ],
+    )
+    test.run("dependencies", "build.py", ["--dependencies-only"])
+    return test
+
+
+def phases_seconds(test: Test) -> Dict[str, float]:
+    """Returns the seconds spent in each phase of the most recent build of a sample project (read from its telemetry)"""
+
+    telemetry_files: List[str] = [
+        os.path.join(test.files_dir, "build", folder, "telemetry", "build.json")
+        for folder in os.listdir(os.path.join(test.files_dir, "build"))
+    ]
+    telemetry_files = [path for path in telemetry_files if os.path.isfile(path)]
+    if len(telemetry_files) != 1:
+        raise RuntimeError("Expected exactly one build folder in " + test.files_dir)
+    with open(telemetry_files[0], "r") as file:
+        return json.load(file)["phases_seconds"]
+
+
+def time_build(test: Test, log_file: str) -> float:
+    """Build a sample project and return the number of seconds it took"""
+
+    start: float = time.monotonic()
+    test.run(log_file, "build.py")
+    return time.monotonic() - start
+
+
+def edit_source(test: Test, edit: int) -> None:
+    """Change one line of the first source of the first generated binary"""
+
+    source_path: str = os.path.join(test.files_dir, "src", "binary_0", "unit_0.cpp")
+    with open(source_path, "r") as source:
+        lines: List[str] = source.readlines()
+    lines = [
+        edited_line.format(edit) if line.startswith("constexpr long edit") else line
+        for line in lines
+    ]
+    with open(source_path, "w") as source:
+        source.writelines(lines)
+
+
+def measure(
+    work_dir: str,
+    scale: int,
+    binaries: int,
+    sources: int,
+    headers: int,
+    components: int,
+    repetitions: int,
+) -> Measurement:
+    """Generate the sample project for the given scale and measure its builds"""
+
+    test = prepare(work_dir, scale, binaries, sources, headers, components)
+
+    clean_build_seconds: float = time_build(test, "clean_build")
+    phases: Dict[str, float] = phases_seconds(test)
+
+    noop_seconds: List[float] = [
+        time_build(test, "noop_rebuild") for _ in range(repetitions)
+    ]
+
+    edit_seconds: List[float] = []
+    for edit in range(repetitions):
+        edit_source(test, edit + 1)
+        edit_seconds.append(time_build(test, "edit_rebuild"))
+
+    return Measurement(
+        scale=scale,
+        binaries=binaries,
+        sources=binaries * sources,
+        headers=binaries * headers,
+        components=components,
+        generate_seconds=phases.get("generate", 0.0),
+        configure_seconds=phases.get("configure", 0.0),
+        clean_build_seconds=clean_build_seconds,
+        noop_rebuild_seconds=statistics.median(noop_seconds),
+        edit_rebuild_seconds=statistics.median(edit_seconds),
+    )
+
+
+def growth_exponent(smallest: Measurement, largest: Measurement, metric: str) -> float:
+    """Returns how fast a metric grows with the scale between two measurements (1 is linear growth, 2 is quadratic growth, and 0 is no growth)"""
+
+    before: float = getattr(smallest, metric)
+    after: float = getattr(largest, metric)
+    if before <= 0 or after <= 0 or largest.scale == smallest.scale:
+        return math.nan
+    return math.log(after / before) / math.log(largest.scale / smallest.scale)
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python -m benchmarks.scalability.benchmark",
+        description="This benchmark generates sample projects of increasing size, with a number of binaries and dependency components proportional to each scale, and measures the time Conan spends generating the build files, the time Meson spends configuring, and the time needed for a clean build, a no-op rebuild, and a rebuild after a one-line change (dependencies are installed before timing begins). The results are written as JSON so the scaling curve can be compared between versions of this template.",
+    )
+    arg_parser.add_argument(
+        "--scales",
+        default="1,2,4,8",
+        help="comma-separated scales of the sample projects",
+    )
+    arg_parser.add_argument(
+        "--binaries",
+        type=int,
+        default=6,
+        help="number of binaries at scale 1 (libraries, applications, and tests in turn)",
+    )
+    arg_parser.add_argument(
+        "--sources",
+        type=int,
+        default=4,
+        help="number of sources within each binary",
+    )
+    arg_parser.add_argument(
+        "--headers",
+        type=int,
+        default=4,
+        help="number of headers within each binary (included by every source of the binary)",
+    )
+    arg_parser.add_argument(
+        "--components",
+        type=int,
+        default=8,
+        help="number of dependency components at scale 1 (every binary uses all of them)",
+    )
+    arg_parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=3,
+        help="number of no-op and one-file-edit rebuilds timed at each scale",
+    )
+    arg_parser.add_argument(
+        "--work-dir",
+        default=os.path.join(
+            tempfile.gettempdir(), "cpp_template_scalability_benchmark"
+        ),
+        help="directory in which the sample projects are generated",
+    )
+    arg_parser.add_argument(
+        "--output",
+        help="path of the JSON file the results are written to (by default 'scaling.json' within the work directory)",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+    scales: List[int] = sorted(
+        {int(scale) for scale in args.scales.split(",") if scale.strip()}
+    )
+    if len(scales) == 0 or scales[0] < 1:
+        arg_parser.error("--scales must contain positive integers")
+
+    # The sample projects are generated outside of this project since they are copies of it
+    work_dir: str = os.path.abspath(args.work_dir)
+    output: str = (
+        os.path.abspath(args.output)
+        if args.output is not None
+        else os.path.join(work_dir, "scaling.json")
+    )
+
+    results: List[Measurement] = [
+        measure(
+            work_dir,
+            scale,
+            args.binaries * scale,
+            args.sources,
+            args.headers,
+            args.components * scale,
+            args.repetitions,
+        )
+        for scale in scales
+    ]
+
+    exponents: Dict[str, float] = {
+        metric: growth_exponent(results[0], results[-1], metric) for metric in metrics
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "measurements": [asdict(result) for result in results],
+                "growth_exponents": {
+                    metric: (None if math.isnan(exponent) else exponent)
+                    for metric, exponent in exponents.items()
+                },
+            },
+            file,
+            indent=4,
+        )
+
+    # Report the scaling curve
+    print("\n", end="")
+    print(
+        "\033[34;1m{:>6} {:>9} {:>8} {:>11} {:>10} {:>10} {:>10} {:>10} {:>10}\033[0m".format(
+            "scale",
+            "binaries",
+            "sources",
+            "components",
+            "generate",
+            "configure",
+            "clean",
+            "no-op",
+            "edit",
+        )
+    )
+    for result in results:
+        print(
+            "{:>6} {:>9} {:>8} {:>11} {:>9.2f}s {:>9.2f}s {:>9.2f}s {:>9.2f}s {:>9.2f}s".format(
+                result.scale,
+                result.binaries,
+                result.sources,
+                result.components,
+                result.generate_seconds,
+                result.configure_seconds,
+                result.clean_build_seconds,
+                result.noop_rebuild_seconds,
+                result.edit_rebuild_seconds,
+            )
+        )
+    if len(results) > 1:
+        print(
+            "Growth exponents from scale {} to {} (1 is linear, 2 is quadratic):".format(
+                results[0].scale, results[-1].scale
+            )
+        )
+        for metric, exponent in exponents.items():
+            print(
+                "  "
+                + metric.removesuffix("_seconds").ljust(16)
+                + "{:.2f}".format(exponent)
+            )
+    print("Results written to " + output)
@@ -192,6 +192,7 @@ def configure() -> None:
     # Remove unnecessary files.
     remove(".git")
     remove("tests")
+    remove("benchmarks")
     remove(".gitignore")
     remove(".gitattributes")
     remove("LICENSE")
@@ -209,9 +210,10 @@ def configure() -> None:
         # The VERSION file is unnecessary if Conan is used.
         remove("VERSION")
 
-    # Create the virtual environment.
+    # Create the virtual environment (a shared virtual environment is only created if it does not exist since other projects use it).
     venv = import_module("this_venv")
-    venv.create()
+    if not (os.environ.get(venv.shared_path_variable) and venv.exists()):
+        venv.create()
 
     # Configure templates.
     subprocess.run(
@@ -241,6 +243,7 @@ def configure() -> None:
     # Remove files dependent on use of the version header
     if config["version_header"] != "true":
         remove("src", "version.cpp")
+        remove("src", "version.cppm.in")
         if config["package_type"] == "library":
             remove("include", "version.hpp.in")
         else:
@@ -252,13 +255,22 @@ def configure() -> None:
     # Remove files dependent on support for Conan.
     if config["conan"] != "true":
         remove("build_scripts")
+        remove("src", "version.cppm.in.tmpl")
         remove("conanfile.py.tmpl")
         remove("clean.py.tmpl")
         remove("build.py")
         remove("clear_cache.py")
+        remove("deps_cache.py")
+        remove("flame_graph.py")
+        remove("include_graph.py")
+        remove("lint.py")
         remove("profiles.py")
+        remove("scheduler.py")
+        remove("size_report.py")
+        remove("telemetry.py")
         remove("this_venv.py")
         remove("update_deps.py")
+        remove("workspace.py")
 
     if config["conan"] == "true":
         config_module = import_module("update_deps")
@@ -81,6 +81,8 @@ if __name__ == "__main__":
     templater.configure(posixpath.join("include", "version.hpp.in.tmpl"))
     templater.configure(posixpath.join("src", "version.cpp.tmpl"))
     templater.configure(posixpath.join("tests", "version.test.cpp.tmpl"))
+    if config["conan"] == "true":
+        templater.configure(posixpath.join("src", "version.cppm.in.tmpl"))
 
     # Configure build-related templates.
     if config["conan"] == "true":
@@ -1,41 +1,582 @@
 """Build this project using Conan"""
 
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from importlib import import_module
 from sys import argv
-from typing import List
+from typing import List, Optional, Set, Tuple
 
 
 this_dir: str = os.path.dirname(__file__)
 
+# File within each build folder that records the state of the dependency graph when its system packages were last satisfied
+system_packages_stamp: str = "system_packages.stamp"
 
-def conan(command: str, profiles_abs_paths, extra_args: List[str] = []) -> None:
-    """Execute Conan with the given command, profiles, and extra arguments"""
+# Modes of the system package manager supported by Conan ('report' never invokes the system package manager)
+system_package_modes: List[str] = ["check", "install", "report"]
+
+# Host profile generated from the active host profile for optimized builds (see 'write_optimized_profile')
+optimized_profile: str = "optimized.profile"
+
+# Log written by distcc within each build folder when compilation is distributed (see 'conanfile.py')
+distcc_log: str = "distcc.log"
+
+# Message logged by distcc for each compilation ('compile <file> on <host>' followed by 'completed ok' for successful remote compilations)
+distcc_compile = re.compile(r"compile (.+?) on (\S+)( completed ok)?\s*$")
+
+
+@dataclass
+class MatrixResult:
+    """The outcome of building this project for one profile of a build matrix"""
+
+    profile: str
+    success: bool
+    seconds: float
+    log_path: str
+
+
+def conan_command(
+    command: str,
+    profiles_abs_paths,
+    extra_args: List[str] = [],
+    system_packages: str = "install",
+    lockfile_out: bool = True,
+) -> List[str]:
+    """Returns the Conan command line for the given command, profiles, extra arguments, and system package manager mode. The resolved dependencies are written to the lockfile of the build folder unless disabled (e.g. for commands that only inspect the dependency graph)"""
+
+    venv = import_module("this_venv")
+    profiles = import_module("profiles")
+    folder: str = profiles.build_folder(profiles_abs_paths)
+    sudo_args: List[str] = (
+        ["--conf:host", "tools.system.package_manager:sudo=True"]
+        if system_packages == "install"
+        else []
+    )
+    lockfile_args: List[str] = (
+        ["--lockfile-out", os.path.join(this_dir, folder, "conan.lock")]
+        if lockfile_out
+        else []
+    )
+    return [venv.conan()] + command.split() + [
+        "--build=missing",
+        "--profile:build",
+        profiles_abs_paths.build,
+        "--profile:host",
+        profiles_abs_paths.host,
+        "--conf:host",
+        "tools.system.package_manager:mode=" + system_packages,
+    ] + sudo_args + [
+        "--conf:host",
+        "&:user.build:folder=" + folder,
+    ] + lockfile_args + [this_dir] + extra_args
+
+
+def _system_packages_fingerprint(profiles_abs_paths) -> str:
+    """Returns a hash of everything that determines which system packages are required for the given profiles"""
+
+    deps_cache = import_module("deps_cache")
+    digest = hashlib.sha256(deps_cache.fingerprint(profiles_abs_paths).encode())
+    lockfile_path: Optional[str] = lockfile(profiles_abs_paths)
+    if lockfile_path is not None:
+        with open(lockfile_path, "rb") as lockfile_file:
+            digest.update(lockfile_file.read())
+    return digest.hexdigest()
+
+
+def _system_packages_stamp_path(profiles_abs_paths) -> str:
+    """Returns the path to the system package stamp within the build folder for the given profiles"""
+
+    profiles = import_module("profiles")
+    return os.path.join(
+        this_dir, profiles.build_folder(profiles_abs_paths), system_packages_stamp
+    )
+
+
+def system_packages_satisfied(profiles_abs_paths) -> bool:
+    """Returns true if the system packages required for the given profiles were satisfied by a previous build and nothing has changed since"""
+
+    try:
+        with open(_system_packages_stamp_path(profiles_abs_paths), "r") as stamp:
+            return stamp.read().strip() == _system_packages_fingerprint(
+                profiles_abs_paths
+            )
+    except FileNotFoundError:
+        return False
+
+
+def record_system_packages(profiles_abs_paths) -> None:
+    """Record that the system packages required for the given profiles are satisfied"""
+
+    with open(_system_packages_stamp_path(profiles_abs_paths), "w") as stamp:
+        stamp.write(_system_packages_fingerprint(profiles_abs_paths) + "\n")
+
+
+def add_system_packages_argument(arg_parser: ArgumentParser) -> None:
+    """Add the option for selecting the system package manager mode to a command line argument parser"""
+
+    arg_parser.add_argument(
+        "--system-packages",
+        choices=system_package_modes,
+        help="'check' fails if required system packages are missing, 'install' installs them (with sudo), and 'report' never invokes the system package manager. By default, system packages are installed only if they have not been satisfied since the dependencies or profiles last changed",
+    )
+
+
+def conan(
+    command: str,
+    profiles_abs_paths,
+    extra_args: List[str] = [],
+    system_packages: Optional[str] = None,
+    script: str = "build",
+    share: int = 1,
+    lockfile_out: bool = True,
+) -> None:
+    """Execute Conan with the given command, profiles, extra arguments, and system package manager mode (chosen automatically if not given). Telemetry is recorded in the build folder under the name of the given script. Compile and link jobs are limited to the given share of processors and memory (e.g. 2 for half of them). The lockfile of the build folder is only written if lockfile_out is true"""
+
+    profiles = import_module("profiles")
+    telemetry = import_module("telemetry")
+    scheduler = import_module("scheduler")
+    build_dir: str = os.path.join(this_dir, profiles.build_folder(profiles_abs_paths))
+    recorder = telemetry.Recorder(script, build_dir)
+
+    recorder.begin("venv")
+    venv = import_module("this_venv")
+    if not venv.exists():
+        venv.create()
+    profiles.record_build_folder(profiles_abs_paths)
+
+    # Restore missing dependencies from the package store (if one is configured) so they are not rebuilt or downloaded
+    deps_cache = import_module("deps_cache")
+    store = deps_cache.store_dir()
+    if store is not None:
+        recorder.begin("restore")
+        deps_cache.restore(profiles_abs_paths, store)
+
+    # Avoid invoking the system package manager (and sudo) if the required system packages were already satisfied
+    mode: Optional[str] = system_packages
+    if mode is None:
+        mode = "report" if system_packages_satisfied(profiles_abs_paths) else "install"
+
+    # Limit concurrent compile and link jobs (of this project and of dependencies built from source) to what fits in memory. Jobs given explicitly in the extra arguments take precedence.
+    job_budget = scheduler.budget(build_dir, share)
+    recorder.job_budget = job_budget
+
+    command_line: List[str] = conan_command(
+        command,
+        profiles_abs_paths,
+        scheduler.conan_args(job_budget) + extra_args,
+        mode,
+        lockfile_out,
+    )
+    returncode: int = recorder.run(command_line)
+    recorder.write()
+    scheduler.learn(
+        build_dir, recorder.peak_compile_rss_bytes, recorder.peak_link_rss_bytes
+    )
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command_line)
+
+    if mode != "report":
+        record_system_packages(profiles_abs_paths)
+
+
+def publish_compile_commands(profiles_abs_paths) -> None:
+    """Copy the compilation database of the build folder for the given profiles to the 'build' directory (where 'compile_commands.json' in the project root points) so tools like clangd follow the active profiles"""
+
+    profiles = import_module("profiles")
+    source: str = os.path.join(
+        this_dir, profiles.build_folder(profiles_abs_paths), "compile_commands.json"
+    )
+    if not os.path.isfile(source):
+        return
+    destination: str = os.path.join(profiles.build_dir, "compile_commands.json")
+    temp_path: str = destination + "." + str(os.getpid()) + ".tmp"
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+def distribute_args(hosts: str) -> List[str]:
+    """Returns the Conan arguments that distribute the compilation of this project between the given distcc hosts"""
+
+    return ["--conf:host", "&:user.build:distribute=" + hosts]
+
+
+def fast_link_args(linker: str, gdb_index: bool) -> List[str]:
+    """Returns the Conan arguments that link this project with the given linker ('auto' selects the fastest linker that is installed) and split debug information"""
+
+    args: List[str] = ["--conf:host", "&:user.build:fast_link=" + linker]
+    if gdb_index:
+        args += ["--conf:host", "&:user.build:gdb_index=True"]
+    return args
+
+
+def merge_tests_args() -> List[str]:
+    """Returns the Conan arguments that link the tests of this project that use the same dependencies into one executable"""
+
+    return ["--conf:host", "&:user.build:merge_tests=True"]
+
+
+def affected_tests_args() -> List[str]:
+    """Returns the Conan arguments that only run the tests of this project affected by changes since they last passed"""
+
+    return ["--conf:host", "&:user.build:affected_tests=True"]
+
+
+def write_optimized_profile() -> str:
+    """Write a Conan host profile that extends the active host profile with an optimized release configuration and return its absolute path"""
+
+    profiles = import_module("profiles")
+    host: str = profiles.get_profiles().host
+    path: str = profiles.abs_path_to_profile(optimized_profile)
+
+    # Keep the existing profile if it is active (it cannot include itself)
+    if os.path.abspath(profiles.abs_path_to_profile(host)) == os.path.abspath(path):
+        return path
+
+    content: str = (
+        "# Generated by build.py: the active host profile with static dependencies, link-time optimization, unused code removal, and hidden library symbols\n"
+        + "include("
+        + host.replace(os.sep, "/")
+        + ")\n\n[settings]\nbuild_type=Release\n\n[options]\n*:shared=False\n\n[conf]\n&:user.build:optimized=True\n"
+    )
+
+    # Only rewrite the profile if it changed so dependent build state (e.g. the system package stamp) remains valid
+    if os.path.isfile(path):
+        with open(path, "r") as profile:
+            if profile.read() == content:
+                return path
+    with open(path, "w") as profile:
+        profile.write(content)
+    return path
+
+
+def _distcc_log_path(profiles_abs_paths) -> str:
+    """Returns the path to the distcc log within the build folder for the given profiles"""
+
+    profiles = import_module("profiles")
+    return os.path.join(this_dir, profiles.build_folder(profiles_abs_paths), distcc_log)
+
+
+def reset_distribution(profiles_abs_paths) -> None:
+    """Remove the distcc log of the previous build so only the jobs of the next build are reported"""
+
+    log_path: str = _distcc_log_path(profiles_abs_paths)
+    if os.path.isfile(log_path):
+        os.remove(log_path)
+
+
+def distribution(profiles_abs_paths) -> Tuple[int, int]:
+    """Returns the number of compilations that ran on this machine and on remote distcc hosts during the last build with the given profiles"""
+
+    local: Set[str] = set()
+    remote: Set[str] = set()
+    try:
+        with open(_distcc_log_path(profiles_abs_paths), "r", errors="replace") as log:
+            for line in log:
+                entry = distcc_compile.search(line)
+                if entry is None:
+                    continue
+                # distcc compiles on this machine without a daemon when the host is 'localhost' (including when a remote compilation fails and is retried locally)
+                if entry.group(2).startswith("localhost"):
+                    local.add(entry.group(1))
+                elif entry.group(3) is not None:
+                    remote.add(entry.group(1))
+    except FileNotFoundError:
+        pass
+    return len(local - remote), len(remote)
+
+
+def report_distribution(profiles_abs_paths) -> None:
+    """Write the number of compilations that ran on this machine and on remote distcc hosts during the last build to standard out"""
+
+    local, remote = distribution(profiles_abs_paths)
+    total: int = local + remote
+    print(
+        "Distributed compilation: "
+        + str(remote)
+        + " remote and "
+        + str(local)
+        + " local jobs"
+        + (" ({:.0f}% remote)".format(100 * remote / total) if total > 0 else "")
+    )
+
+
+def lockfile(profiles_abs_paths) -> Optional[str]:
+    """Returns the absolute path to the lockfile written by the last build with the given profiles or None if it does not exist"""
+
+    profiles = import_module("profiles")
+    path: str = os.path.join(
+        this_dir, profiles.build_folder(profiles_abs_paths), "conan.lock"
+    )
+    return path if os.path.isfile(path) else None
+
+
+def graph_info(profiles_abs_paths, lockfile: Optional[str] = None) -> dict:
+    """Returns the dependency graph of this project for the given profiles (and optionally a lockfile) represented as JSON"""
 
     venv = import_module("this_venv")
     if not venv.exists():
         venv.create()
-    subprocess.run(
+    lockfile_args: List[str] = (
+        ["--lockfile", lockfile, "--lockfile-partial"] if lockfile is not None else []
+    )
+    graph_json: str = subprocess.run(
         [
             venv.conan(),
-            command,
-            "--build=missing",
+            "graph",
+            "info",
+            "--format=json",
             "--profile:build",
             profiles_abs_paths.build,
             "--profile:host",
             profiles_abs_paths.host,
-            "--conf:host",
-            "tools.system.package_manager:mode=install",
-            "--conf:host",
-            "tools.system.package_manager:sudo=True",
-            this_dir,
         ]
-        + extra_args,
+        + lockfile_args
+        + [this_dir],
         check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout
+    return json.loads(graph_json)
+
+
+def _matrix_profiles(host_profiles: List[str]):
+    """Returns the absolute paths to the profiles used for each entry of a build matrix"""
+
+    profiles = import_module("profiles")
+    build_profile: str = profiles.get_profiles_abs_paths().build
+
+    matrix_profiles = []
+    for host_profile in host_profiles:
+        host_abs_path: str = profiles.abs_path_to_profile(host_profile)
+        if not os.path.isfile(host_abs_path) and os.path.isfile(
+            host_abs_path + ".profile"
+        ):
+            host_abs_path += ".profile"
+        if not os.path.isfile(host_abs_path):
+            raise RuntimeError(
+                "The profile '"
+                + host_profile
+                + "' does not exist in '"
+                + profiles.profile_dir
+                + "'"
+            )
+        matrix_profiles.append(profiles.Profiles(host=host_abs_path, build=build_profile))
+    return matrix_profiles
+
+
+def _build_matrix_entry(
+    name: str, profiles_abs_paths, share: int, extra_args: List[str]
+) -> MatrixResult:
+    """Build this project for one entry of a build matrix (with the given share of processors and memory) and record the output in its build folder"""
+
+    profiles = import_module("profiles")
+    telemetry = import_module("telemetry")
+    scheduler = import_module("scheduler")
+    build_dir: str = profiles.record_build_folder(profiles_abs_paths)
+    log_path: str = os.path.join(build_dir, "build.log")
+    recorder = telemetry.Recorder("build", build_dir)
+    job_budget = scheduler.budget(build_dir, share)
+    recorder.job_budget = job_budget
+
+    start: float = time.monotonic()
+    with open(log_path, "w") as log:
+        returncode: int = recorder.run(
+            conan_command(
+                "build",
+                profiles_abs_paths,
+                scheduler.conan_args(job_budget) + extra_args,
+                # System packages were already satisfied while installing dependencies
+                "report",
+            ),
+            log,
+        )
+    recorder.write()
+    scheduler.learn(
+        build_dir, recorder.peak_compile_rss_bytes, recorder.peak_link_rss_bytes
+    )
+    return MatrixResult(
+        profile=name,
+        success=returncode == 0,
+        seconds=time.monotonic() - start,
+        log_path=log_path,
     )
 
 
+def matrix(
+    host_profiles: List[str],
+    extra_args: List[str] = [],
+    system_packages: Optional[str] = None,
+) -> bool:
+    """Build this project concurrently for several host profiles and write a summary to standard out. Returns true if every build succeeded"""
+
+    venv = import_module("this_venv")
+    if not venv.exists():
+        venv.create()
+
+    matrix_profiles = _matrix_profiles(host_profiles)
+
+    # Conan does not support concurrent modifications to its cache, so missing dependencies are installed for each profile one at a time before building concurrently.
+    for profiles_abs_paths in matrix_profiles:
+        conan(
+            "install", profiles_abs_paths, extra_args, system_packages, "dependencies"
+        )
+
+    # Split the available processors and memory between the concurrent builds
+    share: int = len(matrix_profiles)
+
+    with ThreadPoolExecutor(max_workers=len(matrix_profiles)) as executor:
+        results: List[MatrixResult] = list(
+            executor.map(
+                lambda entry: _build_matrix_entry(
+                    entry[0], entry[1], share, extra_args
+                ),
+                zip(host_profiles, matrix_profiles),
+            )
+        )
+
+    # Report the status of each build
+    print("\n", end="")
+    name_width: int = max(len(result.profile) for result in results)
+    for result in results:
+        status_msg = (
+            "\033[32;1mSUCCESS\033[0m"
+            if result.success
+            else "\033[31;1mFAILURE\033[0m"
+        )
+        print(
+            "\033[34;1m"
+            + result.profile.ljust(name_width)
+            + "\033[0m: "
+            + status_msg
+            + " {:>8.1f}s  ".format(result.seconds)
+            + os.path.relpath(result.log_path, this_dir)
+        )
+
+    return all(result.success for result in results)
+
+
 if __name__ == "__main__":
-    profiles = import_module("profiles")
-    conan("build", profiles.get_profiles_abs_paths(), list(argv)[1:])
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python build.py",
+        description="This script builds this project using Conan and Meson. Each pair of host and build profiles is built in its own folder within the 'build' directory.",
+        epilog="All unrecognized arguments are passed to Conan.",
+        allow_abbrev=False,
+    )
+    arg_parser.add_argument(
+        "--matrix",
+        help="build concurrently for each of the given comma-separated host profiles (relative to the 'profiles' directory) instead of the active host profile",
+    )
+    arg_parser.add_argument(
+        "--distribute",
+        metavar="HOSTS",
+        help="distribute compilation between the given distcc hosts (in the format of DISTCC_HOSTS, e.g. '127.0.0.1/4 build-server/16'). Linking and tests run locally",
+    )
+    arg_parser.add_argument(
+        "--fast-link",
+        nargs="?",
+        const="auto",
+        metavar="LINKER",
+        help="link this project with 'mold', 'lld', 'gold', or 'bfd' (or with the fastest linker that is installed if none is given) and write the debug information of debug builds to separate files",
+    )
+    arg_parser.add_argument(
+        "--gdb-index",
+        action="store_true",
+        help="generate a GDB index while linking debug builds (requires --fast-link with a linker other than 'bfd')",
+    )
+    arg_parser.add_argument(
+        "--optimized",
+        action="store_true",
+        help="build with the '"
+        + optimized_profile
+        + "' host profile (the active host profile in release mode with every dependency linked statically, link-time optimization, unused code removal, and hidden library symbols) instead of the active host profile",
+    )
+    arg_parser.add_argument(
+        "--merge-tests",
+        action="store_true",
+        help="link the tests that use the same dependencies (and do not declare their own 'main' function or modules) into one executable. Each test still runs separately and only runs the GoogleTest suites declared by its own sources",
+    )
+    arg_parser.add_argument(
+        "--affected",
+        action="store_true",
+        help="only run the tests whose executables, shared libraries, or dependencies changed since they last passed (found with the Ninja dependency graph and 'binary_config.json'). The other tests are reported as passed from the results of previous runs",
+    )
+    arg_parser.add_argument(
+        "--dependencies-only",
+        action="store_true",
+        help="install dependencies and generate the build files without building this project",
+    )
+    arg_parser.add_argument(
+        "--share",
+        type=int,
+        default=1,
+        help="number of builds running concurrently on this machine (the available processors and memory are split evenly between them)",
+    )
+    add_system_packages_argument(arg_parser)
+
+    # Parse command line arguments.
+    args, conan_args = arg_parser.parse_known_args(list(argv)[1:])
+    if args.optimized and args.matrix is not None:
+        arg_parser.error("--optimized cannot be combined with --matrix")
+    if args.dependencies_only and args.matrix is not None:
+        arg_parser.error("--dependencies-only cannot be combined with --matrix")
+    if args.share < 1:
+        arg_parser.error("--share must be at least 1")
+    if args.gdb_index and args.fast_link is None:
+        arg_parser.error("--gdb-index requires --fast-link")
+    if args.fast_link is not None:
+        conan_args = fast_link_args(args.fast_link, args.gdb_index) + conan_args
+    if args.distribute is not None:
+        conan_args = distribute_args(args.distribute) + conan_args
+    if args.merge_tests:
+        conan_args = merge_tests_args() + conan_args
+    if args.affected:
+        conan_args = affected_tests_args() + conan_args
+
+    if args.matrix is not None:
+        host_profiles: List[str] = [
+            profile.strip() for profile in args.matrix.split(",") if profile.strip()
+        ]
+        if len(host_profiles) == 0:
+            arg_parser.error("--matrix requires at least one profile")
+        if not matrix(host_profiles, conan_args, args.system_packages):
+            exit(1)
+    else:
+        profiles = import_module("profiles")
+        profiles_abs_paths = profiles.get_profiles_abs_paths()
+        if args.optimized:
+            profiles_abs_paths = profiles.Profiles(
+                host=write_optimized_profile(), build=profiles_abs_paths.build
+            )
+        if args.dependencies_only:
+            conan(
+                "install",
+                profiles_abs_paths,
+                conan_args,
+                args.system_packages,
+                "dependencies",
+                args.share,
+            )
+        else:
+            if args.distribute is not None:
+                reset_distribution(profiles_abs_paths)
+            conan(
+                "build",
+                profiles_abs_paths,
+                conan_args,
+                args.system_packages,
+                share=args.share,
+            )
+            # Optimized builds do not use the active profiles, so tools like clangd keep following the active build folder
+            if not args.optimized:
+                publish_compile_commands(profiles_abs_paths)
+            if args.distribute is not None:
+                report_distribution(profiles_abs_paths)
@@ -23,5 +23,15 @@ if __name__ == "__main__":
     input_path: str = os.path.join(meson_build, sys.argv[1])
     output_path: str = os.path.join(meson_source, sys.argv[2])
 
-    # Copy the file to its destination
-    shutil.copyfile(input_path, output_path)
+    # Leave the destination untouched if it is already up to date so its modification time does not force dependent sources to be recompiled
+    with open(input_path, "rb") as input_file:
+        content: bytes = input_file.read()
+    if os.path.isfile(output_path):
+        with open(output_path, "rb") as output_file:
+            if output_file.read() == content:
+                sys.exit(0)
+
+    # Copy the file to its destination (atomically, since builds for other profiles may be reading it)
+    temp_path: str = output_path + "." + str(os.getpid()) + ".tmp"
+    shutil.copyfile(input_path, temp_path)
+    os.replace(temp_path, output_path)
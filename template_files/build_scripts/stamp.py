@@ -0,0 +1,13 @@
+"""Create or update an empty file that marks the completion of a build step"""
+
+import os, sys
+
+
+if __name__ == "__main__":
+    # Get the path to the stamp file
+    stamp_path: str = sys.argv[1]
+
+    # Create the stamp file (or update its modification time if it already exists)
+    with open(stamp_path, "a"):
+        pass
+    os.utime(stamp_path)
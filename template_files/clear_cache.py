@@ -1,7 +1,257 @@
-"""Clear the Conan cache"""
+"""Clear or trim the Conan cache"""
 
+import json
+import os
+import sqlite3
 import subprocess
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass
 from importlib import import_module
+from typing import List, Optional, Set
+
+
+size_suffixes: dict = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+age_suffixes: dict = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+
+@dataclass
+class CachedPackage:
+    """A binary package stored in the Conan cache"""
+
+    reference: str
+    rrev: str
+    pkgid: str
+    prev: str
+    path: str
+    size: int = 0
+    last_used: int = 0
+
+    def recipe(self) -> str:
+        """Returns the recipe reference (with revision) of this package"""
+
+        return self.reference + "#" + self.rrev
+
+    def id(self) -> str:
+        """Returns the package reference without the package revision"""
+
+        return self.recipe() + ":" + self.pkgid
+
+    def pref(self) -> str:
+        """Returns the full package reference (with revisions)"""
+
+        return self.id() + "#" + self.prev
+
+
+def parse_size(size: str) -> int:
+    """Converts a size like '512M' or '20G' to a number of bytes"""
+
+    size = size.strip().upper().removesuffix("B")
+    if size and size[-1] in size_suffixes:
+        return int(float(size[:-1]) * size_suffixes[size[-1]])
+    return int(size)
+
+
+def parse_age(age: str) -> int:
+    """Converts an age like '12h' or '4w' (the format used by 'conan remove --lru') to a number of seconds"""
+
+    age = age.strip()
+    if age and age[-1] in age_suffixes:
+        return int(float(age[:-1]) * age_suffixes[age[-1]])
+    return int(age)
+
+
+def format_size(size: int) -> str:
+    """Converts a number of bytes to a human readable size"""
+
+    for suffix in ["T", "G", "M", "K"]:
+        if size >= size_suffixes[suffix]:
+            return "{:.1f}{}".format(size / size_suffixes[suffix], suffix)
+    return str(size) + "B"
+
+
+def _dir_size(dir_path: str) -> int:
+    """Returns the total size of all files within a directory"""
+
+    total: int = 0
+    for root, _, files in os.walk(dir_path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def cached_packages() -> List[CachedPackage]:
+    """Returns all binary packages in the Conan cache along with their sizes and last use times"""
+
+    venv = import_module("this_venv")
+    home: str = subprocess.run(
+        [venv.conan(), "config", "home"], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    storage: str = os.path.join(home, "p")
+
+    # WARN: The Conan CLI does not expose the time each package was last used, so the cache database is read directly.
+    #       This depends on private implementation details of Conan. Expect breaking changes!
+    database = sqlite3.connect(
+        "file:" + os.path.join(storage, "cache.sqlite3") + "?mode=ro", uri=True
+    )
+    try:
+        rows = database.execute(
+            "SELECT reference, rrev, pkgid, prev, path, lru FROM packages"
+        ).fetchall()
+    except sqlite3.OperationalError as error:
+        raise RuntimeError(
+            "Failed to read the Conan cache database (" + str(error) + ")"
+        )
+    finally:
+        database.close()
+
+    packages: List[CachedPackage] = []
+    for reference, rrev, pkgid, prev, path, lru in rows:
+        # Packages without a package revision are incomplete builds
+        if not prev:
+            continue
+        package_path: str = os.path.join(storage, path)
+        packages.append(
+            CachedPackage(
+                reference=reference,
+                rrev=rrev,
+                pkgid=pkgid,
+                prev=prev,
+                path=package_path,
+                size=_dir_size(package_path),
+                last_used=lru,
+            )
+        )
+    return packages
+
+
+def referenced_packages() -> Set[str]:
+    """Returns the packages (without package revisions) referenced by the dependency graph of the active profiles and by the build folder of every other pair of profiles"""
+
+    build = import_module("build")
+    profiles = import_module("profiles")
+    packages: Set[str] = packages_in_graph(
+        build.graph_info(profiles.get_profiles_abs_paths())
+    )
+
+    # Keep the packages used by existing build folders (resolved with the lockfile written by the last build) so switching back to those profiles does not rebuild dependencies
+    for folder, folder_profiles in profiles.build_folders().items():
+        packages |= packages_in_graph(
+            build.graph_info(folder_profiles, build.lockfile(folder_profiles))
+        )
+    return packages
+
+
+def packages_in_graph(graph: dict) -> Set[str]:
+    """Returns the packages (without package revisions) within a Conan dependency graph represented as JSON"""
+
+    packages: Set[str] = set()
+    for node in graph["graph"]["nodes"].values():
+        # The root node is the consumer (this project) and is not stored in the cache
+        if node["package_id"] is None or "#" not in str(node["ref"]):
+            continue
+        packages.add(node["ref"] + ":" + node["package_id"])
+    return packages
+
+
+def select_evictions(
+    packages: List[CachedPackage],
+    keep: Set[str],
+    budget: Optional[int] = None,
+    max_age: Optional[int] = None,
+) -> List[CachedPackage]:
+    """Select the least recently used packages to remove so the cache fits within a size budget and no package is older than a maximum age"""
+
+    total: int = sum(package.size for package in packages)
+    oldest_allowed: int = int(time.time()) - max_age if max_age is not None else 0
+
+    evictions: List[CachedPackage] = []
+    candidates = sorted(
+        [package for package in packages if package.id() not in keep],
+        key=lambda package: package.last_used,
+    )
+    for package in candidates:
+        over_budget: bool = budget is not None and total > budget
+        too_old: bool = max_age is not None and package.last_used < oldest_allowed
+        if not over_budget and not too_old:
+            continue
+        evictions.append(package)
+        total -= package.size
+    return evictions
+
+
+def report(evictions: List[CachedPackage], packages: List[CachedPackage]) -> None:
+    """Write the packages selected for removal and the space they occupy to standard out"""
+
+    for package in evictions:
+        print(
+            "{:>8}  {}  {}".format(
+                format_size(package.size),
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(package.last_used)),
+                package.pref(),
+            )
+        )
+    freed: int = sum(package.size for package in evictions)
+    total: int = sum(package.size for package in packages)
+    print(
+        "Freeing "
+        + format_size(freed)
+        + " ("
+        + str(len(evictions))
+        + " of "
+        + str(len(packages))
+        + " packages). The cache will use "
+        + format_size(total - freed)
+        + "."
+    )
+
+
+def evict(evictions: List[CachedPackage]) -> None:
+    """Remove the given packages from the Conan cache"""
+
+    if len(evictions) == 0:
+        return
+
+    # Remove all selected packages with a single invocation of Conan using a package list
+    package_list: dict = {}
+    for package in evictions:
+        revisions = package_list.setdefault(package.reference, {"revisions": {}})
+        packages = revisions["revisions"].setdefault(package.rrev, {"packages": {}})
+        package_revisions = packages["packages"].setdefault(
+            package.pkgid, {"revisions": {}}
+        )
+        package_revisions["revisions"][package.prev] = {}
+
+    venv = import_module("this_venv")
+    list_fd, list_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(list_fd, "w") as list_file:
+        json.dump({"Local Cache": package_list}, list_file, indent=4)
+    try:
+        subprocess.run(
+            [venv.conan(), "remove", "--confirm", "--list", list_path], check=True
+        )
+    finally:
+        os.remove(list_path)
+
+
+def trim_cache(
+    budget: Optional[int] = None, max_age: Optional[int] = None, dry_run: bool = False
+) -> None:
+    """Remove the least recently used packages that this project does not depend on"""
+
+    venv = import_module("this_venv")
+    if not venv.exists():
+        venv.create()
+
+    packages = cached_packages()
+    evictions = select_evictions(packages, referenced_packages(), budget, max_age)
+    report(evictions, packages)
+    if not dry_run:
+        evict(evictions)
 
 
 def clear_cache() -> None:
@@ -14,4 +264,35 @@ def clear_cache() -> None:
 
 
 if __name__ == "__main__":
-    clear_cache()
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python clear_cache.py",
+        description="This script removes packages from the Conan cache. When run without arguments, every package is removed. When a size budget or maximum age is given, only the least recently used packages that this project does not depend on (for the active profiles or any profiles with an existing build folder) are removed until the cache fits within the budget and no remaining package is older than the maximum age.",
+    )
+    arg_parser.add_argument(
+        "--budget",
+        help="maximum size of the Conan cache (e.g. '512M' or '20G')",
+    )
+    arg_parser.add_argument(
+        "--max-age",
+        help="remove packages that have not been used within this time (e.g. '12h', '5d', or '4w')",
+    )
+    arg_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="list the packages that would be removed without removing them",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+
+    if args.budget is None and args.max_age is None:
+        if args.dry_run:
+            arg_parser.error("--dry-run requires --budget or --max-age")
+        clear_cache()
+    else:
+        trim_cache(
+            budget=parse_size(args.budget) if args.budget is not None else None,
+            max_age=parse_age(args.max_age) if args.max_age is not None else None,
+            dry_run=args.dry_run,
+        )
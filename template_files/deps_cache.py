@@ -0,0 +1,334 @@
+"""Save and restore the dependencies of this project to and from a local package store"""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass
+from importlib import import_module
+from typing import List, Optional, Set
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# Environment variable containing the path to the default package store
+store_env_var: str = "DEPS_CACHE_DIR"
+
+# Files that determine which packages this project depends on ('conan.lock' is the lockfile that Conan applies automatically when it exists next to 'conanfile.py')
+fingerprint_files: List[str] = ["conanfile.py", "conan.lock"]
+
+
+@dataclass
+class StoredPackage:
+    """A binary package that this project depends on"""
+
+    reference: str
+    rrev: str
+    pkgid: str
+    prev: str
+
+    def pref(self) -> str:
+        """Returns the full package reference (with revisions)"""
+
+        return self.reference + "#" + self.rrev + ":" + self.pkgid + "#" + self.prev
+
+    def archive_name(self) -> str:
+        """Returns the name of the archive containing this package within a package store. Archives are addressed by the full package reference so they never change once written"""
+
+        return hashlib.sha256(self.pref().encode()).hexdigest() + ".tgz"
+
+
+def store_dir(store: Optional[str] = None) -> Optional[str]:
+    """Returns the absolute path to the given package store or to the package store set by the environment (if any)"""
+
+    if store is None:
+        store = os.environ.get(store_env_var)
+    if not store:
+        return None
+    return os.path.abspath(os.path.expanduser(store))
+
+
+def declared_requirements() -> List[str]:
+    """Returns the requirements declared in the dependency configuration file (without the resolved versions and components that are written back to it during builds)"""
+
+    update_deps = import_module("update_deps")
+    deps = update_deps.Dependencies()
+    deps.read()
+    return sorted(
+        json.dumps([dep.recipe, dep.link_preference, dep.dynamic])
+        for dep in deps.get().values()
+    )
+
+
+def resolved_profiles(profiles_abs_paths) -> str:
+    """Returns the given profiles as resolved by Conan (with the profiles they include and their variables substituted)"""
+
+    venv = import_module("this_venv")
+    return subprocess.run(
+        [
+            venv.conan(),
+            "profile",
+            "show",
+            "--profile:build",
+            profiles_abs_paths.build,
+            "--profile:host",
+            profiles_abs_paths.host,
+            "--format=json",
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    ).stdout
+
+
+def fingerprint(profiles_abs_paths) -> str:
+    """Returns a hash of everything that determines which packages this project depends on for the given profiles"""
+
+    digest = hashlib.sha256()
+    for requirement in declared_requirements():
+        digest.update(requirement.encode() + b"\0")
+    for path in [os.path.join(this_dir, file_name) for file_name in fingerprint_files]:
+        # Only file contents are hashed so the same store can be shared between checkouts at different paths
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                digest.update(file.read())
+        digest.update(b"\0")
+    # Profiles are hashed as resolved by Conan so changes to the profiles they include are detected
+    digest.update(resolved_profiles(profiles_abs_paths).encode())
+    return digest.hexdigest()
+
+
+def _manifest_path(store: str, profiles_abs_paths) -> str:
+    """Returns the path to the manifest listing the packages needed for the given profiles"""
+
+    return os.path.join(store, "manifests", fingerprint(profiles_abs_paths) + ".json")
+
+
+def _archive_path(store: str, package: StoredPackage) -> str:
+    """Returns the path to the archive containing a package within a package store"""
+
+    return os.path.join(store, "packages", package.archive_name())
+
+
+def _package_list(packages: List[StoredPackage]) -> dict:
+    """Returns a Conan package list (as used by 'conan cache save' and 'conan cache restore') containing the given packages"""
+
+    package_list: dict = {}
+    for package in packages:
+        revisions = package_list.setdefault(package.reference, {"revisions": {}})
+        pkgids = revisions["revisions"].setdefault(package.rrev, {"packages": {}})
+        package_revisions = pkgids["packages"].setdefault(
+            package.pkgid, {"revisions": {}}
+        )
+        package_revisions["revisions"][package.prev] = {}
+    return {"Local Cache": package_list}
+
+
+def needed_packages(profiles_abs_paths) -> List[StoredPackage]:
+    """Returns the packages in the Conan cache that this project depends on for the given profiles (resolved with the lockfile written by the last build)"""
+
+    build = import_module("build")
+    graph: dict = build.graph_info(
+        profiles_abs_paths, build.lockfile(profiles_abs_paths)
+    )
+
+    packages: List[StoredPackage] = []
+    for node in graph["graph"]["nodes"].values():
+        # The root node is the consumer (this project) and packages without a package revision are not in the cache
+        if node["package_id"] is None or not node.get("prev"):
+            continue
+        reference, _, rrev = str(node["ref"]).partition("#")
+        if not rrev:
+            continue
+        packages.append(
+            StoredPackage(
+                reference=reference,
+                rrev=rrev,
+                pkgid=node["package_id"],
+                prev=node["prev"],
+            )
+        )
+    return packages
+
+
+def cached_prefs() -> Set[str]:
+    """Returns the full references of every binary package in the Conan cache"""
+
+    venv = import_module("this_venv")
+    listing: dict = json.loads(
+        subprocess.run(
+            [venv.conan(), "list", "*#*:*#*", "--format=json"],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+    )
+
+    prefs: Set[str] = set()
+    for reference, recipe in listing.get("Local Cache", {}).items():
+        for rrev, recipe_revision in recipe.get("revisions", {}).items():
+            for pkgid, package in recipe_revision.get("packages", {}).items():
+                for prev in package.get("revisions", {}).keys():
+                    prefs.add(reference + "#" + rrev + ":" + pkgid + "#" + prev)
+    return prefs
+
+
+def _write_json(path: str, content) -> None:
+    """Atomically write JSON to a file so concurrent readers of a shared package store never see a partially written file"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as file:
+        json.dump(content, file, indent=4)
+    os.replace(temp_path, path)
+
+
+def save(profiles_abs_paths, store: str) -> None:
+    """Save the packages that this project depends on for the given profiles to a package store"""
+
+    venv = import_module("this_venv")
+    if not venv.exists():
+        venv.create()
+
+    packages = needed_packages(profiles_abs_paths)
+    saved: int = 0
+    for package in packages:
+        archive_path: str = _archive_path(store, package)
+        if os.path.isfile(archive_path):
+            continue
+
+        # Write each package to its own archive so packages shared between profiles and projects are only stored once
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        list_fd, list_path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(list_fd, "w") as list_file:
+            json.dump(_package_list([package]), list_file, indent=4)
+        archive_fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(archive_path), suffix=".tmp.tgz"
+        )
+        os.close(archive_fd)
+        try:
+            subprocess.run(
+                [
+                    venv.conan(),
+                    "cache",
+                    "save",
+                    "--list",
+                    list_path,
+                    "--file",
+                    temp_path,
+                ],
+                check=True,
+            )
+            os.replace(temp_path, archive_path)
+        finally:
+            os.remove(list_path)
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+        saved += 1
+
+    _write_json(
+        _manifest_path(store, profiles_abs_paths),
+        [package.pref() for package in packages],
+    )
+    print(
+        "Saved "
+        + str(saved)
+        + " of "
+        + str(len(packages))
+        + " packages to '"
+        + store
+        + "' ("
+        + str(len(packages) - saved)
+        + " were already stored)"
+    )
+
+
+def restore(profiles_abs_paths, store: str) -> None:
+    """Restore the packages that this project depends on for the given profiles from a package store and report the hit rate"""
+
+    venv = import_module("this_venv")
+    if not venv.exists():
+        venv.create()
+
+    manifest_path: str = _manifest_path(store, profiles_abs_paths)
+    if not os.path.isfile(manifest_path):
+        print(
+            "Dependency cache miss: '"
+            + store
+            + "' contains no packages for this dependency configuration and these profiles"
+        )
+        return
+    with open(manifest_path, "r") as manifest_file:
+        manifest: List[str] = json.load(manifest_file)
+
+    cached: Set[str] = cached_prefs()
+    missing: List[str] = [pref for pref in manifest if pref not in cached]
+    if len(missing) == 0:
+        print(
+            "Dependency cache: all "
+            + str(len(manifest))
+            + " packages are already in the Conan cache"
+        )
+        return
+
+    restored: int = 0
+    for pref in missing:
+        reference, _, rest = pref.partition("#")
+        rrev, _, rest = rest.partition(":")
+        pkgid, _, prev = rest.partition("#")
+        archive_path: str = _archive_path(
+            store, StoredPackage(reference=reference, rrev=rrev, pkgid=pkgid, prev=prev)
+        )
+        if not os.path.isfile(archive_path):
+            continue
+        subprocess.run(
+            [venv.conan(), "cache", "restore", archive_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        restored += 1
+
+    print(
+        "Dependency cache: restored "
+        + str(restored)
+        + " of "
+        + str(len(missing))
+        + " missing packages (hit rate {:.0f}%)".format(100 * restored / len(missing))
+    )
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python deps_cache.py",
+        description="This script saves the Conan packages that this project depends on (for the active profiles) to a package store and restores them from it. The store is a plain directory (e.g. on shared or network storage) so no Conan remote or network access is required. When the '"
+        + store_env_var
+        + "' environment variable is set, 'build.py' restores packages from that store automatically before building.",
+    )
+    arg_parser.add_argument(
+        "command",
+        choices=["save", "restore"],
+        help="'save' copies the packages from the Conan cache to the store, 'restore' copies missing packages from the store to the Conan cache",
+    )
+    arg_parser.add_argument(
+        "--store",
+        help="path to the package store (defaults to the value of the '"
+        + store_env_var
+        + "' environment variable)",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+
+    store: Optional[str] = store_dir(args.store)
+    if store is None:
+        arg_parser.error("--store is required when '" + store_env_var + "' is not set")
+
+    profiles = import_module("profiles")
+    if args.command == "save":
+        save(profiles.get_profiles_abs_paths(), store)
+    else:
+        restore(profiles.get_profiles_abs_paths(), store)
@@ -0,0 +1,399 @@
+"""Profile a binary of this project and render the results as a flame graph"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+from argparse import ArgumentParser, Namespace
+from importlib import import_module
+from sys import argv
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+
+this_dir: str = os.path.dirname(__file__)
+output_dir: str = os.path.join(this_dir, "build", "profiles")
+profiling_profile: str = "profiling.profile"
+profiling_modes: List[str] = ["frame-pointers", "gprof", "instrument-functions"]
+tools: List[str] = ["perf", "callgrind"]
+
+# Dimensions of the flame graph (in pixels)
+graph_width: int = 1200
+frame_height: int = 16
+font_width: float = 7.0
+
+
+def write_profiling_profile() -> str:
+    """Write a Conan host profile that extends the active host profile with profiling information for this project only and return its absolute path"""
+
+    profiles = import_module("profiles")
+    host: str = profiles.get_profiles().host
+    path: str = profiles.abs_path_to_profile(profiling_profile)
+
+    # Keep the existing profile if it is active (it cannot include itself)
+    if os.path.abspath(profiles.abs_path_to_profile(host)) == os.path.abspath(path):
+        return path
+
+    content: str = (
+        "# Generated by flame_graph.py: the active host profile with debug information and frame pointers for this project\n"
+        + "include("
+        + host.replace(os.sep, "/")
+        + ")\n\n[settings]\n&:build_type=RelWithDebInfo\n\n[conf]\n&:user.build:profiling=frame-pointers\n"
+    )
+
+    # Only rewrite the profile if it changed so dependent build state (e.g. the system package stamp) remains valid
+    if os.path.isfile(path):
+        with open(path, "r") as profile:
+            if profile.read() == content:
+                return path
+    with open(path, "w") as profile:
+        profile.write(content)
+    return path
+
+
+def profiling_binaries() -> List[str]:
+    """Returns the names of the binaries in the binary configuration file that can be profiled (applications and tests)"""
+
+    update_deps = import_module("update_deps")
+    binaries = update_deps.Binaries()
+    binaries.read()
+    return [
+        name
+        for name, binary in binaries.get().items()
+        if binary.bin_type in ["application", "test"]
+    ]
+
+
+def _require_tool(name: str) -> str:
+    """Returns the path to an executable or raises an error if it is not installed"""
+
+    path: Optional[str] = shutil.which(name)
+    if path is None:
+        raise RuntimeError("'" + name + "' is required for profiling but was not found")
+    return path
+
+
+def _frame_name(frame: str) -> str:
+    """Returns the function name of a stack frame written by 'perf script' (without its address, offset, or object file)"""
+
+    parts: List[str] = frame.strip().split(maxsplit=1)
+    symbol: str = parts[1] if len(parts) > 1 else parts[0]
+    symbol = symbol.rsplit(" (", 1)[0]
+    if "+0x" in symbol:
+        symbol = symbol.rsplit("+0x", 1)[0]
+    return symbol.replace(";", ":")
+
+
+def fold_perf_script(script: str) -> Dict[str, int]:
+    """Fold the samples written by 'perf script' into stacks (root first, separated by semicolons) and the number of samples for each"""
+
+    stacks: Dict[str, int] = {}
+    for sample in script.split("\n\n"):
+        lines: List[str] = [line for line in sample.split("\n") if line.strip()]
+        if len(lines) < 2:
+            continue
+        command: str = lines[0].split()[0]
+        frames: List[str] = [_frame_name(line) for line in reversed(lines[1:])]
+        stack: str = ";".join([command] + frames)
+        stacks[stack] = stacks.get(stack, 0) + 1
+    return stacks
+
+
+def fold_callgrind(callgrind_out: str) -> Dict[str, int]:
+    """Fold the output of callgrind into stacks (root first, separated by semicolons) and their exclusive costs. Callgrind records a call graph rather than complete stacks, so the cost of each call is split between the stacks leading to it in proportion to their costs"""
+
+    names: Dict[str, str] = {}
+    self_costs: Dict[str, int] = {}
+    calls: Dict[str, Dict[str, int]] = {}
+    position_count: int = 1
+    function: str = ""
+    callee: Optional[str] = None
+    skip_line: bool = False
+
+    def name(value: str) -> str:
+        """Resolve a (possibly compressed) function name"""
+
+        value = value.strip()
+        if value.startswith("("):
+            name_id, _, value = value.partition(")")
+            value = value.strip()
+            if value:
+                names[name_id] = value
+            return names.get(name_id, name_id + ")")
+        return value
+
+    for line in callgrind_out.splitlines():
+        if skip_line:
+            skip_line = False
+            continue
+        if line.startswith("positions:"):
+            position_count = len(line.split(":", 1)[1].split())
+        elif line.startswith("fn="):
+            function = name(line[3:])
+            self_costs.setdefault(function, 0)
+        elif line.startswith("cfn="):
+            callee = name(line[4:])
+        elif line.startswith("calls="):
+            # The next cost line is the inclusive cost of the call
+            pass
+        elif line.startswith("jump=") or line.startswith("jcnd="):
+            skip_line = True
+        elif line and (line[0].isdigit() or line[0] in "+-*"):
+            fields: List[str] = line.split()
+            cost: int = (
+                int(fields[position_count]) if len(fields) > position_count else 0
+            )
+            if callee is not None:
+                function_calls = calls.setdefault(function, {})
+                function_calls[callee] = function_calls.get(callee, 0) + cost
+                callee = None
+            else:
+                self_costs[function] = self_costs.get(function, 0) + cost
+
+    inclusive_costs: Dict[str, int] = {
+        function: self_cost + sum(calls.get(function, {}).values())
+        for function, self_cost in self_costs.items()
+    }
+    total: int = sum(self_costs.values())
+    called: set = {
+        callee
+        for caller, callees in calls.items()
+        for callee in callees.keys()
+        if callee != caller
+    }
+
+    stacks: Dict[str, float] = {}
+
+    def walk(stack: List[str], budget: float) -> None:
+        """Distribute the cost of a function between itself and the functions it calls"""
+
+        function: str = stack[-1]
+        inclusive_cost: int = inclusive_costs.get(function, 0)
+        if inclusive_cost == 0:
+            return
+        scale: float = budget / inclusive_cost
+        own_cost: float = self_costs.get(function, 0) * scale
+        for callee, cost in calls.get(function, {}).items():
+            # Recursive calls and negligible calls are attributed to the caller so large call graphs remain tractable
+            if callee in stack or cost * scale < total / 100000:
+                own_cost += cost * scale
+                continue
+            walk(stack + [callee], cost * scale)
+        key: str = ";".join(stack)
+        stacks[key] = stacks.get(key, 0) + own_cost
+
+    for function in self_costs.keys():
+        if function not in called:
+            walk([function], inclusive_costs.get(function, 0))
+
+    return {
+        stack: round(cost) for stack, cost in stacks.items() if round(cost) > 0
+    }
+
+
+def write_folded(stacks: Dict[str, int], path: str) -> None:
+    """Write folded stacks in the format used by flame graph tools (one stack and its count per line)"""
+
+    with open(path, "w") as folded:
+        for stack, count in sorted(stacks.items()):
+            folded.write(stack + " " + str(count) + "\n")
+
+
+def _frame_color(name: str) -> str:
+    """Returns a warm color that is stable for a given function name"""
+
+    digest: bytes = hashlib.md5(name.encode()).digest()
+    return "rgb({},{},{})".format(
+        205 + digest[0] % 50, digest[1] % 230, digest[2] % 55
+    )
+
+
+def flame_graph_svg(stacks: Dict[str, int], title: str) -> str:
+    """Render folded stacks as a flame graph (SVG). The width of each frame is proportional to its cost and callers are drawn below their callees"""
+
+    # Merge the stacks into a tree
+    root: dict = {"name": "all", "value": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["value"] += count
+        node: dict = root
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(
+                frame, {"name": frame, "value": 0, "children": {}}
+            )
+            node["value"] += count
+
+    def depth(node: dict) -> int:
+        return 1 + max([depth(child) for child in node["children"].values()] + [0])
+
+    title_height: int = 2 * frame_height
+    height: int = title_height + depth(root) * frame_height + frame_height
+    scale: float = graph_width / max(root["value"], 1)
+
+    frames: List[str] = []
+
+    def draw(node: dict, x: float, level: int) -> None:
+        width: float = node["value"] * scale
+        if width < 0.1:
+            return
+        y: int = height - frame_height - (level + 1) * frame_height
+        percent: float = 100 * node["value"] / max(root["value"], 1)
+        label: str = node["name"]
+        max_chars: int = int(width / font_width)
+        if max_chars < 3:
+            label = ""
+        elif len(label) > max_chars:
+            label = label[: max_chars - 2] + ".."
+        frames.append(
+            '<g><title>{} ({} samples, {:.2f}%)</title><rect x="{:.1f}" y="{}" width="{:.1f}" height="{}" fill="{}" rx="2" ry="2"/><text x="{:.1f}" y="{}">{}</text></g>'.format(
+                escape(node["name"]),
+                node["value"],
+                percent,
+                x,
+                y,
+                width,
+                frame_height - 1,
+                _frame_color(node["name"]),
+                x + 3,
+                y + frame_height - 4,
+                escape(label),
+            )
+        )
+        for child in sorted(node["children"].values(), key=lambda child: child["name"]):
+            draw(child, x, level + 1)
+            x += child["value"] * scale
+
+    draw(root, 0, 0)
+
+    return (
+        '<?xml version="1.0" standalone="no"?>\n'
+        + '<svg version="1.1" width="{}" height="{}" xmlns="http://www.w3.org/2000/svg" font-family="monospace" font-size="12">\n'.format(
+            graph_width, height
+        )
+        + '<rect width="100%" height="100%" fill="rgb(248,248,248)"/>\n'
+        + '<text x="{}" y="{}" text-anchor="middle" font-size="16">{}</text>\n'.format(
+            graph_width / 2, frame_height + 4, escape(title)
+        )
+        + "\n".join(frames)
+        + "\n</svg>\n"
+    )
+
+
+def record(
+    tool: str, binary_path: str, binary_args: List[str], data_path: str, frequency: int
+) -> Dict[str, int]:
+    """Run a binary under the given profiler and return the folded stacks"""
+
+    if tool == "perf":
+        perf: str = _require_tool("perf")
+        subprocess.run(
+            [perf, "record", "-F", str(frequency), "-g", "-o", data_path, "--"]
+            + [binary_path]
+            + binary_args,
+            cwd=output_dir,
+            check=True,
+        )
+        script: str = subprocess.run(
+            [perf, "script", "-i", data_path],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        return fold_perf_script(script)
+
+    valgrind: str = _require_tool("valgrind")
+    subprocess.run(
+        [valgrind, "--tool=callgrind", "--callgrind-out-file=" + data_path]
+        + [binary_path]
+        + binary_args,
+        cwd=output_dir,
+        check=True,
+    )
+    with open(data_path, "r") as callgrind_out:
+        return fold_callgrind(callgrind_out.read())
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python flame_graph.py",
+        description="This script builds this project with the '"
+        + profiling_profile
+        + "' host profile (the active host profile with debug information and frame pointers), runs an application or test binary under a profiler, and writes the folded stacks and a flame graph (SVG) to 'build/profiles'. Binaries built with the 'gprof' mode also write 'gmon.out' to that directory.",
+    )
+    arg_parser.add_argument(
+        "binary",
+        help="name of the binary to profile (from 'binary_config.json'). Arguments for the binary may be given after '--'",
+    )
+    arg_parser.add_argument(
+        "--tool",
+        choices=tools,
+        default="perf",
+        help="profiler to run the binary under (default: perf)",
+    )
+    arg_parser.add_argument(
+        "--mode",
+        choices=profiling_modes,
+        default="frame-pointers",
+        help="instrumentation added to this project in addition to frame pointers and debug information (default: frame-pointers)",
+    )
+    arg_parser.add_argument(
+        "--frequency",
+        type=int,
+        default=999,
+        help="sampling frequency for perf in Hz (default: 999)",
+    )
+
+    # Parse command line arguments. Arguments after '--' are passed to the binary.
+    script_args: List[str] = list(argv)[1:]
+    binary_args: List[str] = []
+    if "--" in script_args:
+        binary_args = script_args[script_args.index("--") + 1 :]
+        script_args = script_args[: script_args.index("--")]
+    args: Namespace = arg_parser.parse_args(script_args)
+
+    if args.binary not in profiling_binaries():
+        arg_parser.error(
+            "'"
+            + args.binary
+            + "' is not an application or test in 'binary_config.json'"
+        )
+
+    # Build this project for profiling
+    build = import_module("build")
+    profiles = import_module("profiles")
+    profiles_abs_paths = profiles.Profiles(
+        host=write_profiling_profile(), build=profiles.get_profiles_abs_paths().build
+    )
+    build.conan(
+        "build",
+        profiles_abs_paths,
+        ["--conf:host", "&:user.build:profiling=" + args.mode],
+    )
+
+    binary_path: str = os.path.join(
+        this_dir,
+        profiles.build_folder(profiles_abs_paths),
+        args.binary + (".exe" if os.name == "nt" else ""),
+    )
+
+    # Profile the binary
+    os.makedirs(output_dir, exist_ok=True)
+    output_prefix: str = os.path.join(output_dir, args.binary + "." + args.tool)
+    stacks: Dict[str, int] = record(
+        args.tool,
+        binary_path,
+        binary_args,
+        output_prefix + (".data" if args.tool == "perf" else ".out"),
+        args.frequency,
+    )
+
+    # Write the results
+    write_folded(stacks, output_prefix + ".folded")
+    with open(output_prefix + ".svg", "w") as svg:
+        svg.write(flame_graph_svg(stacks, args.binary + " (" + args.tool + ")"))
+    print(
+        "Folded stacks: "
+        + os.path.relpath(output_prefix + ".folded", this_dir)
+        + "\nFlame graph: "
+        + os.path.relpath(output_prefix + ".svg", this_dir)
+    )
@@ -0,0 +1,370 @@
+"""Analyze the include graph of this project to find headers that dominate compile-time"""
+
+import json
+import os
+import re
+import shlex
+import subprocess
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Dict, List, Set, Tuple
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# File written to the build folder containing the full include graph
+graph_file: str = "include_graph.json"
+
+# Line markers written by the preprocessor of GCC and Clang (e.g. '# 12 "path/to/file.hpp" 1 3')
+line_marker = re.compile(r'^# \d+ "((?:[^"\\]|\\.)*)"((?: \d)*)\s*$')
+
+# Arguments that only affect the output of a compilation (with the number of values that follow each one)
+output_args: Dict[str, int] = {
+    "-c": 0,
+    "-o": 1,
+    "-MD": 0,
+    "-MMD": 0,
+    "-MF": 1,
+    "-MQ": 1,
+    "-MT": 1,
+}
+
+
+@dataclass
+class TranslationUnit:
+    """The headers expanded while preprocessing one source file"""
+
+    source: str
+    # Bytes of preprocessed code that each header contributes directly (excluding the headers it includes)
+    own_size: Dict[str, int] = field(default_factory=dict)
+    # Bytes of preprocessed code that each header contributes (including the headers it includes)
+    inclusive_size: Dict[str, int] = field(default_factory=dict)
+    # Bytes of preprocessed code pulled in by each include directive (from the including file to the included file)
+    edges: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    total_size: int = 0
+
+
+@dataclass
+class HeaderStats:
+    """The cost of a header summed over every translation unit that expands it"""
+
+    path: str
+    fan_in: int = 0
+    own_size: int = 0
+    total_size: int = 0
+    public: bool = False
+
+    def average_size(self) -> int:
+        """Returns the average number of bytes of preprocessed code that expanding this header costs a translation unit"""
+
+        return self.total_size // self.fan_in if self.fan_in > 0 else 0
+
+
+def compile_commands_path(profiles_abs_paths) -> str:
+    """Returns the path to the compilation database of the build folder for the given profiles"""
+
+    profiles = import_module("profiles")
+    return os.path.join(
+        this_dir, profiles.build_folder(profiles_abs_paths), "compile_commands.json"
+    )
+
+
+def preprocess_command(entry: dict) -> List[str]:
+    """Returns the command that preprocesses the source file of a compilation database entry to standard out"""
+
+    args: List[str] = (
+        list(entry["arguments"])
+        if "arguments" in entry
+        else shlex.split(entry["command"])
+    )
+    compiler: str = os.path.splitext(os.path.basename(args[0]))[0].lower()
+    if compiler in ["cl", "clang-cl"]:
+        raise RuntimeError(
+            "The include graph can only be gathered with GCC or Clang ('"
+            + args[0]
+            + "' is not supported)"
+        )
+
+    command: List[str] = [args[0]]
+    skip: int = 0
+    for arg in args[1:]:
+        if skip > 0:
+            skip -= 1
+            continue
+        if arg in output_args:
+            skip = output_args[arg]
+            continue
+        command.append(arg)
+    return command + ["-E"]
+
+
+def _normalize(path: str, directory: str) -> str:
+    """Returns the absolute and normalized version of a path written by the preprocessor"""
+
+    return os.path.normpath(os.path.join(directory, path.replace('\\"', '"')))
+
+
+def parse_preprocessed(source: str, directory: str, output: str) -> TranslationUnit:
+    """Reconstruct the headers expanded within a translation unit from the line markers in its preprocessed output"""
+
+    unit = TranslationUnit(source=source)
+
+    # Each frame is an expanded file and the total size of the translation unit when it was entered
+    stack: List[Tuple[str, int]] = [(source, 0)]
+    for line in output.splitlines():
+        match = line_marker.match(line)
+        if match is None:
+            unit.total_size += len(line) + 1
+            current: str = stack[-1][0]
+            unit.own_size[current] = unit.own_size.get(current, 0) + len(line) + 1
+            continue
+
+        path: str = match.group(1)
+        flags: List[str] = match.group(2).split()
+        # Code from the command line or built into the compiler (e.g. forced includes) is attributed to the source file
+        path = stack[0][0] if path.startswith("<") else _normalize(path, directory)
+
+        if "1" in flags:
+            # Entering an included file
+            stack.append((path, unit.total_size))
+        elif "2" in flags:
+            # Returning to the including file
+            while len(stack) > 1 and stack[-1][0] != path:
+                header, start = stack.pop()
+                size: int = unit.total_size - start
+                unit.inclusive_size[header] = unit.inclusive_size.get(header, 0) + size
+                edge: Tuple[str, str] = (stack[-1][0], header)
+                unit.edges[edge] = unit.edges.get(edge, 0) + size
+
+    # Close files left open (only if the preprocessed output was truncated)
+    while len(stack) > 1:
+        header, start = stack.pop()
+        size = unit.total_size - start
+        unit.inclusive_size[header] = unit.inclusive_size.get(header, 0) + size
+        unit.edges[(stack[-1][0], header)] = (
+            unit.edges.get((stack[-1][0], header), 0) + size
+        )
+    return unit
+
+
+def gather(entry: dict) -> TranslationUnit:
+    """Preprocess the source file of a compilation database entry and return the headers it expands"""
+
+    directory: str = entry["directory"]
+    source: str = _normalize(entry["file"], directory)
+    result = subprocess.run(
+        preprocess_command(entry),
+        cwd=directory,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            "Failed to preprocess '" + source + "':\n" + result.stderr.strip()
+        )
+    return parse_preprocessed(source, directory, result.stdout)
+
+
+def public_headers() -> Set[str]:
+    """Returns the absolute paths of the headers listed (or matched by glob patterns) by libraries in the binary configuration file"""
+
+    update_deps = import_module("update_deps")
+    binaries = update_deps.Binaries()
+    binaries.read()
+    headers: Set[str] = set()
+    for binary in update_deps.resolve_globs(binaries.get(), this_dir).values():
+        for header in binary.headers:
+            headers.add(os.path.normpath(os.path.join(this_dir, *header)))
+    return headers
+
+
+def analyze(
+    units: List[TranslationUnit], public: Set[str]
+) -> Tuple[Dict[str, HeaderStats], Dict[Tuple[str, str], int]]:
+    """Combine the headers expanded by each translation unit into statistics for each header and each include directive"""
+
+    headers: Dict[str, HeaderStats] = {}
+    edges: Dict[Tuple[str, str], int] = {}
+    for unit in units:
+        for header, size in unit.inclusive_size.items():
+            stats = headers.setdefault(
+                header, HeaderStats(path=header, public=header in public)
+            )
+            stats.fan_in += 1
+            stats.total_size += size
+            stats.own_size = max(stats.own_size, unit.own_size.get(header, 0))
+        for edge, size in unit.edges.items():
+            edges[edge] = edges.get(edge, 0) + size
+    return headers, edges
+
+
+def write_graph(
+    path: str,
+    units: List[TranslationUnit],
+    headers: Dict[str, HeaderStats],
+    edges: Dict[Tuple[str, str], int],
+) -> None:
+    """Write the full include graph and the statistics of each header to a JSON file"""
+
+    update_deps = import_module("update_deps")
+    update_deps.write_json(
+        path,
+        {
+            "translation_units": {
+                unit.source: {
+                    "size": unit.total_size,
+                    "includes": sorted(
+                        header
+                        for (includer, header) in unit.edges
+                        if includer == unit.source
+                    ),
+                }
+                for unit in units
+            },
+            "headers": {
+                stats.path: {
+                    "fan_in": stats.fan_in,
+                    "own_size": stats.own_size,
+                    "average_size": stats.average_size(),
+                    "total_size": stats.total_size,
+                    "public": stats.public,
+                    "includes": sorted(
+                        {
+                            header
+                            for (includer, header) in edges
+                            if includer == stats.path
+                        }
+                    ),
+                }
+                for stats in sorted(headers.values(), key=lambda stats: stats.path)
+            },
+        },
+    )
+
+
+def _display_path(path: str) -> str:
+    """Returns a path relative to this project if it is within this project"""
+
+    relative: str = os.path.relpath(path, this_dir)
+    return path if relative.startswith(os.pardir) else relative
+
+
+def _kib(size: int) -> str:
+    """Returns a number of bytes formatted as kibibytes"""
+
+    return "{:.1f} KiB".format(size / 1024)
+
+
+def report(
+    headers: Dict[str, HeaderStats],
+    edges: Dict[Tuple[str, str], int],
+    top: int,
+    threshold: int,
+) -> None:
+    """Write the most expensive headers and include directives to standard out"""
+
+    print("\033[34;1mHeaders by total preprocessed code (fan-in x average size)\033[0m")
+    print("{:>8}  {:>12}  {:>12}  {}".format("fan-in", "average", "total", "header"))
+    for stats in sorted(headers.values(), key=lambda stats: -stats.total_size)[:top]:
+        print(
+            "{:>8}  {:>12}  {:>12}  {}".format(
+                stats.fan_in,
+                _kib(stats.average_size()),
+                _kib(stats.total_size),
+                _display_path(stats.path) + (" (public)" if stats.public else ""),
+            )
+        )
+
+    # Only include directives written in this project can be changed
+    project_edges = [
+        (edge, size)
+        for edge, size in edges.items()
+        if not os.path.relpath(edge[0], this_dir).startswith(os.pardir)
+    ]
+    print(
+        "\n\033[34;1mInclude directives in this project that pull in the most code\033[0m"
+    )
+    print("{:>12}  {}".format("total", "include"))
+    for (includer, header), size in sorted(project_edges, key=lambda item: -item[1])[
+        :top
+    ]:
+        print(
+            "{:>12}  {} -> {}".format(
+                _kib(size), _display_path(includer), _display_path(header)
+            )
+        )
+
+    public = [stats for stats in headers.values() if stats.public]
+    if len(public) == 0:
+        return
+    print(
+        "\n\033[34;1mPublic headers (the cost for each consumer that includes them)\033[0m"
+    )
+    print("{:>12}  {:>12}  {}".format("average", "own", "header"))
+    for stats in sorted(public, key=lambda stats: -stats.average_size()):
+        expensive: bool = stats.average_size() > threshold
+        print(
+            "{:>12}  {:>12}  {}{}".format(
+                _kib(stats.average_size()),
+                _kib(stats.own_size),
+                _display_path(stats.path),
+                "  \033[31;1mEXPENSIVE\033[0m" if expensive else "",
+            )
+        )
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python include_graph.py",
+        description="This script preprocesses every translation unit in the compilation database of the active profiles (written by 'build.py') and reports the headers and include directives responsible for the most preprocessed code. The full include graph is written to '"
+        + graph_file
+        + "' in the build folder. Only GCC and Clang are supported.",
+    )
+    arg_parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="number of headers and include directives to report (default: 20)",
+    )
+    arg_parser.add_argument(
+        "--threshold",
+        type=int,
+        default=256,
+        help="average size (in KiB of preprocessed code) above which public headers are reported as expensive for consumers (default: 256)",
+    )
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of translation units to preprocess concurrently (default: the number of processors)",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+
+    profiles = import_module("profiles")
+    profiles_abs_paths = profiles.get_profiles_abs_paths()
+    database_path: str = compile_commands_path(profiles_abs_paths)
+    if not os.path.isfile(database_path):
+        raise RuntimeError(
+            "'"
+            + os.path.relpath(database_path, this_dir)
+            + "' does not exist. Build this project with 'build.py' first"
+        )
+    with open(database_path, "r") as database:
+        entries: List[dict] = json.load(database)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        units: List[TranslationUnit] = list(executor.map(gather, entries))
+
+    headers, edges = analyze(units, public_headers())
+    output_path: str = os.path.join(os.path.dirname(database_path), graph_file)
+    write_graph(output_path, units, headers, edges)
+
+    report(headers, edges, args.top, args.threshold * 1024)
+    print("\nInclude graph: " + os.path.relpath(output_path, this_dir))
@@ -1,10 +1,128 @@
 """Install this library using Conan so other projects can use it"""
 
+import os
+import subprocess
+from argparse import ArgumentParser
 from importlib import import_module
 from sys import argv
+from typing import List, Optional
+
+
+this_dir: str = os.path.dirname(__file__)
+
+
+def out_of_date_reason(profiles_abs_paths) -> Optional[str]:
+    """Returns the reason the build folder for the given profiles is not up to date or None if it is up to date"""
+
+    profiles = import_module("profiles")
+    build = import_module("build")
+    clean = import_module("clean")
+    build_dir: str = os.path.join(this_dir, profiles.build_folder(profiles_abs_paths))
+    if not os.path.isfile(os.path.join(build_dir, "build.ninja")):
+        return "it has not been built"
+    if build.lockfile(profiles_abs_paths) is None:
+        return "it has no lockfile"
+
+    # Ninja lists every command it would execute (including regenerating the build files if the Meson configuration changed)
+    result = subprocess.run(
+        clean.build_env_command(build_dir, ["ninja", "-C", build_dir, "-n"]),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    if result.returncode != 0:
+        return "Ninja could not check it: " + result.stdout.strip()
+    if "ninja: no work to do" not in result.stdout:
+        return "sources or build files changed since it was last built"
+    return None
+
+
+def export_pkg_command(
+    profiles_abs_paths, extra_args: List[str] = [], test: bool = False
+) -> List[str]:
+    """Returns the Conan command line that packages the build folder for the given profiles into the Conan cache"""
+
+    venv = import_module("this_venv")
+    profiles = import_module("profiles")
+    build = import_module("build")
+    folder: str = profiles.build_folder(profiles_abs_paths)
+    # The test package is skipped unless requested
+    test_args: List[str] = [] if test else ["--test-folder", ""]
+    return (
+        [
+            venv.conan(),
+            "export-pkg",
+            "--profile:build",
+            profiles_abs_paths.build,
+            "--profile:host",
+            profiles_abs_paths.host,
+            "--conf:host",
+            "tools.system.package_manager:mode=report",
+            "--conf:host",
+            "&:user.build:folder=" + folder,
+            # Dependencies are resolved exactly as they were when the build folder was built
+            "--lockfile",
+            build.lockfile(profiles_abs_paths),
+        ]
+        + test_args
+        + [this_dir]
+        + extra_args
+    )
 
 
 if __name__ == "__main__":
     profiles = import_module("profiles")
     build = import_module("build")
-    build.conan("install", profiles.get_profiles_abs_paths(), list(argv)[1:])
+
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python install.py",
+        description="This script installs this library to the Conan cache.",
+        epilog="All unrecognized arguments are passed to Conan.",
+        allow_abbrev=False,
+    )
+    arg_parser.add_argument(
+        "--from-build",
+        action="store_true",
+        help="package the binaries already built by 'build.py' for the active profiles instead of building them again (fails if the build folder is not up to date)",
+    )
+    arg_parser.add_argument(
+        "--test",
+        action="store_true",
+        help="build and run the test package after packaging (only with --from-build)",
+    )
+    build.add_system_packages_argument(arg_parser)
+
+    # Parse command line arguments.
+    args, conan_args = arg_parser.parse_known_args(list(argv)[1:])
+    if args.test and not args.from_build:
+        arg_parser.error("--test requires --from-build")
+
+    profiles_abs_paths = profiles.get_profiles_abs_paths()
+    if args.from_build:
+        reason: Optional[str] = out_of_date_reason(profiles_abs_paths)
+        if reason is not None:
+            print(
+                "\033[31;1mThe build folder '"
+                + profiles.build_folder(profiles_abs_paths)
+                + "' is not up to date ("
+                + reason
+                + "). Build this project with 'build.py' first.\033[0m"
+            )
+            exit(1)
+        telemetry = import_module("telemetry")
+        recorder = telemetry.Recorder(
+            "install",
+            os.path.join(this_dir, profiles.build_folder(profiles_abs_paths)),
+        )
+        command: List[str] = export_pkg_command(
+            profiles_abs_paths, conan_args, args.test
+        )
+        returncode: int = recorder.run(command)
+        recorder.write()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command)
+    else:
+        build.conan(
+            "install", profiles_abs_paths, conan_args, args.system_packages, "install"
+        )
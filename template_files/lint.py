@@ -0,0 +1,515 @@
+"""Check this project with clang-tidy, clang-format, and muon fmt in parallel"""
+
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Dict, List, Optional, Set
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# File written to the build folder containing the results of previous checks
+cache_file: str = "lint_cache.json"
+
+# Version of the format of the cache (changes whenever existing fields change meaning)
+schema_version: int = 1
+
+# Tools that are run (with their executables and the configuration files within this project that they read)
+tool_executables: Dict[str, str] = {
+    "tidy": "clang-tidy",
+    "format": "clang-format",
+    "muon": "muon",
+}
+tool_configs: Dict[str, str] = {
+    "tidy": ".clang-tidy",
+    "format": ".clang-format",
+    "muon": "muon_fmt.ini",
+}
+
+# Extensions of the C and C++ files checked by clang-format
+cpp_extensions: List[str] = [
+    ".c",
+    ".cc",
+    ".cpp",
+    ".cxx",
+    ".cppm",
+    ".ixx",
+    ".h",
+    ".hh",
+    ".hpp",
+    ".hxx",
+    ".ipp",
+    ".inl",
+]
+
+# Names of the Meson files checked by muon fmt
+meson_files: List[str] = ["meson.build", "meson.options", "meson_options.txt"]
+
+# Directories that are never checked when this project is not a Git repository (in addition to hidden directories)
+unchecked_dirs: List[str] = ["build", "__pycache__"]
+
+
+@dataclass
+class Check:
+    """One tool run over one file"""
+
+    tool: str
+    path: str
+    command: List[str]
+    # Hash of everything that determines the result (empty if the result cannot be cached)
+    key: str
+
+
+@dataclass
+class Result:
+    """The outcome of a check"""
+
+    check: Check
+    ok: bool
+    output: str
+    cached: bool
+
+
+class Hasher:
+    """Hashes the contents of files (each file is only read once)"""
+
+    def __init__(self) -> None:
+        self._hashes: Dict[str, str] = {}
+
+    def file(self, path: str) -> str:
+        """Returns the hash of the contents of a file (or an empty string if it cannot be read)"""
+
+        if path not in self._hashes:
+            try:
+                with open(path, "rb") as file:
+                    self._hashes[path] = hashlib.sha256(file.read()).hexdigest()
+            except OSError:
+                self._hashes[path] = ""
+        return self._hashes[path]
+
+
+def _key(*parts: str) -> str:
+    """Returns the hash of the given strings"""
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def _in_project(path: str, build_root: str) -> bool:
+    """Returns true if a path is within this project and not within its build files"""
+
+    return os.path.commonpath([path, this_dir]) == this_dir and not (
+        os.path.commonpath([path, build_root]) == build_root
+    )
+
+
+def tool_version(tool: str) -> Optional[str]:
+    """Returns the version reported by a tool (or None if it is not installed)"""
+
+    executable: Optional[str] = shutil.which(tool_executables[tool])
+    if executable is None:
+        return None
+    result = subprocess.run(
+        [executable, "--version"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    return executable + "\n" + result.stdout.strip()
+
+
+def project_files() -> List[str]:
+    """Returns the absolute paths of the files of this project (the files tracked or not ignored by Git if this project is a Git repository)"""
+
+    result = subprocess.run(
+        ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+        cwd=this_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    if result.returncode == 0:
+        return sorted(
+            {
+                os.path.normpath(os.path.join(this_dir, path))
+                for path in result.stdout.decode().split("\0")
+                if path
+            }
+        )
+
+    files: List[str] = []
+    for dir_path, dir_names, file_names in os.walk(this_dir):
+        dir_names[:] = [
+            name
+            for name in dir_names
+            if not name.startswith(".")
+            and not (dir_path == this_dir and name in unchecked_dirs)
+        ]
+        files += [os.path.join(dir_path, name) for name in file_names]
+    return sorted(files)
+
+
+def _git(*args: str) -> str:
+    """Execute Git within this project and return its standard output"""
+
+    return subprocess.run(
+        ["git"] + list(args),
+        cwd=this_dir,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout
+
+
+def changed_files(base: str) -> Set[str]:
+    """Returns the absolute paths of the files that differ from the commit where the current branch forked from the given Git revision (including uncommitted and untracked files)"""
+
+    fork_point: str = _git("merge-base", base, "HEAD").strip()
+    paths: List[str] = (
+        _git("diff", "--name-only", "--diff-filter=d", fork_point).splitlines()
+        + _git("ls-files", "--others", "--exclude-standard").splitlines()
+    )
+    return {os.path.normpath(os.path.join(this_dir, path)) for path in paths if path}
+
+
+def ninja_deps(build_dir: str) -> Dict[str, List[str]]:
+    """Returns the files each output of the build folder depended on when it was last built (read from the Ninja dependency log)"""
+
+    ninja: Optional[str] = shutil.which("ninja")
+    if ninja is None:
+        return {}
+    result = subprocess.run(
+        [ninja, "-C", build_dir, "-t", "deps"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {}
+
+    deps: Dict[str, List[str]] = {}
+    output: Optional[str] = None
+    for line in result.stdout.splitlines():
+        if line.startswith(" ") and output is not None:
+            deps[output].append(os.path.normpath(os.path.join(build_dir, line.strip())))
+        elif ": #deps" in line and "(VALID)" in line:
+            output = os.path.normpath(os.path.join(build_dir, line.split(": #deps")[0]))
+            deps[output] = []
+        else:
+            output = None
+    return deps
+
+
+def _built_after(output: str, inputs: List[str]) -> bool:
+    """Returns true if an output of the build folder was built after every given input last changed (so the files it depended on when it was built are still all of its inputs)"""
+
+    try:
+        built: int = os.stat(output).st_mtime_ns
+        return all(os.stat(path).st_mtime_ns <= built for path in inputs)
+    except OSError:
+        return False
+
+
+def compile_args(entry: dict) -> List[str]:
+    """Returns the arguments of a compilation database entry"""
+
+    return (
+        list(entry["arguments"])
+        if "arguments" in entry
+        else shlex.split(entry["command"])
+    )
+
+
+def plan(
+    build_dir: str,
+    tools: List[str],
+    versions: Dict[str, str],
+    only: Optional[Set[str]],
+    fix: bool,
+) -> List[Check]:
+    """Returns the checks to run for the given tools (only over the given files if any are given, and fixing formatting in place if requested)"""
+
+    build_root: str = os.path.join(this_dir, "build")
+    hasher = Hasher()
+    configs: Dict[str, str] = {
+        tool: hasher.file(os.path.join(this_dir, config))
+        for tool, config in tool_configs.items()
+    }
+    checks: List[Check] = []
+
+    if "tidy" in tools:
+        with open(os.path.join(build_dir, "compile_commands.json"), "r") as database:
+            entries: List[dict] = json.load(database)
+        deps: Dict[str, List[str]] = ninja_deps(build_dir)
+        for entry in entries:
+            directory: str = entry["directory"]
+            path: str = os.path.normpath(os.path.join(directory, entry["file"]))
+            if not _in_project(path, build_root):
+                continue
+            output: str = os.path.normpath(
+                os.path.join(directory, entry.get("output", ""))
+            )
+            # Sources are checked again whenever a header they include changed
+            inputs: List[str] = deps.get(output, [])
+            if only is not None and path not in only and only.isdisjoint(inputs):
+                continue
+            # Results are only cached if the headers included by the source are known (from a build after the source and its headers last changed, since an edit may include another header)
+            key: str = (
+                _key(
+                    "tidy",
+                    versions["tidy"],
+                    configs["tidy"],
+                    hasher.file(path),
+                    "\0".join(compile_args(entry)),
+                    *(dep + "\0" + hasher.file(dep) for dep in sorted(inputs)),
+                )
+                if len(inputs) > 0 and _built_after(output, [path] + inputs)
+                else ""
+            )
+            checks.append(
+                Check(
+                    tool="tidy",
+                    path=path,
+                    command=[
+                        tool_executables["tidy"],
+                        "-p",
+                        build_dir,
+                        "--quiet",
+                        path,
+                    ],
+                    key=key,
+                )
+            )
+
+    for path in project_files():
+        if only is not None and path not in only:
+            continue
+        if not os.path.isfile(path):
+            continue
+        name: str = os.path.basename(path)
+        if "format" in tools and os.path.splitext(name)[1] in cpp_extensions:
+            checks.append(
+                Check(
+                    tool="format",
+                    path=path,
+                    command=[tool_executables["format"]]
+                    + (["-i"] if fix else ["--dry-run", "--Werror"])
+                    + [path],
+                    key=(
+                        ""
+                        if fix
+                        else _key(
+                            "format",
+                            versions["format"],
+                            configs["format"],
+                            hasher.file(path),
+                        )
+                    ),
+                )
+            )
+        if "muon" in tools and name in meson_files:
+            checks.append(
+                Check(
+                    tool="muon",
+                    path=path,
+                    command=[
+                        tool_executables["muon"],
+                        "fmt",
+                        "-c",
+                        os.path.join(this_dir, tool_configs["muon"]),
+                    ]
+                    + (["-i"] if fix else ["-q"])
+                    + [path],
+                    key=(
+                        ""
+                        if fix
+                        else _key(
+                            "muon", versions["muon"], configs["muon"], hasher.file(path)
+                        )
+                    ),
+                )
+            )
+    return checks
+
+
+def run_check(check: Check, cache: Dict[str, dict]) -> Result:
+    """Run a check (or reuse its cached result)"""
+
+    if check.key and check.key in cache:
+        cached: dict = cache[check.key]
+        return Result(
+            check=check, ok=cached["ok"], output=cached["output"], cached=True
+        )
+
+    result = subprocess.run(
+        check.command,
+        cwd=this_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+    )
+    output: str = result.stdout.strip()
+    ok: bool = result.returncode == 0
+    if check.tool == "tidy":
+        # clang-tidy only fails for diagnostics that are configured as errors
+        ok = ok and "warning:" not in output and "error:" not in output
+    return Result(check=check, ok=ok, output=output, cached=False)
+
+
+def load_cache(path: str) -> Dict[str, dict]:
+    """Returns the results of previous checks stored in the given cache file"""
+
+    try:
+        with open(path, "r") as file:
+            raw_json: dict = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if raw_json.get("schema_version") != schema_version:
+        return {}
+    return raw_json.get("results", {})
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python lint.py",
+        description="This script checks the sources in the compilation database of the active profiles (written by 'build.py') with clang-tidy, and the C++ and Meson files of this project with clang-format and muon fmt, running the checks in parallel. The result of each check is cached in '"
+        + cache_file
+        + "' within the build folder and reused until the file, its compile flags, the headers it includes, the tool, or its configuration change. Tools that are not installed are skipped.",
+    )
+    arg_parser.add_argument(
+        "--tools",
+        default=",".join(tool_executables.keys()),
+        help="comma-separated tools to run (default: "
+        + ",".join(tool_executables.keys())
+        + ")",
+    )
+    arg_parser.add_argument(
+        "--changed",
+        nargs="?",
+        const="HEAD",
+        metavar="BASE",
+        help="only check files that differ from the commit where the current branch forked from the given Git revision (default: HEAD, i.e. uncommitted changes), and sources that include a changed header",
+    )
+    arg_parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="format files in place with clang-format and muon fmt instead of reporting formatting differences",
+    )
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of checks to run concurrently (default: the number of processors)",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+    requested: List[str] = [
+        tool.strip() for tool in args.tools.split(",") if tool.strip()
+    ]
+    for tool in requested:
+        if tool not in tool_executables:
+            arg_parser.error(
+                "Unknown tool '"
+                + tool
+                + "' (expected one of: "
+                + ", ".join(tool_executables.keys())
+                + ")"
+            )
+
+    versions: Dict[str, str] = {}
+    for tool in requested:
+        version: Optional[str] = tool_version(tool)
+        if version is None:
+            print(
+                "\033[33;1mSkipping "
+                + tool
+                + " ('"
+                + tool_executables[tool]
+                + "' was not found)\033[0m"
+            )
+            continue
+        versions[tool] = version
+    tools: List[str] = list(versions.keys())
+
+    profiles = import_module("profiles")
+    build_dir: str = os.path.join(
+        this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+    )
+    if "tidy" in tools and not os.path.isfile(
+        os.path.join(build_dir, "compile_commands.json")
+    ):
+        raise RuntimeError(
+            "'"
+            + os.path.relpath(
+                os.path.join(build_dir, "compile_commands.json"), this_dir
+            )
+            + "' does not exist. Build this project with 'build.py' first"
+        )
+
+    only: Optional[Set[str]] = (
+        changed_files(args.changed) if args.changed is not None else None
+    )
+    checks: List[Check] = plan(build_dir, tools, versions, only, args.fix)
+
+    cache_path: str = os.path.join(build_dir, cache_file)
+    cache: Dict[str, dict] = load_cache(cache_path)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        results: List[Result] = list(
+            executor.map(lambda check: run_check(check, cache), checks)
+        )
+
+    # Report problems in a stable order
+    failures: List[Result] = [result for result in results if not result.ok]
+    for result in sorted(
+        failures, key=lambda result: (result.check.path, result.check.tool)
+    ):
+        print(
+            "\033[31;1m"
+            + tool_executables[result.check.tool]
+            + ": "
+            + os.path.relpath(result.check.path, this_dir)
+            + "\033[0m"
+        )
+        if result.output:
+            print(result.output)
+
+    # Previous results are kept unless every file was checked (fixing files in place does not check them)
+    if only is not None or args.fix:
+        updated_cache: Dict[str, dict] = dict(cache)
+    else:
+        updated_cache = {}
+    for result in results:
+        if result.check.key:
+            updated_cache[result.check.key] = {
+                "ok": result.ok,
+                "output": result.output,
+            }
+    os.makedirs(build_dir, exist_ok=True)
+    update_deps = import_module("update_deps")
+    update_deps.write_json(
+        cache_path, {"schema_version": schema_version, "results": updated_cache}
+    )
+
+    cached: int = sum(1 for result in results if result.cached)
+    print(
+        "\033[34;1m"
+        + str(len(results))
+        + " checks ("
+        + str(cached)
+        + " cached): "
+        + str(len(failures))
+        + " failed\033[0m"
+    )
+    if len(failures) > 0:
+        exit(1)
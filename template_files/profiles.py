@@ -6,10 +6,13 @@ from argparse import ArgumentParser, Namespace
 from configparser import ConfigParser
 from dataclasses import dataclass
 from importlib import import_module
+from typing import Dict
 
 
 profile_dir: str = os.path.join(os.path.dirname(__file__), "profiles")
 config_path: str = os.path.join(os.path.dirname(__file__), "profiles.ini")
+build_dir: str = os.path.join(os.path.dirname(__file__), "build")
+build_folder_config: str = "profiles.ini"
 default_profile: str = "default.profile"
 profile_section: str = "profiles"
 profile_build_type: str = "build"
@@ -28,14 +31,14 @@ def abs_path_to_profile(relative_path: str) -> str:
     return os.path.join(profile_dir, relative_path)
 
 
-def set_profiles(profiles: Profiles) -> None:
+def set_profiles(profiles: Profiles, path: str = config_path) -> None:
     """Set the active Conan profile for a given type ('host' or 'build')"""
 
     parser = ConfigParser()
     parser.add_section(profile_section)
     parser[profile_section][profile_build_type] = profiles.build
     parser[profile_section][profile_host_type] = profiles.host
-    parser.write(open(config_path, "w"), space_around_delimiters=True)
+    parser.write(open(path, "w"), space_around_delimiters=True)
 
 
 def _get_profile(parser: ConfigParser, profile_type: str) -> str:
@@ -83,6 +86,64 @@ def get_profiles_abs_paths() -> Profiles:
     return profiles
 
 
+def _profile_name(profile: str) -> str:
+    """Returns the name of a profile given its path (either absolute or relative to the profile directory)"""
+
+    if os.path.isabs(profile):
+        profile = os.path.relpath(profile, profile_dir)
+    profile = profile.removesuffix(".profile")
+    return profile.replace(os.sep, "-").replace("/", "-")
+
+
+def build_folder(profiles: Profiles) -> str:
+    """Returns the build folder (relative to the project root) for a given pair of host and build profiles"""
+
+    host_name: str = _profile_name(profiles.host)
+    build_name: str = _profile_name(profiles.build)
+    if host_name == build_name:
+        return os.path.join("build", host_name)
+    return os.path.join("build", host_name + "+" + build_name)
+
+
+def record_build_folder(profiles: Profiles) -> str:
+    """Create the build folder for a given pair of host and build profiles, record the profiles within it, and return its absolute path"""
+
+    folder: str = os.path.join(os.path.dirname(__file__), build_folder(profiles))
+    os.makedirs(folder, exist_ok=True)
+    set_profiles(
+        Profiles(
+            host=os.path.relpath(abs_path_to_profile(profiles.host), profile_dir),
+            build=os.path.relpath(abs_path_to_profile(profiles.build), profile_dir),
+        ),
+        os.path.join(folder, build_folder_config),
+    )
+    return folder
+
+
+def build_folders() -> Dict[str, Profiles]:
+    """Returns the absolute paths to all existing build folders along with the absolute paths to the profiles they were built with. Folders built with profiles that no longer exist are skipped"""
+
+    folders: Dict[str, Profiles] = {}
+    if not os.path.isdir(build_dir):
+        return folders
+    for folder_name in sorted(os.listdir(build_dir)):
+        folder: str = os.path.join(build_dir, folder_name)
+        parser = ConfigParser()
+        if not parser.read(os.path.join(folder, build_folder_config)):
+            continue
+        if not parser.has_option(
+            profile_section, profile_host_type
+        ) or not parser.has_option(profile_section, profile_build_type):
+            continue
+        profiles = Profiles(
+            host=abs_path_to_profile(parser[profile_section][profile_host_type]),
+            build=abs_path_to_profile(parser[profile_section][profile_build_type]),
+        )
+        if os.path.isfile(profiles.host) and os.path.isfile(profiles.build):
+            folders[folder] = profiles
+    return folders
+
+
 def generate_default() -> None:
     """Use Conan to automatically generate the default profile"""
 
@@ -143,5 +204,14 @@ if __name__ == "__main__":
     # If either of the active profiles are invalid, they are replaced with the default profile.
     profiles = get_profiles_abs_paths()
 
-    # Write the paths to the host and build profiles to standard out.
-    print("build: " + profiles.build + "\n" + "host: " + profiles.host)
+    # Write the paths to the host and build profiles and the corresponding build folder to standard out.
+    print(
+        "build: "
+        + profiles.build
+        + "\n"
+        + "host: "
+        + profiles.host
+        + "\n"
+        + "folder: "
+        + os.path.join(os.path.dirname(__file__), build_folder(profiles))
+    )
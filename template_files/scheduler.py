@@ -0,0 +1,164 @@
+"""Choose how many compile and link jobs can run concurrently without exhausting memory"""
+
+import json
+import math
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Dict, List, Optional, Tuple
+
+
+# File within the telemetry directory of each build folder that records the memory used by a single compile job and a single link job in previous builds
+memory_file: str = "memory.json"
+
+# Number of recent builds whose peaks are kept, and the percentile of those peaks used as the estimate. A high percentile of a window follows a project as it grows or shrinks without letting an incremental build that compiles a few small files undo what a full build measured.
+memory_window: int = 20
+memory_percentile: float = 0.95
+
+# Memory assumed for a single compile job and a single link job until they have been measured
+default_compile_memory: int = 1024**3
+default_link_memory: int = 2 * 1024**3
+
+# Factor applied to the memory of each job to leave room for measurement error and other processes
+headroom: float = 1.25
+
+
+@dataclass
+class Budget:
+    """The number of compile and link jobs that can run concurrently"""
+
+    jobs: int
+    links: int
+    available_memory: Optional[int]
+    compile_memory: int
+    link_memory: int
+
+
+def available_memory() -> Optional[int]:
+    """Returns the number of bytes of memory available for new processes (or None if it cannot be determined on this platform)"""
+
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo", "r") as meminfo:
+                for line in meminfo:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    if sys.platform == "darwin":
+        # macOS does not report available memory in a simple form, so the total is used instead
+        result = subprocess.run(
+            ["sysctl", "-n", "hw.memsize"], stdout=subprocess.PIPE, text=True
+        )
+        return int(result.stdout) if result.returncode == 0 else None
+
+    if os.name == "nt":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    return None
+
+
+def _memory_path(build_dir: str) -> str:
+    """Returns the path to the file that records the memory used by previous builds in the given build folder"""
+
+    telemetry = import_module("telemetry")
+    return os.path.join(build_dir, telemetry.telemetry_dir, memory_file)
+
+
+def _read_peaks(build_dir: str) -> Dict[str, List[int]]:
+    """Returns the peak memory used by a single compile job and a single link job in each recent build in the given build folder"""
+
+    try:
+        with open(_memory_path(build_dir), "r") as memory:
+            return json.load(memory)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _percentile(values: List[int], percentile: float) -> Optional[int]:
+    """Returns the given percentile of some values using the nearest rank (or None if there are no values)"""
+
+    if len(values) == 0:
+        return None
+    ordered: List[int] = sorted(values)
+    return ordered[max(0, math.ceil(percentile * len(ordered)) - 1)]
+
+
+def estimates(build_dir: str) -> Tuple[int, int]:
+    """Returns the memory used by a single compile job and a single link job in recent builds in the given build folder (or the defaults if they have not been measured)"""
+
+    peaks: Dict[str, List[int]] = _read_peaks(build_dir)
+    return (
+        _percentile(peaks.get("compile_rss_bytes", []), memory_percentile)
+        or default_compile_memory,
+        _percentile(peaks.get("link_rss_bytes", []), memory_percentile)
+        or default_link_memory,
+    )
+
+
+def learn(
+    build_dir: str, compile_rss: Optional[int], link_rss: Optional[int]
+) -> None:
+    """Record the memory used by a single compile job and a single link job during a build in the given build folder. Only the peaks of the most recent builds are kept"""
+
+    peaks: Dict[str, List[int]] = _read_peaks(build_dir)
+    for key, measured in [
+        ("compile_rss_bytes", compile_rss),
+        ("link_rss_bytes", link_rss),
+    ]:
+        if measured is not None:
+            peaks[key] = (peaks.get(key, []) + [measured])[-memory_window:]
+
+    path: str = _memory_path(build_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as memory:
+        json.dump(peaks, memory, indent=4)
+
+
+def budget(build_dir: str, share: int = 1) -> Budget:
+    """Returns the number of compile and link jobs that fit in the given share of available memory (e.g. 2 for half of it) and processors when building in the given build folder"""
+
+    processors: int = max(1, (os.cpu_count() or 1) // share)
+    compile_memory, link_memory = estimates(build_dir)
+    available: Optional[int] = available_memory()
+    if available is None:
+        return Budget(processors, processors, None, compile_memory, link_memory)
+
+    available //= share
+    jobs: int = int(available // (compile_memory * headroom))
+    links: int = int(available // (link_memory * headroom))
+    jobs = min(processors, max(1, jobs))
+    links = min(jobs, max(1, links))
+    return Budget(jobs, links, available, compile_memory, link_memory)
+
+
+def conan_args(job_budget: Budget) -> List[str]:
+    """Returns the Conan arguments that apply a budget to this project and to dependencies built from source"""
+
+    return [
+        "--conf:all",
+        "tools.build:jobs=" + str(job_budget.jobs),
+        "--conf:host",
+        "&:user.build:max_links=" + str(job_budget.links),
+    ]
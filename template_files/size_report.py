@@ -0,0 +1,528 @@
+"""Report what contributes to the size of the binaries of this project and compare builds"""
+
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+from argparse import ArgumentParser, Namespace
+from importlib import import_module
+from typing import Dict, List, Optional, Set, Tuple
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# File written to the build folder containing the full size report
+report_file: str = "size_report.json"
+
+# Version of the format of size reports (changes whenever existing fields change meaning)
+schema_version: int = 1
+
+# Names under which code that does not belong to a dependency component is reported
+project_component: str = "(this project)"
+other_component: str = "(runtime and system libraries)"
+
+# Symbol types reported by nm that occupy space in a binary (code, data, read-only data, and uninitialized data)
+sized_symbol_types: str = "TtWwDdBbRrVvui"
+
+# Symbol types reported by nm for weak and unique definitions, which may be defined by several objects
+weak_symbol_types: str = "WwVvu"
+
+# Suffixes that optimizations add to the names of the copies of functions and variables they create (e.g. '.constprop.0' or '.lto_priv.0')
+optimization_suffix = re.compile(
+    r"(\.(?:lto_priv|constprop|isra|part|cold|localalias|clone)(?:\.\d+)?)+$"
+)
+
+# Variables referenced within pkg-config files (e.g. '${libdir}')
+pc_variable = re.compile(r"\$\{([^}]+)\}")
+
+
+def _require_tool(name: str) -> str:
+    """Returns the path to an executable or raises an error if it is not installed"""
+
+    path: Optional[str] = shutil.which(name)
+    if path is None:
+        raise RuntimeError(
+            "'" + name + "' is required for size reports but was not found"
+        )
+    return path
+
+
+def _run(command: List[str]) -> str:
+    """Execute a command and return its standard output"""
+
+    return subprocess.run(
+        command,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+    ).stdout
+
+
+def sections(path: str) -> Dict[str, int]:
+    """Returns the size of each section of a binary (summed over the members of static libraries)"""
+
+    sizes: Dict[str, int] = {}
+    for line in _run([_require_tool("size"), "-A", "-d", path]).splitlines():
+        fields: List[str] = line.split()
+        if (
+            len(fields) != 3
+            or not fields[1].isdigit()
+            or not fields[2].isdigit()
+            or fields[0] == "Total"
+        ):
+            continue
+        sizes[fields[0]] = sizes.get(fields[0], 0) + int(fields[1])
+    return sizes
+
+
+def symbols(path: str) -> Dict[str, int]:
+    """Returns the size of each symbol defined by a binary (by mangled name, summed over the members of static libraries)"""
+
+    sizes: Dict[str, int] = {}
+    for line in _run(
+        [_require_tool("nm"), "--print-size", "--defined-only", path]
+    ).splitlines():
+        fields: List[str] = line.split(maxsplit=3)
+        if len(fields) != 4 or fields[2] not in sized_symbol_types:
+            continue
+        try:
+            size: int = int(fields[1], 16)
+        except ValueError:
+            continue
+        sizes[fields[3]] = sizes.get(fields[3], 0) + size
+    return sizes
+
+
+def defined_names(path: str) -> Dict[str, bool]:
+    """Returns the mangled names of the symbols defined by a library or object file (including objects compiled for link-time optimization) and whether each definition is strong (weak definitions, such as template instantiations, may also come from elsewhere)"""
+
+    names: Dict[str, bool] = {}
+    for line in _run([_require_tool("nm"), "--defined-only", path]).splitlines():
+        fields: List[str] = line.split()
+        if len(fields) >= 2 and fields[-2] in sized_symbol_types:
+            name: str = _base_name(fields[-1])
+            names[name] = names.get(name, False) or fields[-2] not in weak_symbol_types
+    return names
+
+
+def _base_name(symbol: str) -> str:
+    """Returns the name of a symbol without the suffixes added by optimizations (e.g. '.constprop.0' or '.lto_priv.0')"""
+
+    return optimization_suffix.sub("", symbol)
+
+
+def demangle(names: List[str]) -> Dict[str, str]:
+    """Returns the demangled version of each symbol name (or the name itself if 'c++filt' is not installed)"""
+
+    cxxfilt: Optional[str] = shutil.which("c++filt")
+    if cxxfilt is None or len(names) == 0:
+        return {name: name for name in names}
+    demangled: List[str] = subprocess.run(
+        [cxxfilt],
+        input="\n".join(names) + "\n",
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    ).stdout.splitlines()
+    return dict(zip(names, demangled))
+
+
+def pc_libraries(pc_path: str) -> List[str]:
+    """Returns the paths to the libraries linked by a pkg-config file (generated by Conan) that exist on disk"""
+
+    variables: Dict[str, str] = {}
+    libs: str = ""
+    with open(pc_path, "r") as pc_file:
+        for line in pc_file:
+            line = line.strip()
+            expanded: str = pc_variable.sub(
+                lambda match: variables.get(match.group(1), ""), line
+            )
+            if line.startswith("Libs:"):
+                libs = expanded.removeprefix("Libs:")
+            elif "=" in line and ":" not in line.split("=", 1)[0]:
+                name, _, value = expanded.partition("=")
+                variables[name.strip()] = value.strip()
+
+    lib_dirs: List[str] = []
+    lib_names: List[str] = []
+    for arg in shlex.split(libs):
+        if arg.startswith("-L"):
+            lib_dirs.append(arg[2:])
+        elif arg.startswith("-l"):
+            lib_names.append(arg[2:])
+
+    paths: List[str] = []
+    for lib_name in lib_names:
+        for lib_dir in lib_dirs:
+            candidates: List[str] = [
+                os.path.join(lib_dir, prefix + lib_name + extension)
+                for prefix in ["lib", ""]
+                for extension in [".a", ".lib", ".so", ".dylib"]
+            ]
+            existing: List[str] = [path for path in candidates if os.path.isfile(path)]
+            if len(existing) > 0:
+                paths.append(existing[0])
+                break
+    return paths
+
+
+def binary_files(build_dir: str) -> Dict[str, Tuple[str, str]]:
+    """Returns the type and path of each application and library from the binary configuration file that was built in the given build folder"""
+
+    update_deps = import_module("update_deps")
+    binaries = update_deps.Binaries()
+    binaries.read()
+
+    try:
+        with open(
+            os.path.join(build_dir, "meson-info", "intro-targets.json"), "r"
+        ) as targets_file:
+            targets: List[dict] = json.load(targets_file)
+    except FileNotFoundError:
+        raise RuntimeError(
+            "'"
+            + os.path.relpath(build_dir, this_dir)
+            + "' has not been built. Build this project with 'build.py' first"
+        )
+
+    files: Dict[str, Tuple[str, str]] = {}
+    for name, binary in binaries.get().items():
+        if binary.bin_type not in ["application", "library"]:
+            continue
+        for target in targets:
+            if target["name"] != name or len(target["filename"]) == 0:
+                continue
+            if (binary.bin_type == "application") != (target["type"] == "executable"):
+                continue
+            if os.path.isfile(target["filename"][0]):
+                files[name] = (binary.bin_type, target["filename"][0])
+    return files
+
+
+def component_names(build_dir: str, binary_name: str) -> Dict[str, str]:
+    """Returns the dependency of each enabled dependency component of a binary"""
+
+    update_deps = import_module("update_deps")
+    binaries = update_deps.Binaries()
+    binaries.read()
+    binary = binaries.get()[binary_name]
+    return {
+        component: dep_name
+        for dep_name, components in binary.dependencies.items()
+        for component, enabled in components.items()
+        if enabled
+    }
+
+
+def measure(build_dir: str, name: str, bin_type: str, path: str) -> dict:
+    """Returns the sections, symbols, and size contributed by each dependency component of a binary"""
+
+    # Symbols are attributed to the first owner that defines them (this project, then each dependency component), preferring strong definitions over weak ones
+    owners: List[Tuple[str, Optional[str], Dict[str, bool]]] = []
+    project_names: Dict[str, bool] = {}
+    for root, _, file_names in os.walk(path + ".p"):
+        for file_name in file_names:
+            if os.path.splitext(file_name)[1] in [".o", ".obj"]:
+                for symbol, strong in defined_names(
+                    os.path.join(root, file_name)
+                ).items():
+                    project_names[symbol] = project_names.get(symbol, False) or strong
+    owners.append((project_component, None, project_names))
+    for component, dep_name in sorted(component_names(build_dir, name).items()):
+        pc_path: str = os.path.join(build_dir, "generators", component + ".pc")
+        names: Dict[str, bool] = {}
+        if os.path.isfile(pc_path):
+            for library in pc_libraries(pc_path):
+                for symbol, strong in defined_names(library).items():
+                    names[symbol] = names.get(symbol, False) or strong
+        owners.append((component, dep_name, names))
+
+    symbol_sizes: Dict[str, int] = symbols(path)
+    components: Dict[str, dict] = {
+        owner: {"dependency": dep_name, "size": 0, "symbols": 0}
+        for owner, dep_name, _ in owners
+    }
+    components[other_component] = {"dependency": None, "size": 0, "symbols": 0}
+    for symbol, size in symbol_sizes.items():
+        base_name: str = _base_name(symbol)
+        strong_owners: List[str] = [
+            owner for owner, _, names in owners if names.get(base_name, False)
+        ]
+        weak_owners: List[str] = [
+            owner for owner, _, names in owners if base_name in names
+        ]
+        owner: str = (strong_owners + weak_owners + [other_component])[0]
+        components[owner]["size"] += size
+        components[owner]["symbols"] += 1
+
+    # Symbols are stored by their demangled names (different mangled names with the same demangled name, such as constructor variants, are combined)
+    demangled: Dict[str, str] = demangle(list(symbol_sizes.keys()))
+    readable_symbols: Dict[str, int] = {}
+    for symbol, size in symbol_sizes.items():
+        readable: str = demangled.get(symbol, symbol)
+        readable_symbols[readable] = readable_symbols.get(readable, 0) + size
+
+    return {
+        "type": bin_type,
+        "path": os.path.relpath(path, build_dir),
+        "file_size": os.path.getsize(path),
+        "sections": sections(path),
+        "components": components,
+        "symbols": dict(
+            sorted(readable_symbols.items(), key=lambda item: (-item[1], item[0]))
+        ),
+    }
+
+
+def generate(build_dir: str) -> dict:
+    """Returns the size report of every application and library built in the given build folder"""
+
+    return {
+        "schema_version": schema_version,
+        "build_folder": os.path.relpath(build_dir, this_dir),
+        "binaries": {
+            name: measure(build_dir, name, bin_type, path)
+            for name, (bin_type, path) in sorted(binary_files(build_dir).items())
+        },
+    }
+
+
+def load(path: str) -> dict:
+    """Returns the size report of a build folder (generated now) or of a saved report (JSON)"""
+
+    if os.path.isdir(path):
+        return generate(os.path.abspath(path))
+    with open(path, "r") as report_json:
+        saved: dict = json.load(report_json)
+    if saved.get("schema_version") != schema_version:
+        raise RuntimeError(
+            "'" + path + "' is not a size report of version " + str(schema_version)
+        )
+    return saved
+
+
+def _kib(size: int) -> str:
+    """Returns a number of bytes formatted as kibibytes"""
+
+    return "{:.1f} KiB".format(size / 1024)
+
+
+def _delta(size: int) -> str:
+    """Returns a change in the number of bytes formatted as kibibytes with a sign (red for growth)"""
+
+    text: str = "{:+.1f} KiB".format(size / 1024)
+    if size > 0:
+        return "\033[31;1m" + text + "\033[0m"
+    if size < 0:
+        return "\033[32;1m" + text + "\033[0m"
+    return text
+
+
+def _allocated(binary: dict) -> Dict[str, int]:
+    """Returns the sections of a binary that are loaded into memory (the sections that are not debug information, symbol tables, or comments)"""
+
+    return {
+        section: size
+        for section, size in binary["sections"].items()
+        if not section.startswith((".debug", ".symtab", ".strtab", ".comment"))
+    }
+
+
+def print_report(report: dict, top: int) -> None:
+    """Write the sections, dependency components, and largest symbols of each binary to standard out"""
+
+    for name, binary in report["binaries"].items():
+        print(
+            "\033[34;1m"
+            + name
+            + "\033[0m ("
+            + binary["type"]
+            + ", "
+            + binary["path"]
+            + "): "
+            + _kib(binary["file_size"])
+        )
+
+        print("  Sections")
+        for section, size in sorted(
+            _allocated(binary).items(), key=lambda item: -item[1]
+        )[:top]:
+            print("    {:>12}  {}".format(_kib(size), section))
+
+        print("  Dependency components")
+        for component, info in sorted(
+            binary["components"].items(), key=lambda item: -item[1]["size"]
+        ):
+            if info["symbols"] == 0:
+                continue
+            print(
+                "    {:>12}  {:>8} symbols  {}".format(
+                    _kib(info["size"]), info["symbols"], component
+                )
+            )
+
+        print("  Largest symbols")
+        for symbol, size in list(binary["symbols"].items())[:top]:
+            print("    {:>12}  {}".format(_kib(size), symbol))
+        print("\n", end="")
+
+
+def _changes(base: Dict[str, int], new: Dict[str, int]) -> List[Tuple[str, int]]:
+    """Returns the change in size of every entry that differs between two mappings (largest growth first)"""
+
+    changes: List[Tuple[str, int]] = [
+        (key, new.get(key, 0) - base.get(key, 0))
+        for key in set(base.keys()) | set(new.keys())
+        if new.get(key, 0) != base.get(key, 0)
+    ]
+    return sorted(changes, key=lambda change: (-change[1], change[0]))
+
+
+def print_diff(base: dict, new: dict, top: int) -> Dict[str, int]:
+    """Write the differences between two size reports to standard out and return the growth of each binary (in bytes)"""
+
+    growth: Dict[str, int] = {}
+    for name in sorted(set(base["binaries"].keys()) | set(new["binaries"].keys())):
+        if name not in new["binaries"]:
+            print("\033[34;1m" + name + "\033[0m: removed\n")
+            continue
+        new_binary: dict = new["binaries"][name]
+        if name not in base["binaries"]:
+            print(
+                "\033[34;1m"
+                + name
+                + "\033[0m: added ("
+                + _kib(new_binary["file_size"])
+                + ")\n"
+            )
+            growth[name] = new_binary["file_size"]
+            continue
+        base_binary: dict = base["binaries"][name]
+        growth[name] = new_binary["file_size"] - base_binary["file_size"]
+        print(
+            "\033[34;1m"
+            + name
+            + "\033[0m: "
+            + _kib(base_binary["file_size"])
+            + " -> "
+            + _kib(new_binary["file_size"])
+            + " ("
+            + _delta(growth[name])
+            + ")"
+        )
+
+        for title, changes in [
+            ("Sections", _changes(_allocated(base_binary), _allocated(new_binary))),
+            (
+                "Dependency components",
+                _changes(
+                    {
+                        component: info["size"]
+                        for component, info in base_binary["components"].items()
+                    },
+                    {
+                        component: info["size"]
+                        for component, info in new_binary["components"].items()
+                    },
+                ),
+            ),
+            ("Symbols", _changes(base_binary["symbols"], new_binary["symbols"])),
+        ]:
+            if len(changes) == 0:
+                continue
+            print("  " + title)
+            # Both the largest growth and the largest reduction are shown
+            shown: List[Tuple[str, int]] = changes[:top] + [
+                change for change in changes[-top:] if change not in changes[:top]
+            ]
+            for key, change in shown:
+                marker: str = ""
+                if title == "Symbols" and key not in base_binary["symbols"]:
+                    marker = " (new)"
+                elif title == "Symbols" and key not in new_binary["symbols"]:
+                    marker = " (removed)"
+                print("    {:>22}  {}{}".format(_delta(change), key, marker))
+        print("\n", end="")
+    return growth
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python size_report.py",
+        description="This script reports the section sizes, the size contributed by each dependency component, and the largest symbols of every application and library in 'binary_config.json' built for the active profiles (written by 'build.py'). The full report is written to '"
+        + report_file
+        + "' in the build folder. Reports can be compared to catch binaries that grow between builds. Requires 'size' and 'nm' from GNU Binutils or LLVM.",
+    )
+    arg_parser.add_argument(
+        "--build-folder",
+        help="build folder to report on (relative to this project) instead of the build folder of the active profiles",
+    )
+    arg_parser.add_argument(
+        "--diff",
+        nargs="+",
+        metavar="REPORT",
+        help="compare a base build folder or saved report (JSON) with another build folder or saved report (or with the build folder being reported on if only one is given)",
+    )
+    arg_parser.add_argument(
+        "--max-growth",
+        type=float,
+        metavar="KIB",
+        help="with --diff, exit with an error if any binary grew by more than the given number of KiB",
+    )
+    arg_parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="number of sections and symbols to report for each binary (default: 20)",
+    )
+
+    # Parse command line arguments.
+    args: Namespace = arg_parser.parse_args()
+    if args.diff is not None and len(args.diff) > 2:
+        arg_parser.error("--diff accepts at most two reports")
+    if args.max_growth is not None and args.diff is None:
+        arg_parser.error("--max-growth requires --diff")
+
+    if args.build_folder is not None:
+        build_dir: str = os.path.abspath(os.path.join(this_dir, args.build_folder))
+    else:
+        profiles = import_module("profiles")
+        build_dir = os.path.join(
+            this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+        )
+
+    if args.diff is not None and len(args.diff) == 2:
+        base_report: dict = load(args.diff[0])
+        new_report: dict = load(args.diff[1])
+    else:
+        new_report = generate(build_dir)
+        output_path: str = os.path.join(build_dir, report_file)
+        update_deps = import_module("update_deps")
+        update_deps.write_json(output_path, new_report)
+        if args.diff is None:
+            print_report(new_report, args.top)
+            print("Size report: " + os.path.relpath(output_path, this_dir))
+            exit(0)
+        base_report = load(args.diff[0])
+
+    growth: Dict[str, int] = print_diff(base_report, new_report, args.top)
+    if args.max_growth is not None:
+        exceeded: List[str] = [
+            name for name, size in growth.items() if size > args.max_growth * 1024
+        ]
+        if len(exceeded) > 0:
+            print(
+                "\033[31;1mGrew by more than "
+                + _kib(int(args.max_growth * 1024))
+                + ": "
+                + ", ".join(exceeded)
+                + "\033[0m"
+            )
+            exit(1)
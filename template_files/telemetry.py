@@ -0,0 +1,540 @@
+"""Record the duration of each phase of a Conan invocation along with cache hit rates and peak memory"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, TextIO, Tuple
+
+
+# Directory within each build folder where telemetry is written (one JSON file and one OpenMetrics textfile for each script)
+telemetry_dir: str = "telemetry"
+
+# Version of the JSON format (incremented whenever existing fields change meaning)
+schema_version: int = 1
+
+# Prefix of every OpenMetrics metric name
+metric_prefix: str = "cpp_template_build"
+
+# Lines written by Conan (or by commands run from 'conanfile.py') that begin each phase. The first matching marker is used.
+phase_markers: List[Tuple[str, str]] = [
+    ("======== Exporting recipe and package to the cache", "package"),
+    ("======== Exporting recipe", "export"),
+    ("======== Computing dependency graph", "graph"),
+    ("======== Computing necessary packages", "graph"),
+    ("======== Installing packages", "dependencies"),
+    ("======== Finalizing install", "generate"),
+    ("Calling generate() method", "generate"),
+    ("======== Calling build()", "configure"),
+    ("RUN: meson compile", "compile"),
+    ("RUN: meson test", "test"),
+    ("======== Launching test_package", "test_package"),
+]
+
+# Binary package listed by Conan after computing the necessary packages (e.g. 'gtest/1.14.0#rrev:pkgid#prev - Cache')
+package_status = re.compile(r"^\s+\S+/\S+:\S+ - (\w+)")
+
+# Header of each section of the output of Conan
+section_header = re.compile(r"^======== (.+) ========$")
+
+# ANSI escape sequences (removed before matching markers)
+ansi_escape = re.compile(r"\x1b\[[0-9;]*m")
+
+# Names of the processes that compile a single translation unit and of the processes that link (including link-time optimization)
+compile_processes: List[str] = ["cc1", "cc1plus", "cc1obj", "cc1objplus", "clang", "cl"]
+link_processes: List[str] = [
+    "ld",
+    "ld.bfd",
+    "ld.gold",
+    "ld.lld",
+    "lld",
+    "mold",
+    "collect2",
+    "lto1",
+    "link",
+]
+
+# Seconds between samples of the memory used by compilers and linkers
+memory_sample_interval: float = 0.2
+
+# Ninja build statements and their rules (e.g. 'build my_app: cpp_LINKER obj.o')
+ninja_build = re.compile(r"^build ((?:[^:$]|\$.)+?)(?: \|[^:]*)?: (\S+)")
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Returns the peak resident set size of the largest child process that has exited (or None if it cannot be measured on this platform)"""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak: int = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reports kibibytes and macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _process_table() -> Dict[int, Tuple[int, str, int]]:
+    """Returns the parent process ID, name, and resident set size (in bytes) of every process (only supported on Linux)"""
+
+    page_size: int = os.sysconf("SC_PAGE_SIZE")
+    table: Dict[int, Tuple[int, str, int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join("/proc", entry, "stat"), "r") as stat_file:
+                stat: str = stat_file.read()
+        except OSError:
+            continue
+        # The name is enclosed in parentheses and may contain spaces
+        name: str = stat[stat.find("(") + 1 : stat.rfind(")")]
+        fields: List[str] = stat[stat.rfind(")") + 2 :].split()
+        table[int(entry)] = (int(fields[1]), name, int(fields[21]) * page_size)
+    return table
+
+
+class MemorySampler(threading.Thread):
+    """Periodically samples the resident set size of the compilers and linkers started by a process"""
+
+    def __init__(self, root_pid: int):
+        super().__init__(daemon=True)
+        self.root_pid = root_pid
+        self.peak_compile_rss_bytes: Optional[int] = None
+        self.peak_link_rss_bytes: Optional[int] = None
+        self._stopped = threading.Event()
+
+    def sample(self) -> None:
+        """Update the peak memory of compilers and linkers from the current process table"""
+
+        table: Dict[int, Tuple[int, str, int]] = _process_table()
+        children: Dict[int, List[int]] = {}
+        for pid, (ppid, _, _) in table.items():
+            children.setdefault(ppid, []).append(pid)
+
+        pending: List[int] = list(children.get(self.root_pid, []))
+        while len(pending) > 0:
+            pid: int = pending.pop()
+            pending += children.get(pid, [])
+            _, name, rss = table[pid]
+            if name in compile_processes or name.startswith("clang-"):
+                self.peak_compile_rss_bytes = max(self.peak_compile_rss_bytes or 0, rss)
+            elif name in link_processes:
+                self.peak_link_rss_bytes = max(self.peak_link_rss_bytes or 0, rss)
+
+    def run(self) -> None:
+        """Sample until stopped"""
+
+        while not self._stopped.wait(memory_sample_interval):
+            self.sample()
+
+    def stop(self) -> None:
+        """Stop sampling"""
+
+        self._stopped.set()
+        self.join()
+
+
+def _ccache_stats() -> Optional[Dict[str, int]]:
+    """Returns the statistics of ccache (or None if ccache is not installed)"""
+
+    try:
+        result = subprocess.run(
+            ["ccache", "--print-stats"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    stats: Dict[str, int] = {}
+    for line in result.stdout.splitlines():
+        fields: List[str] = line.split("\t")
+        if len(fields) == 2 and fields[1].isdigit():
+            stats[fields[0]] = int(fields[1])
+    return stats
+
+
+def _link_outputs(build_dir: str) -> Set[str]:
+    """Returns the outputs of the link statements of the Ninja build file in the given folder"""
+
+    linked: Set[str] = set()
+    try:
+        with open(os.path.join(build_dir, "build.ninja"), "r") as build_file:
+            for line in build_file:
+                statement = ninja_build.match(line)
+                if statement is None:
+                    continue
+                if "LINKER" in statement.group(2):
+                    linked.add(statement.group(1).replace("$ ", " "))
+    except FileNotFoundError:
+        pass
+    return linked
+
+
+def _ninja_log_size(build_dir: str) -> int:
+    """Returns the size of the Ninja log in the given build folder (zero if it does not exist)"""
+
+    try:
+        return os.path.getsize(os.path.join(build_dir, ".ninja_log"))
+    except FileNotFoundError:
+        return 0
+
+
+def link_seconds(build_dir: str, log_offset: int) -> Optional[float]:
+    """Returns the time between the start of the first link and the end of the last link recorded in the Ninja log after the given offset (or None if the log was rewritten)"""
+
+    log_path: str = os.path.join(build_dir, ".ninja_log")
+    if _ninja_log_size(build_dir) < log_offset:
+        return None
+    linked: Set[str] = _link_outputs(build_dir)
+    start: Optional[int] = None
+    end: Optional[int] = None
+    try:
+        with open(log_path, "r") as ninja_log:
+            ninja_log.seek(log_offset)
+            for line in ninja_log:
+                fields: List[str] = line.rstrip("\n").split("\t")
+                if line.startswith("#") or len(fields) < 4 or fields[3] not in linked:
+                    continue
+                start = int(fields[0]) if start is None else min(start, int(fields[0]))
+                end = int(fields[1]) if end is None else max(end, int(fields[1]))
+    except FileNotFoundError:
+        return None
+    if start is None or end is None:
+        return 0.0
+    return (end - start) / 1000
+
+
+class Recorder:
+    """Records the phases of a Conan invocation for one script and writes them to the build folder"""
+
+    def __init__(self, script: str, build_dir: str):
+        self.script = script
+        self.build_dir = build_dir
+        self.started = datetime.now(timezone.utc)
+        self.success = False
+        self.phases: Dict[str, float] = {}
+        self.packages: Dict[str, int] = {}
+        self.compiler_cache: Optional[Dict[str, int]] = None
+        self.peak_rss_bytes: Optional[int] = None
+        self.peak_compile_rss_bytes: Optional[int] = None
+        self.peak_link_rss_bytes: Optional[int] = None
+        self.job_budget = None
+
+        self._start: float = time.monotonic()
+        self._phase: Optional[str] = None
+        self._phase_start: float = self._start
+        self._section: str = ""
+
+    def begin(self, phase: str) -> None:
+        """End the current phase (if any) and begin the given phase"""
+
+        self.end()
+        self._phase = phase
+        self._phase_start = time.monotonic()
+
+    def end(self) -> None:
+        """End the current phase (if any)"""
+
+        if self._phase is not None:
+            self.phases[self._phase] = (
+                self.phases.get(self._phase, 0.0)
+                + time.monotonic()
+                - self._phase_start
+            )
+        self._phase = None
+
+    def observe(self, line: str) -> None:
+        """Update the current phase and the package counts from one line of Conan output"""
+
+        text: str = ansi_escape.sub("", line).rstrip()
+        header = section_header.match(text)
+        if header is not None:
+            self._section = header.group(1)
+        for marker, phase in phase_markers:
+            if marker in text:
+                if phase != self._phase:
+                    self.begin(phase)
+                break
+
+        if self._section == "Computing necessary packages":
+            status = package_status.match(text)
+            if status is not None:
+                key: str = status.group(1).lower()
+                self.packages[key] = self.packages.get(key, 0) + 1
+
+    def run(self, command: List[str], log: Optional[TextIO] = None) -> int:
+        """Execute Conan, forward its output to standard error (or the given log), and record the phases it goes through. Returns the exit code of Conan"""
+
+        env: Dict[str, str] = dict(os.environ)
+        stream: TextIO = log if log is not None else sys.stderr
+        # Conan only writes colors to terminals
+        if stream.isatty() and "NO_COLOR" not in env:
+            env.setdefault("CLICOLOR_FORCE", "1")
+
+        ccache_before: Optional[Dict[str, int]] = _ccache_stats()
+        log_offset: int = _ninja_log_size(self.build_dir)
+
+        self.begin("startup")
+        process = subprocess.Popen(
+            command,
+            stdout=log,
+            stderr=subprocess.PIPE,
+            env=env,
+            text=True,
+            errors="replace",
+        )
+        # Processes can only be sampled on Linux
+        sampler: Optional[MemorySampler] = None
+        if os.path.isfile(os.path.join("/proc", str(process.pid), "stat")):
+            sampler = MemorySampler(process.pid)
+            sampler.start()
+
+        assert process.stderr is not None
+        for line in process.stderr:
+            stream.write(line)
+            stream.flush()
+            self.observe(line)
+        returncode: int = process.wait()
+        self.end()
+
+        if sampler is not None:
+            sampler.stop()
+            self.peak_compile_rss_bytes = sampler.peak_compile_rss_bytes
+            self.peak_link_rss_bytes = sampler.peak_link_rss_bytes
+
+        # Separate linking from compilation (Meson compiles and links within the same command)
+        if "compile" in self.phases:
+            linking: Optional[float] = link_seconds(self.build_dir, log_offset)
+            if linking is not None:
+                linking = min(linking, self.phases["compile"])
+                self.phases["compile"] -= linking
+                self.phases["link"] = linking
+
+        ccache_after: Optional[Dict[str, int]] = _ccache_stats()
+        if ccache_before is not None and ccache_after is not None:
+            delta: Dict[str, int] = {
+                key: value - ccache_before.get(key, 0)
+                for key, value in ccache_after.items()
+            }
+            hits: int = delta.get("direct_cache_hit", 0) + delta.get(
+                "preprocessed_cache_hit", 0
+            )
+            misses: int = delta.get("cache_miss", 0)
+            if hits + misses > 0:
+                self.compiler_cache = {"hits": hits, "misses": misses}
+
+        self.peak_rss_bytes = _peak_rss_bytes()
+        self.success = returncode == 0
+        return returncode
+
+    def duration(self) -> float:
+        """Returns the number of seconds since recording began"""
+
+        return time.monotonic() - self._start
+
+    def dependency_cache_hit_ratio(self) -> Optional[float]:
+        """Returns the fraction of binary packages that were found in the Conan cache instead of being downloaded or built (or None if no packages were needed)"""
+
+        needed: int = sum(
+            self.packages.get(status, 0) for status in ["cache", "download", "build"]
+        )
+        return self.packages.get("cache", 0) / needed if needed > 0 else None
+
+    def compiler_cache_hit_ratio(self) -> Optional[float]:
+        """Returns the fraction of compilations that were found in the compiler cache (or None if no compiler cache was used)"""
+
+        if self.compiler_cache is None:
+            return None
+        return self.compiler_cache["hits"] / (
+            self.compiler_cache["hits"] + self.compiler_cache["misses"]
+        )
+
+    def json(self, duration: float) -> dict:
+        """Returns the recorded telemetry represented as JSON"""
+
+        return {
+            "schema_version": schema_version,
+            "script": self.script,
+            "build_folder": os.path.basename(self.build_dir),
+            "started": self.started.isoformat(),
+            "success": self.success,
+            "duration_seconds": round(duration, 3),
+            "phases_seconds": {
+                phase: round(seconds, 3) for phase, seconds in self.phases.items()
+            },
+            "packages": dict(sorted(self.packages.items())),
+            "dependency_cache_hit_ratio": self.dependency_cache_hit_ratio(),
+            "compiler_cache": (
+                None
+                if self.compiler_cache is None
+                else dict(
+                    self.compiler_cache, hit_ratio=self.compiler_cache_hit_ratio()
+                )
+            ),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "peak_compile_rss_bytes": self.peak_compile_rss_bytes,
+            "peak_link_rss_bytes": self.peak_link_rss_bytes,
+            "schedule": (
+                None
+                if self.job_budget is None
+                else {
+                    "compile_jobs": self.job_budget.jobs,
+                    "link_jobs": self.job_budget.links,
+                    "available_memory_bytes": self.job_budget.available_memory,
+                    "compile_memory_estimate_bytes": self.job_budget.compile_memory,
+                    "link_memory_estimate_bytes": self.job_budget.link_memory,
+                }
+            ),
+        }
+
+    def openmetrics(self, duration: float) -> str:
+        """Returns the recorded telemetry in the OpenMetrics text format"""
+
+        labels: str = (
+            'script="'
+            + self.script
+            + '",build_folder="'
+            + os.path.basename(self.build_dir)
+            + '"'
+        )
+        lines: List[str] = []
+
+        def family(name: str, description: str, unit: str = "") -> str:
+            """Add the metadata of a gauge metric family and return its full name"""
+
+            full_name: str = metric_prefix + "_" + name
+            lines.append("# TYPE " + full_name + " gauge")
+            if unit:
+                lines.append("# UNIT " + full_name + " " + unit)
+            lines.append("# HELP " + full_name + " " + description)
+            return full_name
+
+        def sample(name: str, value: float, extra_labels: str = "") -> None:
+            """Add a sample of a metric"""
+
+            lines.append(
+                name
+                + "{"
+                + labels
+                + ("," + extra_labels if extra_labels else "")
+                + "} "
+                + repr(float(value))
+            )
+
+        sample(
+            family("timestamp_seconds", "Time at which the script began.", "seconds"),
+            self.started.timestamp(),
+        )
+        sample(
+            family("success", "1 if the script succeeded and 0 otherwise."),
+            self.success,
+        )
+        sample(
+            family("duration_seconds", "Duration of the script.", "seconds"), duration
+        )
+        name: str = family("phase_seconds", "Duration of each phase.", "seconds")
+        for phase, seconds in self.phases.items():
+            sample(name, seconds, 'phase="' + phase + '"')
+        name = family("packages", "Number of binary packages by status.")
+        for status, count in sorted(self.packages.items()):
+            sample(name, count, 'status="' + status + '"')
+        ratio: Optional[float] = self.dependency_cache_hit_ratio()
+        if ratio is not None:
+            sample(
+                family(
+                    "dependency_cache_hit_ratio",
+                    "Fraction of binary packages found in the Conan cache.",
+                ),
+                ratio,
+            )
+        if self.compiler_cache is not None:
+            name = family(
+                "compiler_cache_requests", "Number of compiler cache requests."
+            )
+            sample(name, self.compiler_cache["hits"], 'result="hit"')
+            sample(name, self.compiler_cache["misses"], 'result="miss"')
+        if self.peak_rss_bytes is not None:
+            sample(
+                family(
+                    "peak_rss_bytes",
+                    "Peak resident set size of the largest process.",
+                    "bytes",
+                ),
+                self.peak_rss_bytes,
+            )
+        if self.peak_compile_rss_bytes is not None:
+            sample(
+                family(
+                    "peak_compile_rss_bytes",
+                    "Peak resident set size of a single compiler process.",
+                    "bytes",
+                ),
+                self.peak_compile_rss_bytes,
+            )
+        if self.peak_link_rss_bytes is not None:
+            sample(
+                family(
+                    "peak_link_rss_bytes",
+                    "Peak resident set size of a single linker process.",
+                    "bytes",
+                ),
+                self.peak_link_rss_bytes,
+            )
+        if self.job_budget is not None:
+            sample(
+                family(
+                    "scheduled_compile_jobs",
+                    "Number of compile jobs allowed to run concurrently.",
+                ),
+                self.job_budget.jobs,
+            )
+            sample(
+                family(
+                    "scheduled_link_jobs",
+                    "Number of link jobs allowed to run concurrently.",
+                ),
+                self.job_budget.links,
+            )
+            sample(
+                family(
+                    "compile_memory_estimate_bytes",
+                    "Memory expected for a single compile job.",
+                    "bytes",
+                ),
+                self.job_budget.compile_memory,
+            )
+            sample(
+                family(
+                    "link_memory_estimate_bytes",
+                    "Memory expected for a single link job.",
+                    "bytes",
+                ),
+                self.job_budget.link_memory,
+            )
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Write the recorded telemetry to the build folder as JSON and as an OpenMetrics textfile"""
+
+        self.end()
+        duration: float = self.duration()
+        output_dir: str = os.path.join(self.build_dir, telemetry_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        for extension, contents in [
+            (".json", json.dumps(self.json(duration), indent=4) + "\n"),
+            (".prom", self.openmetrics(duration)),
+        ]:
+            # Replace the previous file atomically so collectors never read a partial file
+            path: str = os.path.join(output_dir, self.script + extension)
+            temp_path: str = path + "." + str(os.getpid()) + ".tmp"
+            with open(temp_path, "w") as output:
+                output.write(contents)
+            os.replace(temp_path, path)
@@ -10,6 +10,9 @@ from venv import EnvBuilder
 
 name: str = ".venv"
 
+# Environment variable that selects a virtual environment shared by several projects instead of the one within this project (set by 'workspace.py')
+shared_path_variable: str = "CPP_TEMPLATE_VENV"
+
 
 def _abs_path(path: str):
     """Returns the absolute form of the given path relative to the directory containing this file"""
@@ -20,6 +23,9 @@ def _abs_path(path: str):
 def path() -> str:
     """Returns the absolute path to this virtual environment"""
 
+    shared_path: str = os.environ.get(shared_path_variable, "")
+    if shared_path:
+        return os.path.abspath(shared_path)
     return _abs_path(name)
 
 
@@ -1,12 +1,21 @@
 """Manage binary configuration"""
 
+import fnmatch
 import json
 import os
-from dataclasses import dataclass, field
+import tempfile
+from argparse import ArgumentParser
+from dataclasses import dataclass, field, replace
 from importlib import import_module
 from sys import argv
 from types import NoneType
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set
+
+# Characters that make a path component a glob pattern
+glob_characters: str = "*?["
+
+# Directories that are never indexed for glob patterns (in addition to hidden directories)
+unindexed_dirs: List[str] = ["build", "__pycache__"]
 
 
 @dataclass
@@ -34,6 +43,9 @@ class Binary:
     headers: List[List[str]] = field(default_factory=list)
     sources: List[List[str]] = field(default_factory=list)
     main: List[str] = field(default_factory=list)
+    modules: List[List[str]] = field(default_factory=list)
+    headers_glob: List[List[str]] = field(default_factory=list)
+    sources_glob: List[List[str]] = field(default_factory=list)
 
 
 def _assert_type(var: Any, *expected_types) -> NoneType:
@@ -51,6 +63,16 @@ def _assert_type(var: Any, *expected_types) -> NoneType:
         )
 
 
+def _assert_paths(paths: Any) -> NoneType:
+    """Ensure that a given variable is a list of paths represented as lists of path components"""
+
+    _assert_type(paths, list)
+    for path in paths:
+        _assert_type(path, list)
+        for component in path:
+            _assert_type(component, str)
+
+
 def _value_or(dictionary: dict, key: Any, default_value: Any, *expected_types) -> Any:
     """Returns the value for a given key in a given dictionary or a given default value if the key is not found"""
 
@@ -61,6 +83,38 @@ def _value_or(dictionary: dict, key: Any, default_value: Any, *expected_types) -
     return default_value
 
 
+def write_json(path: str, raw_json: dict) -> NoneType:
+    """Atomically replace the contents of a file with the given JSON so concurrent builds never read a partially written file. The file is left untouched if its contents would not change"""
+
+    content: str = json.dumps(raw_json, indent=4)
+    try:
+        with open(path, "r") as file:
+            if file.read() == content:
+                return
+    except FileNotFoundError:
+        pass
+
+    temp_path: str = path + "." + str(os.getpid()) + ".tmp"
+    with open(temp_path, "w") as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+
+def get_component_version(comp_content: str) -> str:
+    """Get the version of a component from its pkg-config file content."""
+
+    for line in comp_content.split("\n"):
+        version_label: str = "Version:"
+        if not line.startswith(version_label):
+            continue
+        return line.removeprefix(version_label).strip()
+
+    raise Exception(
+        f"Failed to fetch the version of a component from its context:\n"
+        + str(comp_content)
+    )
+
+
 class DependencyConfigInterpretationError(Exception):
     """Exception thrown when an error occurs when interpreting the dependency configuration file"""
 
@@ -147,7 +201,7 @@ class Dependencies:
     def write(self) -> NoneType:
         """Writes dependency information to the dependency configuration file represented as JSON"""
 
-        json.dump(self.json(), open(self.path, "w"), indent=4)
+        write_json(self.path, self.json())
 
 
 class BinaryConfigInterpretationError(Exception):
@@ -217,32 +271,40 @@ class Binaries:
             if "dependencies" in binary:
                 dependencies = self._structured_dependencies(binary["dependencies"])
 
-            # Headers (if applicable)
+            # Headers and header glob patterns (if applicable). Headers may be omitted if glob patterns are given.
             headers: List[List[str]] = []
+            headers_glob: List[List[str]] = []
             if bin_type == "library":
-                headers = binary["headers"]
-                _assert_type(headers, list)
-                for header in headers:
-                    _assert_type(header, list)
-                    for component in header:
-                        _assert_type(component, str)
+                headers_glob = _value_or(binary, "headers_glob", [], list)
+                _assert_paths(headers_glob)
+                headers = (
+                    binary["headers"]
+                    if len(headers_glob) == 0
+                    else _value_or(binary, "headers", [], list)
+                )
+                _assert_paths(headers)
             else:
-                if "headers" in binary:
-                    print(
-                        "Ignoring 'headers' field encountered while interpreting configuration information for binary '"
-                        + binary_name
-                        + "' of type '"
-                        + bin_type
-                        + "'"
-                    )
-
-            # Sources
-            sources: List[List[str]] = binary["sources"]
-            _assert_type(sources, list)
-            for source in sources:
-                _assert_type(source, list)
-                for component in source:
-                    _assert_type(component, str)
+                for ignored_field in ["headers", "headers_glob"]:
+                    if ignored_field in binary:
+                        print(
+                            "Ignoring '"
+                            + ignored_field
+                            + "' field encountered while interpreting configuration information for binary '"
+                            + binary_name
+                            + "' of type '"
+                            + bin_type
+                            + "'"
+                        )
+
+            # Sources and source glob patterns. Sources may be omitted if glob patterns are given.
+            sources_glob: List[List[str]] = _value_or(binary, "sources_glob", [], list)
+            _assert_paths(sources_glob)
+            sources: List[List[str]] = (
+                binary["sources"]
+                if len(sources_glob) == 0
+                else _value_or(binary, "sources", [], list)
+            )
+            _assert_paths(sources)
 
             # Source containing the 'main' function (if applicable)
             main: List[str] = []
@@ -267,6 +329,10 @@ class Binaries:
                         + "'"
                     )
 
+            # C++20 module interface units (optional)
+            modules: List[List[str]] = binary["modules"] if "modules" in binary else []
+            _assert_paths(modules)
+
             self.binaries[binary_name] = Binary(
                 name=binary_name,
                 bin_type=bin_type,
@@ -274,6 +340,9 @@ class Binaries:
                 headers=headers,
                 sources=sources,
                 main=main,
+                modules=modules,
+                headers_glob=headers_glob,
+                sources_glob=sources_glob,
             )
 
     def read(self) -> None:
@@ -292,16 +361,161 @@ class Binaries:
             raw_json_binary["dependencies"] = binary.dependencies
             if binary.bin_type == "library":
                 raw_json_binary["headers"] = binary.headers
+                if len(binary.headers_glob) > 0:
+                    raw_json_binary["headers_glob"] = binary.headers_glob
             raw_json_binary["sources"] = binary.sources
+            if len(binary.sources_glob) > 0:
+                raw_json_binary["sources_glob"] = binary.sources_glob
             if len(binary.main) > 0:
                 raw_json_binary["main"] = binary.main
+            if len(binary.modules) > 0:
+                raw_json_binary["modules"] = binary.modules
             raw_json[binary.name] = raw_json_binary
         return raw_json
 
     def write(self) -> None:
         """Writes binary information to the binary configuration file represented as JSON"""
 
-        json.dump(self.json(), open(self.path, "w"), indent=4)
+        write_json(self.path, self.json())
+
+
+class FileIndex:
+    """Persistent index of the files within the directories of this project. A directory is only listed again if its modification time changed since it was last indexed (which happens whenever an entry is added, removed, or renamed), so resolving glob patterns does not list the whole tree"""
+
+    def __init__(self, root_dir: str, path: Optional[str] = None) -> NoneType:
+        self.root_dir = root_dir
+        self.path = path
+        self.dirs: Dict[str, dict] = {}
+        self._refreshed: Dict[str, dict] = {}
+        self._visited: Set[str] = set()
+        if path is None:
+            return
+        try:
+            with open(path, "r") as index_file:
+                raw_json: dict = json.load(index_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if type(raw_json) is dict and raw_json.get("root") == root_dir:
+            self.dirs = raw_json.get("dirs", {})
+
+    def _refresh(self, rel_dir: str) -> NoneType:
+        """Index a directory (relative to the root of the index and represented with forward slashes) and all of its subdirectories"""
+
+        if rel_dir in self._refreshed:
+            return
+        abs_dir: str = os.path.join(self.root_dir, *rel_dir.split("/"))
+        try:
+            mtime_ns: int = os.stat(abs_dir).st_mtime_ns
+        except OSError:
+            return
+
+        # Directories reached through symbolic links are only indexed once (so links to a parent directory do not recurse endlessly)
+        real_dir: str = os.path.realpath(abs_dir)
+        if real_dir in self._visited:
+            return
+        self._visited.add(real_dir)
+
+        entry: Optional[dict] = self.dirs.get(rel_dir)
+        if entry is None or entry["mtime_ns"] != mtime_ns:
+            files: List[str] = []
+            dirs: List[str] = []
+            with os.scandir(abs_dir) as dir_entries:
+                for dir_entry in dir_entries:
+                    if not dir_entry.is_dir():
+                        files.append(dir_entry.name)
+                    elif not dir_entry.name.startswith(".") and not (
+                        rel_dir == "" and dir_entry.name in unindexed_dirs
+                    ):
+                        dirs.append(dir_entry.name)
+            entry = {"mtime_ns": mtime_ns, "files": sorted(files), "dirs": sorted(dirs)}
+        self._refreshed[rel_dir] = entry
+
+        for name in entry["dirs"]:
+            self._refresh(name if rel_dir == "" else rel_dir + "/" + name)
+
+    def glob(self, pattern: List[str]) -> List[List[str]]:
+        """Returns the files that match a glob pattern represented as a list of path components ('**' matches any number of directories)"""
+
+        # Only the directory named by the leading path components without glob characters is indexed
+        base: List[str] = []
+        for component in pattern[:-1]:
+            if any(character in component for character in glob_characters):
+                break
+            base.append(component)
+        base_dir: str = "/".join(base)
+        self._refresh(base_dir)
+
+        matches: List[List[str]] = []
+        for rel_dir, entry in self._refreshed.items():
+            if (
+                base_dir != ""
+                and rel_dir != base_dir
+                and not rel_dir.startswith(base_dir + "/")
+            ):
+                continue
+            dir_components: List[str] = rel_dir.split("/") if rel_dir != "" else []
+            for name in entry["files"]:
+                if _glob_match(dir_components + [name], pattern):
+                    matches.append(dir_components + [name])
+        return sorted(matches)
+
+    def write(self) -> NoneType:
+        """Writes the directories indexed since this index was read to the index file (if any)"""
+
+        if self.path is not None:
+            write_json(self.path, {"root": self.root_dir, "dirs": self._refreshed})
+
+
+def _glob_match(path: List[str], pattern: List[str]) -> bool:
+    """Returns true if a path matches a glob pattern (both represented as lists of path components)"""
+
+    if len(pattern) == 0:
+        return len(path) == 0
+    if pattern[0] == "**":
+        return any(
+            _glob_match(path[index:], pattern[1:]) for index in range(len(path) + 1)
+        )
+    return (
+        len(path) > 0
+        and fnmatch.fnmatchcase(path[0], pattern[0])
+        and _glob_match(path[1:], pattern[1:])
+    )
+
+
+def _matched(
+    index: FileIndex, patterns: List[List[str]], listed: Set[tuple]
+) -> List[List[str]]:
+    """Returns the files that match any of the given glob patterns and are not listed yet (and adds them to the listed files)"""
+
+    paths: List[List[str]] = []
+    for pattern in patterns:
+        for path in index.glob(pattern):
+            if tuple(path) not in listed:
+                listed.add(tuple(path))
+                paths.append(path)
+    return paths
+
+
+def resolve_globs(
+    binaries: Dict[str, Binary], root_dir: str, index_path: Optional[str] = None
+) -> Dict[str, Binary]:
+    """Returns copies of the given binaries with the files that match their glob patterns (relative to the given root directory) added to their headers and sources. Files that are already listed by a binary are not added again and matches are sorted so the result only changes when the set of matched files changes. Directories are indexed in the given file (if any) so later calls only list directories that changed"""
+
+    index = FileIndex(root_dir, index_path)
+    resolved: Dict[str, Binary] = {}
+    for binary_name, binary in binaries.items():
+        listed: Set[tuple] = {
+            tuple(path)
+            for path in binary.headers + binary.sources + binary.modules + [binary.main]
+        }
+
+        resolved[binary_name] = replace(
+            binary,
+            headers=binary.headers + _matched(index, binary.headers_glob, listed),
+            sources=binary.sources + _matched(index, binary.sources_glob, listed),
+        )
+    index.write()
+    return resolved
 
 
 def unstructured(binaries: Dict[str, Binary], deps: Dict[str, Dependency]) -> list:
@@ -338,17 +552,132 @@ def unstructured(binaries: Dict[str, Binary], deps: Dict[str, Dependency]) -> li
                 binary.headers,
                 binary.sources,
                 binary.main,
+                binary.modules,
             ]
         )
     return raw_data
 
 
+def add_missing_components(binaries: Binaries, deps: Dependencies) -> NoneType:
+    """Enable every component of each dependency that is not yet listed by the binaries that use the dependency"""
+
+    dep_config: Dict[str, Dependency] = deps.get()
+    for binary_name, binary in binaries.get().items():
+        for dep_name, components in binary.dependencies.items():
+
+            # Verify that all dependencies in the binary configuration file are also declared in the dependency configuration file.
+            if dep_name not in dep_config:
+                raise RuntimeError(
+                    '"' + dep_name + '" was not found in "' + deps.path + '"'
+                )
+
+            for component_name in dep_config[dep_name].components.keys():
+                if component_name not in components:
+                    binary.dependencies[dep_name][component_name] = True
+
+
+def deploy(graph, output_folder: str, **kwargs) -> NoneType:
+    """Conan deployer (used by 'conan graph info') that updates the components of dependencies in the binary and dependency configuration files from the recipes of the dependencies without building or downloading any package binary"""
+
+    # Conan is only available to the Python interpreter of the virtual environment, which is the one that runs deployers.
+    from conan.tools.gnu import PkgConfigDeps
+    from conan.tools.gnu.pkgconfigdeps import _PCFilesDeps
+
+    # Conan only calls the 'package_info' method of dependencies when installing them. It is called here with an empty placeholder for each package folder since most recipes declare their components without inspecting the files within their package. Recipes that do (e.g. with 'collect_libs') report no libraries or components, which is documented by the '--full' option.
+    # WARN: This code is very similar to how Conan calls 'package_info' when installing packages and uses private interfaces within Conan.
+    #       Expect frequent breaking changes!
+    cwd: str = os.getcwd()
+    for index, node in enumerate(graph.ordered_iterate()):
+        if node is graph.root:
+            continue
+        package_folder: str = os.path.join(output_folder, "packages", str(index))
+        os.makedirs(package_folder, exist_ok=True)
+        node.conanfile.folders.set_base_package(package_folder)
+        os.chdir(package_folder)
+        try:
+            node.conanfile.package_info()
+        finally:
+            os.chdir(cwd)
+        node.conanfile.cpp.package.set_relative_base_folder(package_folder)
+
+    binaries = Binaries()
+    binaries.read()
+    deps = Dependencies()
+    deps.read()
+    dep_config: Dict[str, Dependency] = deps.get()
+
+    # Accumulate all components of each dependency declared in the dependency configuration file
+    # WARN: This code is very similar to the 'generate' method of PkgConfigDeps and uses private interfaces within Conan.
+    #       Expect frequent breaking changes!
+    root = graph.root.conanfile
+    pkg_config_deps = PkgConfigDeps(root)
+    for dep in root.dependencies.host.values():
+        dep_name: str = str(dep.ref.name)
+        if dep_name not in dep_config:
+            continue
+        dep_config[dep_name].resolved_version = str(dep.ref.version)
+        dep_config[dep_name].components.update(
+            {
+                comp_name: get_component_version(comp_content)
+                for comp_name, comp_content in _PCFilesDeps(
+                    pkg_config_deps, dep
+                ).items()
+            }
+        )
+
+    # Add missing components to the dependencies listed in the binary configuration file and update both configuration files
+    add_missing_components(binaries, deps)
+    binaries.write()
+    deps.write()
+
+
 if __name__ == "__main__":
-    # Update dependency information in the binary configuration file
     build = import_module("build")
     profiles = import_module("profiles")
-    build.conan(
-        "build",
-        profiles.get_profiles_abs_paths(),
-        extra_args=["--options:all", "quit_after_generate=True"] + list(argv)[1:],
+
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python update_deps.py",
+        description="This script updates the dependency information in the binary and dependency configuration files.",
+        epilog="All unrecognized arguments are passed to Conan.",
+        allow_abbrev=False,
     )
+    arg_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="update the components through the generate step of the Conan recipe of this project, which builds missing dependencies from source (by default, components are read from the recipes of dependencies without building or downloading any package binary, so the recipes only see empty package folders and dependencies whose recipes inspect their package to declare components, e.g. with 'collect_libs', report no libraries or components)",
+    )
+    build.add_system_packages_argument(arg_parser)
+
+    # Parse command line arguments.
+    args, conan_args = arg_parser.parse_known_args(list(argv)[1:])
+
+    # Update dependency information in the binary configuration file
+    if args.full:
+        build.conan(
+            "build",
+            profiles.get_profiles_abs_paths(),
+            extra_args=["--options:all", "quit_after_generate=True"] + conan_args,
+            system_packages=args.system_packages,
+            script="update_deps",
+        )
+    else:
+        # This script is also the deployer. System packages are only required by package binaries, so the system package manager is never invoked. The lockfile of the build folder is left untouched because nothing is built.
+        with tempfile.TemporaryDirectory() as deployer_folder:
+            build.conan(
+                "graph info",
+                profiles.get_profiles_abs_paths(),
+                extra_args=[
+                    "--format=json",
+                    "--out-file",
+                    os.path.join(deployer_folder, "graph.json"),
+                    "--deployer",
+                    os.path.abspath(__file__),
+                    "--deployer-folder",
+                    deployer_folder,
+                ]
+                + conan_args,
+                system_packages="report",
+                script="update_deps",
+                lockfile_out=False,
+            )
@@ -0,0 +1,421 @@
+"""Build several projects generated from this template together with a single dependency resolution"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib import import_module
+from sys import argv
+from typing import Dict, List, Optional, Set
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# Manifest listing the projects of a workspace (found in a parent directory of this project unless given explicitly)
+manifest_file: str = "workspace.json"
+
+# Files and directories written to the directory containing the manifest
+lockfile_name: str = "workspace.lock"
+venv_name: str = ".venv"
+log_dir_name: str = "workspace_logs"
+
+# Name of each project, read from its Conan file
+package_name = re.compile(r'^\s*name = "([^"]+)"', re.MULTILINE)
+
+
+@dataclass
+class Project:
+    """A project of a workspace and the other projects of the workspace it depends on"""
+
+    name: str
+    path: str
+    requires: Set[str] = field(default_factory=set)
+    dependents: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class ProjectResult:
+    """The outcome of building one project of a workspace"""
+
+    name: str
+    status: str
+    seconds: float
+    log_path: Optional[str]
+
+
+def find_manifest() -> Optional[str]:
+    """Returns the path to the nearest workspace manifest in a parent directory of this project (or None if there is none)"""
+
+    directory: str = os.path.dirname(os.path.abspath(this_dir))
+    while True:
+        path: str = os.path.join(directory, manifest_file)
+        if os.path.isfile(path):
+            return path
+        parent: str = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def read_projects(manifest_path: str) -> Dict[str, Project]:
+    """Returns the projects listed by a workspace manifest and the dependencies between them (read from their dependency configuration files)"""
+
+    update_deps = import_module("update_deps")
+    with open(manifest_path, "r") as manifest:
+        raw_json: dict = json.load(manifest)
+    project_paths = raw_json.get("projects")
+    if not isinstance(project_paths, list) or not all(
+        isinstance(project_path, str) for project_path in project_paths
+    ):
+        raise RuntimeError(
+            "'"
+            + manifest_path
+            + "' must contain a 'projects' list with the path to each project (relative to the manifest)"
+        )
+    if len(project_paths) == 0:
+        raise RuntimeError("'" + manifest_path + "' does not list any projects")
+
+    projects: Dict[str, Project] = {}
+    dep_names: Dict[str, Set[str]] = {}
+    for project_path in project_paths:
+        path: str = os.path.normpath(
+            os.path.join(os.path.dirname(os.path.abspath(manifest_path)), project_path)
+        )
+        try:
+            with open(os.path.join(path, "conanfile.py"), "r") as conanfile:
+                name_match = package_name.search(conanfile.read())
+        except FileNotFoundError:
+            raise RuntimeError(
+                "'" + path + "' is not a project generated from this template"
+            )
+        if name_match is None:
+            raise RuntimeError("The name of '" + path + "' could not be determined")
+        name: str = name_match.group(1)
+        if name in projects:
+            raise RuntimeError(
+                "'" + name + "' is listed more than once in '" + manifest_path + "'"
+            )
+
+        deps = update_deps.Dependencies()
+        deps.path = os.path.join(path, "dependency_config.json")
+        deps.read()
+        projects[name] = Project(name=name, path=path)
+        dep_names[name] = set(deps.get().keys())
+
+    for name, project in projects.items():
+        project.requires = {dep for dep in dep_names[name] if dep in projects}
+        for dep in project.requires:
+            projects[dep].dependents.add(name)
+    return projects
+
+
+def build_order(projects: Dict[str, Project]) -> List[List[str]]:
+    """Returns the projects of a workspace grouped into stages. Each project only depends on projects of earlier stages, so the projects of a stage can be built concurrently"""
+
+    stages: List[List[str]] = []
+    done: Set[str] = set()
+    while len(done) < len(projects):
+        stage: List[str] = sorted(
+            name
+            for name, project in projects.items()
+            if name not in done and project.requires <= done
+        )
+        if len(stage) == 0:
+            raise RuntimeError(
+                "The projects "
+                + ", ".join(sorted(set(projects.keys()) - done))
+                + " depend on each other in a cycle"
+            )
+        stages.append(stage)
+        done.update(stage)
+    return stages
+
+
+def workspace_env(root: str) -> Dict[str, str]:
+    """Returns the environment in which the scripts of each project use the virtual environment shared by the workspace"""
+
+    venv = import_module("this_venv")
+    return dict(
+        os.environ, **{venv.shared_path_variable: os.path.join(root, venv_name)}
+    )
+
+
+def project_profiles(project: Project, env: Dict[str, str]):
+    """Returns the absolute paths to the active profiles of a project"""
+
+    profiles = import_module("profiles")
+    output: str = subprocess.run(
+        [sys.executable, os.path.join(project.path, "profiles.py")],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout
+    paths: Dict[str, str] = {}
+    for line in output.splitlines():
+        key, _, value = line.partition(": ")
+        paths[key] = value
+    return profiles.Profiles(host=paths["host"], build=paths["build"])
+
+
+def resolve(
+    projects: Dict[str, Project],
+    stages: List[List[str]],
+    lockfile: str,
+    env: Dict[str, str],
+    update: bool,
+) -> None:
+    """Resolve the dependencies of every project of a workspace into a single lockfile so they all use the same version of each package"""
+
+    venv = import_module("this_venv")
+    if update and os.path.isfile(lockfile):
+        os.remove(lockfile)
+
+    # Projects that others depend on are exported first so their dependents can resolve them
+    for name in sorted(projects.keys()):
+        if len(projects[name].dependents) > 0:
+            subprocess.run(
+                [venv.conan(), "export", projects[name].path], env=env, check=True
+            )
+
+    # Each project extends the lockfile, so versions resolved for earlier projects are reused by later ones (or the resolution fails if they conflict)
+    for stage in stages:
+        for name in stage:
+            profiles_abs_paths = project_profiles(projects[name], env)
+            lockfile_args: List[str] = (
+                ["--lockfile", lockfile, "--lockfile-partial"]
+                if os.path.isfile(lockfile)
+                else []
+            )
+            subprocess.run(
+                [
+                    venv.conan(),
+                    "lock",
+                    "create",
+                    "--profile:build",
+                    profiles_abs_paths.build,
+                    "--profile:host",
+                    profiles_abs_paths.host,
+                ]
+                + lockfile_args
+                + ["--lockfile-out", lockfile, projects[name].path],
+                env=env,
+                check=True,
+            )
+
+    # Projects of the workspace are built from source by this script, so each dependent uses whatever was built last instead of a locked revision
+    for name, project in projects.items():
+        if len(project.dependents) > 0:
+            subprocess.run(
+                [
+                    venv.conan(),
+                    "lock",
+                    "remove",
+                    "--requires",
+                    name + "/*",
+                    "--lockfile",
+                    lockfile,
+                    "--lockfile-out",
+                    lockfile,
+                ],
+                env=env,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+
+
+def _run_script(
+    project: Project, script: str, args: List[str], env: Dict[str, str], log
+) -> bool:
+    """Execute a script of a project and return true if it succeeded"""
+
+    return (
+        subprocess.run(
+            [sys.executable, os.path.join(project.path, script)] + args,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        ).returncode
+        == 0
+    )
+
+
+def build(
+    projects: Dict[str, Project],
+    stages: List[List[str]],
+    root: str,
+    lockfile: str,
+    env: Dict[str, str],
+    extra_args: List[str],
+) -> List[ProjectResult]:
+    """Build every project of a workspace in dependency order and return the outcome for each project"""
+
+    log_dir: str = os.path.join(root, log_dir_name)
+    os.makedirs(log_dir, exist_ok=True)
+    lockfile_args: List[str] = ["--lockfile", lockfile, "--lockfile-partial"]
+    results: Dict[str, ProjectResult] = {}
+
+    for stage in stages:
+        # Projects that depend on a project that failed are skipped
+        ready: List[str] = []
+        for name in stage:
+            if all(results[dep].status == "SUCCESS" for dep in projects[name].requires):
+                ready.append(name)
+            else:
+                results[name] = ProjectResult(name, "SKIPPED", 0, None)
+        if len(ready) == 0:
+            continue
+
+        log_paths: Dict[str, str] = {
+            name: os.path.join(log_dir, name + ".log") for name in ready
+        }
+        start: Dict[str, float] = {name: time.monotonic() for name in ready}
+        success: Dict[str, bool] = {}
+
+        # Conan does not support concurrent modifications to its cache, so missing dependencies are installed for each project one at a time before building concurrently.
+        for name in ready:
+            print("Installing the dependencies of " + name)
+            with open(log_paths[name], "w") as log:
+                success[name] = _run_script(
+                    projects[name],
+                    "build.py",
+                    ["--dependencies-only"] + lockfile_args + extra_args,
+                    env,
+                    log,
+                )
+
+        # Split the available processors and memory between the concurrent builds
+        building: List[str] = [name for name in ready if success[name]]
+        print("Building " + ", ".join(building))
+
+        def build_project(name: str) -> bool:
+            with open(log_paths[name], "a") as log:
+                return _run_script(
+                    projects[name],
+                    "build.py",
+                    [
+                        "--share",
+                        str(len(building)),
+                        # System packages were already satisfied while installing dependencies
+                        "--system-packages",
+                        "report",
+                    ]
+                    + lockfile_args
+                    + extra_args,
+                    env,
+                    log,
+                )
+
+        if len(building) > 0:
+            with ThreadPoolExecutor(max_workers=len(building)) as executor:
+                for name, built in zip(building, executor.map(build_project, building)):
+                    success[name] = built
+
+        # Projects that others depend on are packaged from their build folders (one at a time) so their dependents in later stages can use them
+        for name in building:
+            if success[name] and len(projects[name].dependents) > 0:
+                print("Packaging " + name)
+                with open(log_paths[name], "a") as log:
+                    success[name] = _run_script(
+                        projects[name], "install.py", ["--from-build"], env, log
+                    )
+
+        for name in ready:
+            results[name] = ProjectResult(
+                name,
+                "SUCCESS" if success[name] else "FAILURE",
+                time.monotonic() - start[name],
+                log_paths[name],
+            )
+
+    return [results[name] for stage in stages for name in stage]
+
+
+def report(results: List[ProjectResult], root: str) -> None:
+    """Write the outcome of building each project of a workspace to standard out"""
+
+    colors: Dict[str, str] = {"SUCCESS": "32", "FAILURE": "31", "SKIPPED": "33"}
+    print("\n", end="")
+    name_width: int = max(len(result.name) for result in results)
+    for result in results:
+        print(
+            "\033[34;1m"
+            + result.name.ljust(name_width)
+            + "\033[0m: \033["
+            + colors[result.status]
+            + ";1m"
+            + result.status
+            + "\033[0m"
+            + (
+                " {:>8.1f}s  {}".format(
+                    result.seconds, os.path.relpath(result.log_path, root)
+                )
+                if result.log_path is not None
+                else ""
+            )
+        )
+
+
+if __name__ == "__main__":
+    # Setup the command line argument parser
+    arg_parser = ArgumentParser(
+        prog="python workspace.py",
+        description="This script builds every project listed in a workspace manifest ('"
+        + manifest_file
+        + "'). The dependencies of all projects are resolved into a single lockfile ('"
+        + lockfile_name
+        + "') and all projects share one virtual environment ('"
+        + venv_name
+        + "'), both next to the manifest. Projects are built in dependency order with independent projects built concurrently, and projects that others depend on are packaged into the Conan cache after they are built.",
+        epilog="All unrecognized arguments are passed to Conan.",
+        allow_abbrev=False,
+    )
+    arg_parser.add_argument(
+        "--manifest",
+        help="path to the workspace manifest (by default, the nearest '"
+        + manifest_file
+        + "' in a parent directory of this project)",
+    )
+    arg_parser.add_argument(
+        "--update",
+        action="store_true",
+        help="resolve dependencies again instead of reusing the versions in the existing workspace lockfile",
+    )
+
+    # Parse command line arguments.
+    args, conan_args = arg_parser.parse_known_args(list(argv)[1:])
+
+    manifest_path: Optional[str] = (
+        args.manifest if args.manifest is not None else find_manifest()
+    )
+    if manifest_path is None or not os.path.isfile(manifest_path):
+        arg_parser.error(
+            "No workspace manifest was found. Create '"
+            + manifest_file
+            + "' in a directory containing this project or pass its path with --manifest"
+        )
+    root: str = os.path.dirname(os.path.abspath(manifest_path))
+    env: Dict[str, str] = workspace_env(root)
+
+    # The shared virtual environment is created once for every project
+    os.environ.update(env)
+    venv = import_module("this_venv")
+    if not venv.exists():
+        venv.create()
+
+    projects: Dict[str, Project] = read_projects(manifest_path)
+    stages: List[List[str]] = build_order(projects)
+    lockfile: str = os.path.join(root, lockfile_name)
+    resolve(projects, stages, lockfile, env, args.update)
+
+    results: List[ProjectResult] = build(
+        projects, stages, root, lockfile, env, conan_args
+    )
+    report(results, root)
+    if any(result.status != "SUCCESS" for result in results):
+        exit(1)
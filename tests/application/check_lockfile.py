@@ -0,0 +1,36 @@
+"""Record the lockfile written by the last build for the active profiles ('record') or verify that it was not rewritten since it was recorded ('verify')"""
+
+import json
+import os
+from importlib import import_module
+from sys import argv
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# File within the build folder of the active profiles containing the recorded lockfile
+record_file_name: str = "recorded_lockfile.json"
+
+
+if __name__ == "__main__":
+    profiles = import_module("profiles")
+    build_dir: str = os.path.join(
+        this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+    )
+    lockfile_path: str = os.path.join(build_dir, "conan.lock")
+    record_path: str = os.path.join(build_dir, record_file_name)
+    with open(lockfile_path, "r") as lockfile:
+        current: dict = {
+            "content": lockfile.read(),
+            "mtime_ns": os.stat(lockfile_path).st_mtime_ns,
+        }
+    if argv[1:] == ["record"]:
+        with open(record_path, "w") as record_file:
+            json.dump(current, record_file, indent=4)
+    elif argv[1:] == ["verify"]:
+        with open(record_path, "r") as record_file:
+            recorded: dict = json.load(record_file)
+        if recorded != current:
+            raise RuntimeError("The lockfile of the build folder was rewritten")
+    else:
+        raise RuntimeError("Expected 'record' or 'verify'")
@@ -8,8 +8,15 @@ test = Test(this_dir)
 
 test.copy("template_config.ini")
 test.run("config", "config.py")
+test.copy("check_lockfile.py")
 test.run("clear_cache", "clear_cache.py")
 test.run("first_build", "build.py")
+test.run("record_lockfile", "check_lockfile.py", ["record"])
+test.run("update_deps_after_build", "update_deps.py")
+test.run("check_lockfile", "check_lockfile.py", ["verify"])
+test.run("trim_cache", "clear_cache.py", ["--budget", "0", "--dry-run"])
+test.run("clean_objects", "clean.py", ["--objects"])
+test.run("clean_configure", "clean.py", ["--configure"])
 test.run("clean", "clean.py")
 test.run("update_deps", "update_deps.py")
 test.run("second_build", "build.py")
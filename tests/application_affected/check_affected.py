@@ -0,0 +1,52 @@
+"""Verify which tests ran during the last build with 'build.py --affected': either exactly the given tests ('ran <test>...') or none of them ('none')"""
+
+import json
+import os
+from importlib import import_module
+from sys import argv
+from typing import Set
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# File within the build folder of the active profiles containing the modification time of the test log when it was last checked
+record_file_name: str = "recorded_test_log.json"
+
+
+if __name__ == "__main__":
+    profiles = import_module("profiles")
+    build_dir: str = os.path.join(
+        this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+    )
+    test_log: str = os.path.join(build_dir, "meson-logs", "testlog.json")
+    record_path: str = os.path.join(build_dir, record_file_name)
+
+    # Meson only writes the test log when tests run
+    try:
+        with open(record_path, "r") as record_file:
+            recorded = json.load(record_file)["mtime_ns"]
+    except FileNotFoundError:
+        recorded = None
+    written: int = os.stat(test_log).st_mtime_ns
+
+    if argv[1:] == ["none"]:
+        if written != recorded:
+            raise RuntimeError("Tests ran although none of them were affected")
+    elif argv[1:2] == ["ran"]:
+        if written == recorded:
+            raise RuntimeError("No tests ran although some of them were affected")
+        with open(test_log, "r") as log:
+            ran: Set[str] = {json.loads(line)["name"] for line in log if line.strip()}
+        if ran != set(argv[2:]):
+            raise RuntimeError(
+                "Expected "
+                + ", ".join(sorted(argv[2:]))
+                + " to run but "
+                + ", ".join(sorted(ran))
+                + " ran"
+            )
+    else:
+        raise RuntimeError("Expected 'ran <test>...' or 'none'")
+
+    with open(record_path, "w") as record_file:
+        json.dump({"mtime_ns": written}, record_file, indent=4)
@@ -0,0 +1,9 @@
+// External includes
+#include <gtest/gtest.h>
+
+// Standard includes
+#include <string>
+
+TEST(greeting_test, greets_the_world) {
+    ASSERT_EQ(std::string("Hello, ") + "world", "Hello, world");
+}
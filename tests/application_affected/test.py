@@ -0,0 +1,20 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("binary_config.json")
+test.copy("greeting.test.cpp", "tests")
+test.copy("check_affected.py")
+test.run("first_build", "build.py", ["--affected"])
+test.run("check_first", "check_affected.py", ["ran", "version", "greeting"])
+test.run("second_build", "build.py", ["--affected"])
+test.run("check_second", "check_affected.py", ["none"])
+test.copy(os.path.join("changed", "greeting.test.cpp"), "tests")
+test.run("changed_build", "build.py", ["--affected"])
+test.run("check_changed", "check_affected.py", ["ran", "greeting"])
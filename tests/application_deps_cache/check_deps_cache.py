@@ -0,0 +1,72 @@
+"""Verify that the package store contains every package this project depends on ('saved'), remove those packages from the Conan cache ('remove'), verify that they were restored with the same package revisions ('restored'), or restore them with 'deps_cache.py' and verify the reported hit rate ('report')"""
+
+import json
+import os
+import subprocess
+from importlib import import_module
+from sys import argv
+from typing import List
+
+
+this_dir: str = os.path.dirname(__file__)
+
+
+def manifest(deps_cache, profiles_abs_paths, store: str) -> List[str]:
+    """Returns the full references of the packages listed by the manifest for the active profiles"""
+
+    with open(deps_cache._manifest_path(store, profiles_abs_paths), "r") as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    venv = import_module("this_venv")
+    profiles = import_module("profiles")
+    deps_cache = import_module("deps_cache")
+    profiles_abs_paths = profiles.get_profiles_abs_paths()
+
+    store = deps_cache.store_dir()
+    if store is None:
+        raise RuntimeError("'" + deps_cache.store_env_var + "' is not set")
+    prefs: List[str] = manifest(deps_cache, profiles_abs_paths, store)
+    if len(prefs) == 0:
+        raise RuntimeError("The manifest does not list any packages")
+
+    if argv[1:] == ["saved"]:
+        for pref in prefs:
+            reference, _, rest = pref.partition("#")
+            rrev, _, rest = rest.partition(":")
+            pkgid, _, prev = rest.partition("#")
+            package = deps_cache.StoredPackage(
+                reference=reference, rrev=rrev, pkgid=pkgid, prev=prev
+            )
+            if not os.path.isfile(deps_cache._archive_path(store, package)):
+                raise RuntimeError("'" + pref + "' was not saved to the store")
+    elif argv[1:] == ["remove"]:
+        for pref in prefs:
+            # Removing the recipe revision also removes its packages
+            subprocess.run(
+                [venv.conan(), "remove", pref.partition(":")[0], "--confirm"],
+                check=True,
+            )
+        cached = deps_cache.cached_prefs()
+        remaining: List[str] = [pref for pref in prefs if pref in cached]
+        if len(remaining) > 0:
+            raise RuntimeError("Packages were not removed: " + ", ".join(remaining))
+    elif argv[1:] in [["restored"], ["report"]]:
+        if argv[1] == "report":
+            output: str = subprocess.run(
+                ["python", os.path.join(this_dir, "deps_cache.py"), "restore"],
+                check=True,
+                stdout=subprocess.PIPE,
+                text=True,
+            ).stdout
+            print(output)
+            expected: str = "restored {0} of {0} missing packages (hit rate 100%)"
+            if expected.format(len(prefs)) not in output:
+                raise RuntimeError("Unexpected report: " + output)
+        cached = deps_cache.cached_prefs()
+        missing: List[str] = [pref for pref in prefs if pref not in cached]
+        if len(missing) > 0:
+            raise RuntimeError("Packages were not restored: " + ", ".join(missing))
+    else:
+        raise RuntimeError("Expected 'saved', 'remove', 'restored', or 'report'")
@@ -0,0 +1,25 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+# Builds and 'deps_cache.py' use the package store set by the environment (the first build finds no packages in it)
+os.environ["DEPS_CACHE_DIR"] = os.path.join(test.files_dir, "package_store")
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("check_deps_cache.py")
+test.run("first_build", "build.py")
+test.run("save", "deps_cache.py", ["save"])
+test.run("check_saved", "check_deps_cache.py", ["saved"])
+
+# Without remotes, the dependencies can only come from the package store
+test.run("remove", "check_deps_cache.py", ["remove"])
+test.run("offline_build", "build.py", ["--no-remote"])
+test.run("check_restored", "check_deps_cache.py", ["restored"])
+
+test.run("remove_again", "check_deps_cache.py", ["remove"])
+test.run("check_report", "check_deps_cache.py", ["report"])
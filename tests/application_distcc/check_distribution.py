@@ -0,0 +1,20 @@
+"""Verify that the compilations of the last build ran where expected ('remote' for a distcc daemon, 'local' for the 'localhost' host)"""
+
+from importlib import import_module
+from sys import argv
+
+
+if __name__ == "__main__":
+    build = import_module("build")
+    profiles = import_module("profiles")
+
+    expected: str = argv[1]
+    local, remote = build.distribution(profiles.get_profiles_abs_paths())
+    if expected == "remote" and (remote == 0 or local != 0):
+        raise RuntimeError(
+            f"Expected every compilation to run on the distcc daemon, but {remote} ran remotely and {local} ran locally"
+        )
+    if expected == "local" and (local == 0 or remote != 0):
+        raise RuntimeError(
+            f"Expected every compilation to run on this machine, but {remote} ran remotely and {local} ran locally"
+        )
@@ -0,0 +1,66 @@
+from tests.test import Test
+import os
+import shutil
+import socket
+import subprocess
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# Distributed compilation can only be tested if distcc and its daemon are installed
+if shutil.which("distcc") is None or shutil.which("distccd") is None:
+    print(
+        "\033[34;1m"
+        + os.path.basename(this_dir)
+        + "\033[0m \033[33mskipped (distcc is not installed)\033[0m"
+    )
+    exit(0)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("check_distribution.py")
+
+# Find an unused port for a daemon that only accepts compilations from this machine
+with socket.socket() as probe:
+    probe.bind(("127.0.0.1", 0))
+    port: int = probe.getsockname()[1]
+
+daemon_cmd = [
+    "distccd",
+    "--daemon",
+    "--no-detach",
+    "--allow",
+    "127.0.0.1",
+    "--listen",
+    "127.0.0.1",
+    "--port",
+    str(port),
+    "--jobs",
+    "2",
+    "--log-file",
+    os.path.join(test.log_dir, "distccd"),
+]
+
+# Newer daemons only run whitelisted compilers unless told otherwise
+daemon_help: str = subprocess.run(
+    ["distccd", "--help"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+).stdout
+if "--enable-tcp-insecure" in daemon_help:
+    daemon_cmd.append("--enable-tcp-insecure")
+
+daemon = subprocess.Popen(daemon_cmd)
+try:
+    # '127.0.0.1' is a remote host to distcc (unlike 'localhost'), so compilations are sent to the daemon
+    test.run(
+        "remote_build", "build.py", ["--distribute", "127.0.0.1:" + str(port) + "/2"]
+    )
+    test.run("check_remote", "check_distribution.py", ["remote"])
+finally:
+    daemon.terminate()
+    daemon.wait()
+
+test.run("clean", "clean.py")
+test.run("local_build", "build.py", ["--distribute", "localhost/2"])
+test.run("check_local", "check_distribution.py", ["local"])
@@ -0,0 +1,51 @@
+"""Record when Meson last configured the build folder of the active profiles ('record'), verify that it did not configure again ('unchanged') or that it did and compiled the added source ('changed'), or change the contents of the added source without changing the set of files ('edit')"""
+
+import json
+import os
+from importlib import import_module
+from sys import argv
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# Source added to the directory matched by the glob pattern of 'my_app'
+added_source: str = os.path.join(this_dir, "src", "extra.cpp")
+
+# File within the build folder of the active profiles containing the recorded modification time
+record_file_name: str = "recorded_configuration.json"
+
+
+if __name__ == "__main__":
+    profiles = import_module("profiles")
+    build_dir: str = os.path.join(
+        this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+    )
+    record_path: str = os.path.join(build_dir, record_file_name)
+
+    # Meson regenerates 'build.ninja' whenever it configures the build folder
+    configured: int = os.stat(os.path.join(build_dir, "build.ninja")).st_mtime_ns
+
+    if argv[1:] == ["record"]:
+        with open(record_path, "w") as record_file:
+            json.dump({"mtime_ns": configured}, record_file, indent=4)
+    elif argv[1:] == ["edit"]:
+        with open(added_source, "a") as source:
+            source.write("\n// Edited without adding or removing files\n")
+    elif argv[1:] in [["unchanged"], ["changed"]]:
+        with open(record_path, "r") as record_file:
+            recorded: int = json.load(record_file)["mtime_ns"]
+        if argv[1] == "unchanged" and configured != recorded:
+            raise RuntimeError(
+                "Meson configured again although the matched files did not change"
+            )
+        if argv[1] == "changed":
+            if configured == recorded:
+                raise RuntimeError(
+                    "Meson did not configure again although a matched file was added"
+                )
+            with open(os.path.join(build_dir, "compile_commands.json"), "r") as db:
+                compiled = [entry["file"] for entry in json.load(db)]
+            if not any(os.path.basename(path) == "extra.cpp" for path in compiled):
+                raise RuntimeError("The added source was not compiled")
+    else:
+        raise RuntimeError("Expected 'record', 'edit', 'unchanged', or 'changed'")
@@ -0,0 +1,8 @@
+namespace app {
+
+// Added after the first build so the glob pattern of 'my_app' matches a new file
+int extra_value() {
+    return 1;
+}
+
+} // namespace app
@@ -0,0 +1,23 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("binary_config.json")
+test.copy("check_reconfigure.py")
+test.run("first_build", "build.py")
+test.run("record_first", "check_reconfigure.py", ["record"])
+test.run("second_build", "build.py")
+test.run("check_second", "check_reconfigure.py", ["unchanged"])
+test.copy("extra.cpp", "src")
+test.run("added_build", "build.py")
+test.run("check_added", "check_reconfigure.py", ["changed"])
+test.run("record_added", "check_reconfigure.py", ["record"])
+test.run("edit", "check_reconfigure.py", ["edit"])
+test.run("edited_build", "build.py")
+test.run("check_edited", "check_reconfigure.py", ["unchanged"])
@@ -0,0 +1,65 @@
+"""Verify that the tests of the last build were linked into one executable and that each test only ran the GoogleTest suites declared by its own sources"""
+
+import json
+import os
+from importlib import import_module
+from typing import Dict, List
+
+this_dir: str = os.path.dirname(__file__)
+
+# GoogleTest suites declared by the sources of each test
+expected_suites: Dict[str, List[str]] = {
+    "version": ["version_test"],
+    "greeting": ["greeting_test", "farewell_test"],
+}
+
+
+if __name__ == "__main__":
+    profiles = import_module("profiles")
+    build_dir: str = os.path.join(
+        this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+    )
+
+    with open(os.path.join(build_dir, "meson-info", "intro-tests.json"), "r") as tests:
+        declared: Dict[str, dict] = {test["name"]: test for test in json.load(tests)}
+    executables = {declared[name]["cmd"][0] for name in expected_suites.keys()}
+    if len(executables) != 1 or not os.path.basename(executables.pop()).startswith(
+        "merged_tests_"
+    ):
+        raise RuntimeError("The tests were not linked into one executable")
+
+    # Tests with their own main function are built separately and the reason is reported
+    if os.path.basename(declared["standalone"]["cmd"][0]) != "standalone":
+        raise RuntimeError("A test with its own main function was merged")
+    with open(os.path.join(build_dir, "meson-logs", "meson-log.txt"), "r") as log:
+        if 'Test "standalone" is not merged' not in log.read():
+            raise RuntimeError("The test that was not merged was not reported")
+
+    with open(os.path.join(build_dir, "meson-logs", "testlog.json"), "r") as log:
+        results: Dict[str, dict] = {}
+        for line in log:
+            result: dict = json.loads(line)
+            results[result["name"]] = result
+
+    for name, suites in expected_suites.items():
+        filters: List[str] = [
+            arg for arg in declared[name]["cmd"] if arg.startswith("--gtest_filter=")
+        ]
+        if len(filters) != 1:
+            raise RuntimeError("Test '" + name + "' does not select its suites")
+        if results[name]["result"] != "OK":
+            raise RuntimeError("Test '" + name + "' did not pass")
+        for other_name, other_suites in expected_suites.items():
+            for suite in other_suites:
+                selected: bool = suite + ".*" in filters[0].split("=", 1)[1].split(":")
+                ran: bool = suite + "." in results[name]["stdout"]
+                if selected != (other_name == name) or ran != (other_name == name):
+                    raise RuntimeError(
+                        "Test '"
+                        + name
+                        + "' "
+                        + ("did not run" if other_name == name else "ran")
+                        + " the suite '"
+                        + suite
+                        + "'"
+                    )
@@ -0,0 +1,16 @@
+// External includes
+#include <gtest/gtest.h>
+
+// Standard includes
+#include <string>
+
+TEST (greeting_test, greets_the_world) {
+    ASSERT_EQ(std::string("Hello, ") + "world", "Hello, world");
+}
+
+// The suite of a declaration split across lines must still be found when tests are merged
+TEST(
+        farewell_test,
+        says_goodbye) {
+    ASSERT_EQ(std::string("Goodbye, ") + "world", "Goodbye, world");
+}
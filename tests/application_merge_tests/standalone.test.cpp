@@ -0,0 +1,4 @@
+// A test with its own main function cannot be merged with other tests
+int main() {
+    return 0;
+}
@@ -0,0 +1,16 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("binary_config.json")
+test.copy("greeting.test.cpp", "tests")
+test.copy("standalone.test.cpp", "tests")
+test.copy("check_merged.py")
+test.run("merged_build", "build.py", ["--merge-tests"])
+test.run("check_merged", "check_merged.py")
@@ -0,0 +1,11 @@
+export module app.greeting;
+
+import app.version;
+
+export namespace app {
+
+const char* greeting() {
+    return get_runtime_version();
+}
+
+} // namespace app
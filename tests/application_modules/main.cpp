@@ -0,0 +1,12 @@
+// Standard includes
+#include <iostream>
+
+import app.greeting;
+import app.version;
+
+int main(int argc, char** argv) {
+    std::cout << app::greeting() << " (compiled as " << app::compiletime_version
+              << ")\n";
+
+    return 0;
+}
@@ -0,0 +1,16 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("binary_config.json")
+test.copy("greeting.cppm", "src")
+test.copy("main.cpp", "src")
+test.run("first_build", "build.py")
+test.run("clean_objects", "clean.py", ["--objects"])
+test.run("second_build", "build.py")
@@ -0,0 +1,57 @@
+"""Record the modification times of the objects compiled for the active profiles ('record') or verify that none of them were recompiled since they were recorded ('verify')"""
+
+import json
+import os
+from importlib import import_module
+from sys import argv
+from typing import Dict
+
+
+this_dir: str = os.path.dirname(__file__)
+
+# File within the build folder of the active profiles containing the recorded modification times
+record_file_name: str = "recorded_objects.json"
+
+
+def active_build_dir() -> str:
+    """Returns the absolute path to the build folder of the active profiles"""
+
+    profiles = import_module("profiles")
+    return os.path.join(
+        this_dir, profiles.build_folder(profiles.get_profiles_abs_paths())
+    )
+
+
+def objects(build_dir: str) -> Dict[str, int]:
+    """Returns the modification times of the objects within a build folder"""
+
+    times: Dict[str, int] = {}
+    for dir_path, _, file_names in os.walk(build_dir):
+        for file_name in file_names:
+            if file_name.endswith((".o", ".obj")):
+                path: str = os.path.join(dir_path, file_name)
+                times[os.path.relpath(path, build_dir)] = os.stat(path).st_mtime_ns
+    return times
+
+
+if __name__ == "__main__":
+    build_dir: str = active_build_dir()
+    record_path: str = os.path.join(build_dir, record_file_name)
+    if argv[1:] == ["record"]:
+        recorded: Dict[str, int] = objects(build_dir)
+        if len(recorded) == 0:
+            raise RuntimeError("No objects were compiled for the active profiles")
+        with open(record_path, "w") as record_file:
+            json.dump(recorded, record_file, indent=4)
+    elif argv[1:] == ["verify"]:
+        with open(record_path, "r") as record_file:
+            recorded = json.load(record_file)
+        recompiled = [
+            path
+            for path, time in objects(build_dir).items()
+            if recorded.get(path) != time
+        ]
+        if len(recompiled) > 0:
+            raise RuntimeError("Objects were recompiled: " + ", ".join(recompiled))
+    else:
+        raise RuntimeError("Expected 'record' or 'verify'")
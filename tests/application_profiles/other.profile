@@ -0,0 +1,4 @@
+include(default.profile)
+
+[conf]
+tools.build:defines=["OTHER_PROFILE"]
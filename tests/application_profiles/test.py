@@ -0,0 +1,23 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("check_incremental.py")
+test.run("default_build", "build.py")
+test.copy("other.profile", "profiles")
+test.run("record_default", "check_incremental.py", ["record"])
+test.run("switch_to_other", "profiles.py", ["--host", "other.profile"])
+test.run("other_build", "build.py")
+test.run("record_other", "check_incremental.py", ["record"])
+test.run("switch_to_default", "profiles.py", ["--host", "default.profile"])
+test.run("second_default_build", "build.py")
+test.run("check_default", "check_incremental.py", ["verify"])
+test.run("switch_back_to_other", "profiles.py", ["--host", "other.profile"])
+test.run("second_other_build", "build.py")
+test.run("check_other", "check_incremental.py", ["verify"])
@@ -0,0 +1,10 @@
+"""Verify that the last build recorded the system packages of the active profiles as satisfied (so the next build does not invoke the system package manager)"""
+
+from importlib import import_module
+
+
+if __name__ == "__main__":
+    build = import_module("build")
+    profiles = import_module("profiles")
+    if not build.system_packages_satisfied(profiles.get_profiles_abs_paths()):
+        raise RuntimeError("The system packages were not recorded as satisfied")
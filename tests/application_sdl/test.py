@@ -9,8 +9,12 @@ test = Test(this_dir)
 test.copy("template_config.ini")
 test.run("config", "config.py")
 test.copy("main.cpp", "src")
+test.copy("check_system_packages.py")
 test.run("clear_cache", "clear_cache.py")
 test.run("first_build", "build.py")
+test.run("check_system_packages", "check_system_packages.py")
+test.run("build_check_system_packages", "build.py", ["--system-packages", "check"])
+test.run("build_report_system_packages", "build.py", ["--system-packages", "report"])
 test.run("clean", "clean.py")
 test.run("update_deps", "update_deps.py")
 test.run("second_build", "build.py")
@@ -0,0 +1,79 @@
+"""Add a package that this project does not depend on to the Conan cache ('create'), check that it is still cached ('present'), or verify that trimming the cache removed it while keeping every package in the lockfile of the last build ('verify')"""
+
+import json
+import os
+import subprocess
+from importlib import import_module
+from sys import argv
+from typing import Set
+
+
+this_dir: str = os.path.dirname(__file__)
+unused_recipe: str = os.path.join(this_dir, "unused_conanfile.py")
+unused_reference: str = "unused_package/1.0.0"
+
+
+def cached_recipes() -> Set[str]:
+    """Returns the recipe references (without revisions) of every binary package in the Conan cache"""
+
+    venv = import_module("this_venv")
+    package_list: dict = json.loads(
+        subprocess.run(
+            [venv.conan(), "list", "*:*", "--format=json"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    )
+    return {
+        reference
+        for reference, recipe in package_list["Local Cache"].items()
+        if any(
+            len(revision.get("packages", {})) > 0
+            for revision in recipe.get("revisions", {}).values()
+        )
+    }
+
+
+if __name__ == "__main__":
+    venv = import_module("this_venv")
+    profiles = import_module("profiles")
+    profiles_abs_paths = profiles.get_profiles_abs_paths()
+
+    if argv[1:] == ["create"]:
+        subprocess.run(
+            [
+                venv.conan(),
+                "create",
+                unused_recipe,
+                "--profile:build",
+                profiles_abs_paths.build,
+                "--profile:host",
+                profiles_abs_paths.host,
+            ],
+            check=True,
+        )
+    if argv[1:] in [["create"], ["present"]]:
+        if unused_reference not in cached_recipes():
+            raise RuntimeError("'" + unused_reference + "' is not in the cache")
+    elif argv[1:] == ["verify"]:
+        with open(
+            os.path.join(
+                this_dir, profiles.build_folder(profiles_abs_paths), "conan.lock"
+            ),
+            "r",
+        ) as lockfile:
+            locked: Set[str] = {
+                reference.split("#")[0].split("%")[0]
+                for reference in json.load(lockfile)["requires"]
+            }
+        recipes: Set[str] = cached_recipes()
+        missing: Set[str] = locked - recipes
+        if len(missing) > 0:
+            raise RuntimeError(
+                "Packages in the lockfile were removed: " + ", ".join(sorted(missing))
+            )
+        if unused_reference in recipes:
+            raise RuntimeError("'" + unused_reference + "' was not removed")
+    else:
+        raise RuntimeError("Expected 'create', 'present', or 'verify'")
@@ -0,0 +1,18 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("unused_conanfile.py")
+test.copy("check_trim.py")
+test.run("first_build", "build.py")
+test.run("create_unused", "check_trim.py", ["create"])
+test.run("trim_cache_dry_run", "clear_cache.py", ["--budget", "0", "--dry-run"])
+test.run("check_dry_run", "check_trim.py", ["present"])
+test.run("trim_cache", "clear_cache.py", ["--budget", "0"])
+test.run("check_trim", "check_trim.py", ["verify"])
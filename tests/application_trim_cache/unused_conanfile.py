@@ -0,0 +1,16 @@
+"""A package that no project depends on"""
+
+from conan import ConanFile
+
+
+class unused_package(ConanFile):
+
+    name = "unused_package"
+    version = "1.0.0"
+    package_type = "header-library"
+    no_copy_source = True
+
+    def package_id(self):
+        """Every configuration uses the same package"""
+
+        self.info.clear()
@@ -0,0 +1,119 @@
+from template_files import update_deps
+import json
+import os
+import tempfile
+
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+
+def touch(root: str, *components: str) -> None:
+    """Create an empty file (and its parent directories) within a directory"""
+
+    path: str = os.path.join(root, *components)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+# '**' matches any number of directories (including none) and other components match within a single directory
+assert update_deps._glob_match(["src", "main.cpp"], ["src", "**", "*.cpp"])
+assert update_deps._glob_match(["src", "a", "b", "x.cpp"], ["src", "**", "*.cpp"])
+assert update_deps._glob_match(["src", "a", "x.cpp"], ["**", "a", "*.cpp"])
+assert not update_deps._glob_match(["src", "a", "x.cpp"], ["src", "*.cpp"])
+assert not update_deps._glob_match(["src", "x.hpp"], ["src", "**", "*.cpp"])
+assert not update_deps._glob_match(["include", "x.cpp"], ["src", "**", "*.cpp"])
+assert update_deps._glob_match(["src", "x1.cpp"], ["src", "x?.cpp"])
+assert update_deps._glob_match(["src", "b.cpp"], ["src", "[ab].cpp"])
+assert not update_deps._glob_match(["src", "c.cpp"], ["src", "[ab].cpp"])
+
+with tempfile.TemporaryDirectory() as root:
+    touch(root, "src", "main.cpp")
+    touch(root, "src", "util", "strings.cpp")
+    touch(root, "src", "util", "strings.hpp")
+    touch(root, "src", ".hidden", "secret.cpp")
+    touch(root, "build", "generated.cpp")
+    touch(root, "build", "src", "generated.cpp")
+    touch(root, "tests", "main.test.cpp")
+    touch(root, "top.cpp")
+    index_path: str = os.path.join(root, "build", "file_index.json")
+
+    # The build directory and hidden directories are never matched
+    index = update_deps.FileIndex(root, index_path)
+    assert index.glob(["**", "*.cpp"]) == [
+        ["src", "main.cpp"],
+        ["src", "util", "strings.cpp"],
+        ["tests", "main.test.cpp"],
+        ["top.cpp"],
+    ], index.glob(["**", "*.cpp"])
+    assert index.glob(["src", "**", "*.cpp"]) == [
+        ["src", "main.cpp"],
+        ["src", "util", "strings.cpp"],
+    ]
+    assert index.glob(["src", "*", "*.hpp"]) == [["src", "util", "strings.hpp"]]
+    index.write()
+    with open(index_path, "r") as index_file:
+        indexed: dict = json.load(index_file)
+    assert indexed["root"] == root
+    assert "build" not in indexed["dirs"] and "src/.hidden" not in indexed["dirs"]
+
+    # Only directories whose modification time changed are listed again, so a file added without changing the modification time of its directory is not seen
+    util_dir: str = os.path.join(root, "src", "util")
+    util_stat = os.stat(util_dir)
+    touch(root, "src", "util", "numbers.cpp")
+    os.utime(util_dir, ns=(util_stat.st_atime_ns, util_stat.st_mtime_ns))
+    touch(root, "src", "added.cpp")
+    index = update_deps.FileIndex(root, index_path)
+    assert index.glob(["src", "**", "*.cpp"]) == [
+        ["src", "added.cpp"],
+        ["src", "main.cpp"],
+        ["src", "util", "strings.cpp"],
+    ]
+
+    # Once the directory changes, it is listed again
+    os.utime(util_dir, ns=(util_stat.st_atime_ns, util_stat.st_mtime_ns + 1000000))
+    index = update_deps.FileIndex(root, index_path)
+    assert index.glob(["src", "**", "*.cpp"]) == [
+        ["src", "added.cpp"],
+        ["src", "main.cpp"],
+        ["src", "util", "numbers.cpp"],
+        ["src", "util", "strings.cpp"],
+    ]
+
+    # An index written for another root is ignored
+    other_index = update_deps.FileIndex(os.path.join(root, "src"), index_path)
+    assert other_index.dirs == {}
+
+    # Files listed explicitly are not added again, matches of several patterns are merged, and the results are sorted
+    binaries = {
+        "my_lib": update_deps.Binary(
+            name="my_lib",
+            bin_type="library",
+            headers=[["src", "util", "strings.hpp"]],
+            sources=[["src", "main.cpp"]],
+            headers_glob=[["src", "**", "*.hpp"]],
+            sources_glob=[["src", "**", "*.cpp"], ["src", "util", "*.cpp"]],
+        ),
+        "my_test": update_deps.Binary(
+            name="my_test",
+            bin_type="test",
+            main=["tests", "main.test.cpp"],
+            sources_glob=[["tests", "*.cpp"]],
+        ),
+    }
+    resolved = update_deps.resolve_globs(binaries, root, index_path)
+    assert resolved["my_lib"].headers == [["src", "util", "strings.hpp"]]
+    assert resolved["my_lib"].sources == [
+        ["src", "main.cpp"],
+        ["src", "added.cpp"],
+        ["src", "util", "numbers.cpp"],
+        ["src", "util", "strings.cpp"],
+    ], resolved["my_lib"].sources
+    assert resolved["my_test"].sources == []
+    assert binaries["my_lib"].sources == [["src", "main.cpp"]]
+
+    # A symbolic link to a parent directory does not recurse endlessly
+    os.symlink(os.pardir, os.path.join(root, "src", "util", "parent"))
+    index = update_deps.FileIndex(root)
+    assert index.glob(["src", "**", "*.hpp"]) == [["src", "util", "strings.hpp"]]
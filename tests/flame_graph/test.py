@@ -0,0 +1,123 @@
+from template_files import flame_graph
+import os
+import tempfile
+from xml.etree import ElementTree
+
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+# Two samples of 'perf script' with the same stack and one with a different leaf
+perf_script: str = """my_app  4242 12345.678901:     250000 cycles:u:
+\t    55d0c0a01139 leaf+0x9 (/home/user/my_app/build/default/my_app)
+\t    55d0c0a01150 middle+0x10 (/home/user/my_app/build/default/my_app)
+\t    55d0c0a01170 main+0x20 (/home/user/my_app/build/default/my_app)
+\t    7f2a4c029d90 __libc_start_call_main+0x80 (/usr/lib/x86_64-linux-gnu/libc.so.6)
+
+my_app  4242 12345.679901:     250000 cycles:u:
+\t    55d0c0a0113d leaf+0xd (/home/user/my_app/build/default/my_app)
+\t    55d0c0a01150 middle+0x10 (/home/user/my_app/build/default/my_app)
+\t    55d0c0a01170 main+0x20 (/home/user/my_app/build/default/my_app)
+\t    7f2a4c029d90 __libc_start_call_main+0x80 (/usr/lib/x86_64-linux-gnu/libc.so.6)
+
+my_app  4242 12345.680901:     250000 cycles:u:
+\t    55d0c0a011a0 std::vector<int, std::allocator<int> >::push_back+0x4 (/home/user/my_app/build/default/my_app)
+\t    55d0c0a01170 main+0x20 (/home/user/my_app/build/default/my_app)
+\t    7f2a4c029d90 __libc_start_call_main+0x80 (/usr/lib/x86_64-linux-gnu/libc.so.6)
+
+my_app  4242 12345.681901:     250000 cycles:u:
+\t            7f2a4c0 [unknown] ([unknown])
+
+"""
+
+perf_stacks = flame_graph.fold_perf_script(perf_script)
+assert perf_stacks == {
+    "my_app;__libc_start_call_main;main;middle;leaf": 2,
+    "my_app;__libc_start_call_main;main;std::vector<int, std::allocator<int> >::push_back": 1,
+    "my_app;[unknown]": 1,
+}, perf_stacks
+
+# 'main' calls 'a' and 'b', which both call 'c' (names are compressed after their first use and jumps carry no cost)
+callgrind_out: str = """# callgrind format
+version: 1
+creator: callgrind-3.19.0
+positions: line
+events: Ir
+summary: 720
+
+fl=(1) /home/user/my_app/src/main.cpp
+fn=(1) main
+10 20
+cfn=(2) a
+calls=1 0
+11 300
+cfn=(3) b
+calls=1 0
+12 100
+
+fn=(2)
+20 100
+cfn=(4) c
+calls=4 0
+21 200
+
+fn=(3)
+30 50
+cfn=(4)
+calls=1 0
+31 50
+
+fn=(4)
+40 250
+jump=2 42
+41
+"""
+
+callgrind_stacks = flame_graph.fold_callgrind(callgrind_out)
+assert callgrind_stacks == {
+    "main": 20,
+    "main;a": 100,
+    "main;a;c": 200,
+    "main;b": 50,
+    "main;b;c": 50,
+}, callgrind_stacks
+
+# Recursive calls are attributed to the caller
+recursive_out: str = """positions: line
+events: Ir
+fn=(1) main
+1 10
+cfn=(2) recurse
+calls=1 0
+2 90
+fn=(2)
+3 40
+cfn=(2)
+calls=5 0
+4 50
+"""
+
+recursive_stacks = flame_graph.fold_callgrind(recursive_out)
+assert recursive_stacks == {"main": 10, "main;recurse": 90}, recursive_stacks
+
+# Folded stacks are written sorted, one stack and its count per line
+with tempfile.TemporaryDirectory() as temp_dir:
+    folded_path: str = os.path.join(temp_dir, "stacks.folded")
+    flame_graph.write_folded(callgrind_stacks, folded_path)
+    with open(folded_path, "r") as folded:
+        assert folded.read() == (
+            "main 20\nmain;a 100\nmain;a;c 200\nmain;b 50\nmain;b;c 50\n"
+        )
+
+# The flame graph is valid SVG with one frame per node of the merged stacks
+svg: str = flame_graph.flame_graph_svg(perf_stacks, "my_app <perf>")
+root = ElementTree.fromstring(svg)
+namespace: str = "{http://www.w3.org/2000/svg}"
+titles = [title.text for title in root.iter(namespace + "title")]
+assert titles[0] == "all (4 samples, 100.00%)", titles
+assert "main (3 samples, 75.00%)" in titles, titles
+assert "leaf (2 samples, 50.00%)" in titles, titles
+assert len(titles) == 8, titles
+texts = [text.text for text in root.iter(namespace + "text")]
+assert "my_app <perf>" in texts, texts
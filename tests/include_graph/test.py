@@ -0,0 +1,90 @@
+from template_files import include_graph
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+# Output arguments are removed and the source file is only preprocessed
+command = include_graph.preprocess_command(
+    {
+        "directory": "/project/build",
+        "command": "c++ -Iinclude -MD -MQ main.o -MF main.o.d -o main.o -c ../src/main.cpp",
+        "file": "../src/main.cpp",
+    }
+)
+assert command == ["c++", "-Iinclude", "../src/main.cpp", "-E"], command
+
+try:
+    include_graph.preprocess_command(
+        {"directory": "/project/build", "arguments": ["cl.exe", "/c", "main.cpp"]}
+    )
+    raise AssertionError("MSVC commands are not rejected")
+except RuntimeError:
+    pass
+
+# 'main.cpp' includes 'a.hpp', which includes 'b.hpp' (code from the command line is attributed to the source file)
+main_output: str = """# 0 "../src/main.cpp"
+# 0 "<built-in>"
+# 0 "<command-line>"
+# 1 "/usr/include/stdc-predef.h" 1 3 4
+# 0 "<command-line>" 2
+# 1 "../src/main.cpp"
+# 1 "../include/a.hpp" 1
+int a();
+# 1 "../include/b.hpp" 1
+int b();
+# 2 "../include/a.hpp" 2
+# 2 "../src/main.cpp" 2
+int main() { return a(); }
+"""
+
+main_cpp: str = "/project/src/main.cpp"
+a_hpp: str = "/project/include/a.hpp"
+b_hpp: str = "/project/include/b.hpp"
+predef_h: str = "/usr/include/stdc-predef.h"
+
+main_unit = include_graph.parse_preprocessed(main_cpp, "/project/build", main_output)
+assert main_unit.total_size == 45, main_unit.total_size
+assert main_unit.own_size == {main_cpp: 27, a_hpp: 9, b_hpp: 9}, main_unit.own_size
+assert main_unit.inclusive_size == {
+    predef_h: 0,
+    a_hpp: 18,
+    b_hpp: 9,
+}, main_unit.inclusive_size
+assert main_unit.edges == {
+    (main_cpp, predef_h): 0,
+    (main_cpp, a_hpp): 18,
+    (a_hpp, b_hpp): 9,
+}, main_unit.edges
+
+# Files left open by truncated output are closed at the end
+second_cpp: str = "/project/src/second.cpp"
+second_output: str = """# 1 "../src/second.cpp"
+# 1 "../include/b.hpp" 1
+int b();
+"""
+
+second_unit = include_graph.parse_preprocessed(
+    second_cpp, "/project/build", second_output
+)
+assert second_unit.inclusive_size == {b_hpp: 9}, second_unit.inclusive_size
+assert second_unit.edges == {(second_cpp, b_hpp): 9}, second_unit.edges
+
+# Header statistics are summed over the translation units that expand each header
+headers, edges = include_graph.analyze([main_unit, second_unit], {a_hpp})
+assert sorted(headers.keys()) == sorted([predef_h, a_hpp, b_hpp]), headers
+assert headers[a_hpp] == include_graph.HeaderStats(
+    path=a_hpp, fan_in=1, own_size=9, total_size=18, public=True
+), headers[a_hpp]
+assert headers[b_hpp] == include_graph.HeaderStats(
+    path=b_hpp, fan_in=2, own_size=9, total_size=18, public=False
+), headers[b_hpp]
+assert headers[b_hpp].average_size() == 9, headers[b_hpp].average_size()
+assert edges == {
+    (main_cpp, predef_h): 0,
+    (main_cpp, a_hpp): 18,
+    (a_hpp, b_hpp): 9,
+    (second_cpp, b_hpp): 9,
+}, edges
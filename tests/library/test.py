@@ -10,6 +10,8 @@ test.copy("template_config.ini")
 test.run("config", "config.py")
 test.run("clear_cache", "clear_cache.py")
 test.run("build", "build.py")
+test.run("install_from_build", "install.py", ["--from-build", "--test"])
+test.run("matrix_build", "build.py", ["--matrix", "default"])
 test.run("clean", "clean.py")
 test.run("update_deps", "update_deps.py")
 test.run("install", "install.py")
@@ -0,0 +1,65 @@
+"""Verify that the last optimized build used the generated profile and hid the symbols of this project that are not marked for export ('static' or 'shared' selects the kind of library that was built)"""
+
+from importlib import import_module
+import glob
+import os
+import shutil
+import subprocess
+from sys import argv
+
+
+if __name__ == "__main__":
+    build = import_module("build")
+    profiles = import_module("profiles")
+
+    library_type: str = argv[1]
+
+    # The optimized profile extends the active host profile
+    optimized_path: str = profiles.abs_path_to_profile(build.optimized_profile)
+    with open(optimized_path, "r") as optimized_profile:
+        content: str = optimized_profile.read()
+    if "include(" + profiles.get_profiles().host not in content:
+        raise RuntimeError("The optimized profile does not include the host profile")
+    if "&:user.build:optimized=True" not in content:
+        raise RuntimeError("The optimized profile does not select optimized builds")
+
+    build_dir: str = os.path.join(
+        os.path.dirname(__file__),
+        profiles.build_folder(
+            profiles.Profiles(
+                host=optimized_path, build=profiles.get_profiles_abs_paths().build
+            )
+        ),
+    )
+    with open(
+        os.path.join(build_dir, "generators", "conan_meson_native.ini"), "r"
+    ) as native_file:
+        if "_library_visibility = 'hidden'" not in native_file.read():
+            raise RuntimeError("Library symbols are not hidden in the optimized build")
+
+    if library_type == "static":
+        if not os.path.isfile(os.path.join(build_dir, "libmy_lib.a")):
+            raise RuntimeError("The optimized build did not produce a static library")
+    else:
+        libraries = [
+            path
+            for path in glob.glob(os.path.join(build_dir, "libmy_lib.so*"))
+            if os.path.isfile(path)
+        ]
+        if len(libraries) == 0:
+            raise RuntimeError("The optimized build did not produce a shared library")
+        if shutil.which("nm") is not None:
+            symbols: str = subprocess.run(
+                ["nm", "-D", "-C", "--defined-only", libraries[0]],
+                stdout=subprocess.PIPE,
+                text=True,
+                check=True,
+            ).stdout
+            if "myl::get_runtime_version()" not in symbols:
+                raise RuntimeError(
+                    "A symbol marked with MYL_EXPORT is not exported:\n" + symbols
+                )
+            if "myl::internal_helper()" in symbols:
+                raise RuntimeError(
+                    "A symbol that is not marked for export is exported:\n" + symbols
+                )
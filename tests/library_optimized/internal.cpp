@@ -0,0 +1,8 @@
+namespace myl {
+
+// Not marked for export, so optimized shared builds must hide it
+int internal_helper() {
+    return 42;
+}
+
+} // namespace myl
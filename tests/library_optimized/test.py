@@ -0,0 +1,22 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("template_config.ini")
+test.run("config", "config.py")
+test.copy("binary_config.json")
+test.copy("internal.cpp", "src")
+test.copy("check_optimized.py")
+test.run("build", "build.py")
+test.run("optimized_build", "build.py", ["--optimized"])
+test.run("check_optimized_static", "check_optimized.py", ["static"])
+test.run(
+    "optimized_shared_build",
+    "build.py",
+    ["--optimized", "--options:host", "&:shared=True"],
+)
+test.run("check_optimized_shared", "check_optimized.py", ["shared"])
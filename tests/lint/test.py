@@ -0,0 +1,150 @@
+from template_files import lint
+import json
+import os
+import subprocess
+import tempfile
+
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+
+def write(root: str, relative_path: str, content: str, mtime: int) -> str:
+    """Write a file within a directory with the given modification time (in seconds) and return its absolute path"""
+
+    path: str = os.path.join(root, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def git(root: str, *args: str) -> None:
+    """Execute Git within a directory"""
+
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        + list(args),
+        cwd=root,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+versions = {"tidy": "clang-tidy 1", "format": "clang-format 1", "muon": "muon 1"}
+
+with tempfile.TemporaryDirectory() as root:
+    root = os.path.realpath(root)
+    lint.this_dir = root
+    git(root, "init", "--initial-branch", "main")
+
+    main_cpp: str = write(root, "src/main.cpp", '#include "a.hpp"\n', 1000)
+    a_hpp: str = write(root, "include/a.hpp", "int a();\n", 1000)
+    b_hpp: str = write(root, "include/b.hpp", "int b();\n", 1000)
+    meson_build: str = write(root, "meson.build", "project('my_app')\n", 1000)
+    write(root, ".gitignore", "build/\n", 1000)
+    git(root, "add", "--all")
+    git(root, "commit", "--message", "Initial commit")
+
+    # The object of the source was built after the source and its headers last changed
+    build_dir: str = os.path.join(root, "build", "default")
+    write(
+        build_dir,
+        "compile_commands.json",
+        json.dumps(
+            [
+                {
+                    "directory": build_dir,
+                    "file": "../../src/main.cpp",
+                    "output": "main.o",
+                    "arguments": ["c++", "-c", "../../src/main.cpp", "-o", "main.o"],
+                }
+            ]
+        ),
+        1000,
+    )
+    main_o: str = write(build_dir, "main.o", "", 2000)
+    deps = {main_o: [main_cpp, a_hpp]}
+    lint.ninja_deps = lambda build_dir: deps
+
+    def tidy_key(only=None) -> str:
+        """Returns the cache key of the clang-tidy check of the source (or None if it is not checked)"""
+
+        keys = [
+            check.key
+            for check in lint.plan(build_dir, ["tidy"], versions, only, False)
+            if check.tool == "tidy"
+        ]
+        assert len(keys) <= 1, keys
+        return keys[0] if len(keys) == 1 else None
+
+    checks = lint.plan(build_dir, ["tidy", "format", "muon"], versions, None, False)
+    assert sorted((check.tool, check.path) for check in checks) == [
+        ("format", a_hpp),
+        ("format", b_hpp),
+        ("format", main_cpp),
+        ("muon", meson_build),
+        ("tidy", main_cpp),
+    ], checks
+    assert all(check.key for check in checks), checks
+    first_key: str = tidy_key()
+
+    # Cached results are reused without running the tool
+    cache = {first_key: {"ok": False, "output": "main.cpp: warning: cached"}}
+    tidy_check = [check for check in checks if check.tool == "tidy"][0]
+    result = lint.run_check(tidy_check, cache)
+    assert result.cached and not result.ok, result
+    assert result.output == "main.cpp: warning: cached", result
+
+    # Fixing files in place is never cached
+    assert all(
+        not check.key
+        for check in lint.plan(build_dir, ["format", "muon"], versions, None, True)
+    )
+
+    # A header edited since the last build is not cached until the source is built again, which changes the key
+    write(root, "include/a.hpp", "int a(int);\n", 3000)
+    assert tidy_key() == ""
+    os.utime(main_o, (4000, 4000))
+    second_key: str = tidy_key()
+    assert second_key not in ["", first_key], second_key
+
+    # A source that includes another header since the last build is not cached, since the headers it depends on are not known yet
+    write(root, "src/main.cpp", '#include "a.hpp"\n#include "b.hpp"\n', 5000)
+    assert tidy_key() == ""
+    deps[main_o] = [main_cpp, a_hpp, b_hpp]
+    os.utime(main_o, (6000, 6000))
+    third_key: str = tidy_key()
+    assert third_key not in ["", first_key, second_key], third_key
+    write(root, "include/b.hpp", "int b(int);\n", 5000)
+    assert tidy_key() not in ["", third_key]
+
+    # Without an object file, the headers of the source are unknown
+    os.remove(main_o)
+    assert tidy_key() == ""
+    main_o = write(build_dir, "main.o", "", 7000)
+
+    # Only the given files and sources that include them are checked
+    only_b = lint.plan(build_dir, ["tidy", "format", "muon"], versions, {b_hpp}, False)
+    assert sorted((check.tool, check.path) for check in only_b) == [
+        ("format", b_hpp),
+        ("tidy", main_cpp),
+    ], only_b
+    assert tidy_key({meson_build}) is None
+
+    # Changed files include commits since the fork point and uncommitted and untracked files, but not deleted files
+    git(root, "add", "--all")
+    git(root, "commit", "--message", "Include b.hpp")
+    git(root, "checkout", "-b", "feature")
+    write(root, "include/a.hpp", "int a(long);\n", 8000)
+    git(root, "commit", "--all", "--message", "Change a.hpp")
+    write(root, "include/b.hpp", "int b(long);\n", 8000)
+    new_hpp: str = write(root, "include/new.hpp", "int n();\n", 8000)
+    os.remove(meson_build)
+    assert lint.changed_files("HEAD") == {b_hpp, new_hpp}, lint.changed_files("HEAD")
+    assert lint.changed_files("main") == {a_hpp, b_hpp, new_hpp}, lint.changed_files(
+        "main"
+    )
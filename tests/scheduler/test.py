@@ -0,0 +1,93 @@
+from template_files import scheduler
+import json
+import os
+import sys
+import tempfile
+
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+# Scripts of this project import each other by name
+sys.path.insert(0, os.path.dirname(scheduler.__file__))
+
+MiB: int = 1024**2
+GiB: int = 1024**3
+
+# Pretend to have 8 processors and 16 GiB of available memory
+cpu_count = os.cpu_count
+os.cpu_count = lambda: 8
+scheduler.available_memory = lambda: 16 * GiB
+
+try:
+    with tempfile.TemporaryDirectory() as build_dir:
+        memory_path: str = os.path.join(build_dir, "telemetry", "memory.json")
+
+        # The defaults are assumed until jobs have been measured
+        assert scheduler.estimates(build_dir) == (1 * GiB, 2 * GiB)
+        job_budget = scheduler.budget(build_dir)
+        assert job_budget == scheduler.Budget(
+            8, 6, 16 * GiB, 1 * GiB, 2 * GiB
+        ), job_budget
+
+        # Concurrent builds split processors and memory
+        job_budget = scheduler.budget(build_dir, 2)
+        assert job_budget == scheduler.Budget(
+            4, 3, 8 * GiB, 1 * GiB, 2 * GiB
+        ), job_budget
+
+        # The 95th percentile of the peaks of the last 20 builds is the estimate
+        os.makedirs(os.path.dirname(memory_path))
+        with open(memory_path, "w") as memory:
+            json.dump(
+                {
+                    "compile_rss_bytes": [size * 100 * MiB for size in range(1, 21)],
+                    "link_rss_bytes": [4 * GiB],
+                },
+                memory,
+            )
+        assert scheduler.estimates(build_dir) == (1900 * MiB, 4 * GiB)
+        job_budget = scheduler.budget(build_dir)
+        assert job_budget == scheduler.Budget(
+            6, 3, 16 * GiB, 1900 * MiB, 4 * GiB
+        ), job_budget
+
+        # A single outlier does not change the estimate, but the oldest peak is dropped
+        scheduler.learn(build_dir, 8 * GiB, None)
+        with open(memory_path, "r") as memory:
+            learned: dict = json.load(memory)
+        assert len(learned["compile_rss_bytes"]) == 20, learned
+        assert learned["compile_rss_bytes"][0] == 200 * MiB, learned
+        assert learned["compile_rss_bytes"][-1] == 8 * GiB, learned
+        assert learned["link_rss_bytes"] == [4 * GiB], learned
+        assert scheduler.estimates(build_dir) == (2000 * MiB, 4 * GiB)
+
+        # Repeated peaks raise the estimate
+        scheduler.learn(build_dir, 8 * GiB, 3 * GiB)
+        assert scheduler.estimates(build_dir) == (8 * GiB, 4 * GiB)
+
+        # At least one job of each kind always runs
+        scheduler.available_memory = lambda: 1 * GiB
+        job_budget = scheduler.budget(build_dir)
+        assert job_budget == scheduler.Budget(
+            1, 1, 1 * GiB, 8 * GiB, 4 * GiB
+        ), job_budget
+
+        # Without a measure of available memory, only processors limit jobs
+        scheduler.available_memory = lambda: None
+        job_budget = scheduler.budget(build_dir)
+        assert job_budget == scheduler.Budget(8, 8, None, 8 * GiB, 4 * GiB), job_budget
+        assert scheduler.conan_args(job_budget) == [
+            "--conf:all",
+            "tools.build:jobs=8",
+            "--conf:host",
+            "&:user.build:max_links=8",
+        ]
+
+        # A corrupt file is ignored
+        with open(memory_path, "w") as memory:
+            memory.write("{")
+        assert scheduler.estimates(build_dir) == (1 * GiB, 2 * GiB)
+finally:
+    os.cpu_count = cpu_count
@@ -0,0 +1,196 @@
+from template_files import size_report
+import contextlib
+import copy
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+# Output of 'size -A -d' for the application
+size_output: str = """my_app  :
+section        size    addr
+.text          1000    4096
+.data             8    8192
+.bss              4   12288
+.debug_info     500       0
+Total          1512
+"""
+
+# Output of 'nm --print-size --defined-only' for the application (the helper of this project was copied by an optimization and the vector instantiation is defined by both this project and the dependency)
+binary_symbols: str = """0000000000001000 0000000000000040 T main
+0000000000001040 0000000000000100 T helper.constprop.0
+0000000000001140 0000000000000200 T dep_function
+0000000000001340 0000000000000080 W _ZNSt6vectorIiSaIiEE9push_backERKi
+0000000000001400 0000000000000010 T _start
+0000000000002000 0000000000000008 D dep_data
+0000000000003000 0000000000000004 B counter
+"""
+
+# Output of 'nm --defined-only' for the object of this project and the library of the dependency component
+object_symbols: str = """0000000000000000 T main
+0000000000000000 t helper
+0000000000000000 W _ZNSt6vectorIiSaIiEE9push_backERKi
+0000000000000000 B counter
+"""
+library_symbols: str = """
+comp.o:
+0000000000000000 T dep_function
+0000000000000000 D dep_data
+0000000000000000 W _ZNSt6vectorIiSaIiEE9push_backERKi
+"""
+
+
+def fake_run(command):
+    """Returns the canned output of 'size' or 'nm' for a file"""
+
+    if command[0] == "size":
+        return size_output
+    if "--print-size" in command:
+        return binary_symbols
+    if command[-1].endswith("main.cpp.o"):
+        return object_symbols
+    if command[-1].endswith("libcomp.a"):
+        return library_symbols
+    raise AssertionError("Unexpected command: " + str(command))
+
+
+size_report._require_tool = lambda name: name
+size_report._run = fake_run
+size_report.component_names = lambda build_dir, binary_name: {"comp": "dep"}
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    build_dir: str = os.path.join(temp_dir, "build")
+    binary_path: str = os.path.join(build_dir, "my_app")
+    os.makedirs(os.path.join(binary_path + ".p"))
+    open(os.path.join(binary_path + ".p", "main.cpp.o"), "w").close()
+    with open(binary_path, "wb") as binary:
+        binary.write(bytes(4096))
+
+    # The libraries of a component are found through its pkg-config file
+    lib_dir: str = os.path.join(temp_dir, "dep", "lib")
+    os.makedirs(lib_dir)
+    open(os.path.join(lib_dir, "libcomp.a"), "w").close()
+    os.makedirs(os.path.join(build_dir, "generators"))
+    with open(os.path.join(build_dir, "generators", "comp.pc"), "w") as pc_file:
+        pc_file.write(
+            "prefix="
+            + os.path.join(temp_dir, "dep")
+            + '\nlibdir=${prefix}/lib\n\nName: comp\nLibs: -L"${libdir}" -lcomp\n'
+        )
+    assert size_report.pc_libraries(
+        os.path.join(build_dir, "generators", "comp.pc")
+    ) == [os.path.join(lib_dir, "libcomp.a")]
+
+    # Symbols belong to this project first, then to components, preferring strong definitions
+    measured: dict = size_report.measure(
+        build_dir, "my_app", "application", binary_path
+    )
+    assert measured["file_size"] == 4096, measured
+    assert measured["sections"] == {
+        ".text": 1000,
+        ".data": 8,
+        ".bss": 4,
+        ".debug_info": 500,
+    }, measured["sections"]
+    assert measured["components"] == {
+        "(this project)": {
+            "dependency": None,
+            "size": 0x40 + 0x100 + 0x80 + 4,
+            "symbols": 4,
+        },
+        "comp": {"dependency": "dep", "size": 0x200 + 8, "symbols": 2},
+        "(runtime and system libraries)": {
+            "dependency": None,
+            "size": 0x10,
+            "symbols": 1,
+        },
+    }, measured["components"]
+    assert list(measured["symbols"].values()) == sorted(
+        measured["symbols"].values(), reverse=True
+    ), measured["symbols"]
+
+    base: dict = {
+        "schema_version": size_report.schema_version,
+        "build_folder": "build",
+        "binaries": {"my_app": measured, "old_app": copy.deepcopy(measured)},
+    }
+
+    # The new build grows a symbol of the dependency, adds and removes symbols, and replaces a binary
+    new: dict = copy.deepcopy(base)
+    new_app: dict = new["binaries"]["my_app"]
+    new_app["file_size"] += 3 * 1024
+    new_app["sections"][".text"] += 3 * 1024
+    new_app["sections"][".debug_info"] += 100 * 1024
+    new_app["components"]["comp"]["size"] += 3 * 1024
+    new_app["symbols"]["dep_function"] += 3 * 1024 + 4
+    new_app["symbols"]["new_function"] = 4
+    del new_app["symbols"]["counter"]
+    new_app["components"]["(this project)"]["size"] -= 4
+    del new["binaries"]["old_app"]
+    new["binaries"]["new_app"] = copy.deepcopy(measured)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        growth = size_report.print_diff(base, new, 20)
+    assert growth == {"my_app": 3 * 1024, "new_app": 4096}, growth
+    diff: str = output.getvalue()
+    assert "old_app\033[0m: removed" in diff, diff
+    assert "new_app\033[0m: added (4.0 KiB)" in diff, diff
+    assert "my_app\033[0m: 4.0 KiB -> 7.0 KiB" in diff, diff
+    # Debug information is not loaded into memory, so it is not reported
+    assert ".debug_info" not in diff, diff
+    lines = [line.strip() for line in diff.splitlines()]
+    assert "\033[31;1m+3.0 KiB\033[0m  .text" in lines, lines
+    assert "\033[31;1m+3.0 KiB\033[0m  comp" in lines, lines
+    assert "\033[32;1m-0.0 KiB\033[0m  (this project)" in lines, lines
+    assert "\033[31;1m+3.0 KiB\033[0m  dep_function" in lines, lines
+    assert "\033[31;1m+0.0 KiB\033[0m  new_function (new)" in lines, lines
+    assert "\033[32;1m-0.0 KiB\033[0m  counter (removed)" in lines, lines
+
+    # Saved reports of other versions are rejected
+    base_path: str = os.path.join(temp_dir, "base.json")
+    new_path: str = os.path.join(temp_dir, "new.json")
+    with open(base_path, "w") as base_json:
+        json.dump(base, base_json)
+    with open(new_path, "w") as new_json:
+        json.dump(new, new_json)
+    assert size_report.load(new_path) == new
+    with open(os.path.join(temp_dir, "old.json"), "w") as old_json:
+        json.dump(dict(base, schema_version=0), old_json)
+    try:
+        size_report.load(os.path.join(temp_dir, "old.json"))
+        raise AssertionError("A report of another version was loaded")
+    except RuntimeError:
+        pass
+
+    # Binaries that grow by more than the limit fail the comparison (added binaries grow by their size)
+    script: str = os.path.join(os.path.dirname(size_report.__file__), "size_report.py")
+    for max_growth, exceeded in [
+        ("4", ""),
+        ("3.5", ": new_app"),
+        ("2.5", ": my_app, new_app"),
+    ]:
+        result = subprocess.run(
+            [
+                sys.executable,
+                script,
+                "--build-folder",
+                build_dir,
+                "--diff",
+                base_path,
+                new_path,
+                "--max-growth",
+                max_growth,
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        assert result.returncode == (1 if exceeded else 0), (max_growth, result.stdout)
+        assert ("Grew by more than" in result.stdout) == bool(exceeded), result.stdout
+        assert exceeded + "\033[0m" in result.stdout, result.stdout
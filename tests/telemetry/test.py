@@ -0,0 +1,155 @@
+from template_files import scheduler, telemetry
+import json
+import os
+import sys
+import tempfile
+
+
+this_dir: str = os.path.dirname(__file__)
+
+print("\033[34;1m" + os.path.basename(this_dir) + "\033[0m")
+
+# Output of 'conan build' for an application with one dependency and two tool requirements, all found in the Conan cache
+conan_output: str = """
+======== Input profiles ========
+Profile host:
+[settings]
+arch=x86_64
+
+======== Computing dependency graph ========
+Graph root
+    conanfile.py (my_app/0.0.0): /home/user/my_app/conanfile.py
+Requirements
+    gtest/1.14.0#bf0217d18e340942a98999710ee74a65 - Cache
+
+======== Computing necessary packages ========
+Requirements
+    gtest/1.14.0#bf0217d18e340942a98999710ee74a65:3fe8f3c94fa600d95fcf43590ff66783e06f1c7c#797e0f61846afa1635dd2a6c37045327 - Cache
+Build requirements
+    meson/1.6.0#d4de0a2ac74dfd6524b7a9fd12ddce31:da39a3ee5e6b4b0d3255bfef95601890afd80709#0ba8627bd47edc3a501e8f0eb9a79e5e - Cache
+    pkgconf/2.2.0#5f9455d3700baa21b45e279e93063676:da39a3ee5e6b4b0d3255bfef95601890afd80709#0ba8627bd47edc3a501e8f0eb9a79e5e - Download
+
+======== Installing packages ========
+gtest/1.14.0: Already installed! (1 of 3)
+
+======== Finalizing install (deploy, generators) ========
+conanfile.py (my_app/0.0.0): Calling generate() method in recipe
+
+======== Calling build() ========
+conanfile.py (my_app/0.0.0): RUN: meson setup --native-file conan_meson_native.ini build/default .
+conanfile.py (my_app/0.0.0): RUN: meson compile -C build/default -j1
+[1/2] Compiling C++ object my_app.p/main.cpp.o
+[2/2] Linking target my_app
+conanfile.py (my_app/0.0.0): RUN: meson test -v -C build/default
+1/1 version OK              0.01s
+"""
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    build_dir: str = os.path.join(temp_dir, "default")
+    os.mkdir(build_dir)
+    output_path: str = os.path.join(temp_dir, "conan_output")
+    with open(output_path, "w") as output:
+        output.write(conan_output)
+
+    # Conan writes its output to standard error, which is forwarded to the log
+    recorder = telemetry.Recorder("build", build_dir)
+    with open(os.path.join(temp_dir, "log"), "w") as log:
+        returncode: int = recorder.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; sys.stderr.write(open(sys.argv[1]).read())",
+                output_path,
+            ],
+            log,
+        )
+    assert returncode == 0, returncode
+    with open(os.path.join(temp_dir, "log"), "r") as log:
+        assert log.read() == conan_output
+
+    # Phases are recorded in the order they began and packages are only counted once
+    assert list(recorder.phases.keys()) == [
+        "startup",
+        "graph",
+        "dependencies",
+        "generate",
+        "configure",
+        "compile",
+        "test",
+    ], recorder.phases
+    assert recorder.packages == {"cache": 2, "download": 1}, recorder.packages
+    assert recorder.dependency_cache_hit_ratio() == 2 / 3
+
+    recorder.job_budget = scheduler.Budget(
+        jobs=4,
+        links=2,
+        available_memory=8 * 1024**3,
+        compile_memory=1024**3,
+        link_memory=2 * 1024**3,
+    )
+    recorder.write()
+
+    with open(os.path.join(build_dir, "telemetry", "build.json"), "r") as json_file:
+        recorded: dict = json.load(json_file)
+    assert list(recorded.keys()) == [
+        "schema_version",
+        "script",
+        "build_folder",
+        "started",
+        "success",
+        "duration_seconds",
+        "phases_seconds",
+        "packages",
+        "dependency_cache_hit_ratio",
+        "compiler_cache",
+        "peak_rss_bytes",
+        "peak_compile_rss_bytes",
+        "peak_link_rss_bytes",
+        "schedule",
+    ], recorded.keys()
+    assert recorded["schema_version"] == 1, recorded
+    assert recorded["script"] == "build", recorded
+    assert recorded["build_folder"] == "default", recorded
+    assert recorded["success"] is True, recorded
+    assert list(recorded["phases_seconds"].keys()) == list(recorder.phases.keys())
+    assert recorded["packages"] == {"cache": 2, "download": 1}, recorded
+    assert recorded["schedule"] == {
+        "compile_jobs": 4,
+        "link_jobs": 2,
+        "available_memory_bytes": 8 * 1024**3,
+        "compile_memory_estimate_bytes": 1024**3,
+        "link_memory_estimate_bytes": 2 * 1024**3,
+    }, recorded["schedule"]
+
+    with open(os.path.join(build_dir, "telemetry", "build.prom"), "r") as prom_file:
+        metrics: str = prom_file.read()
+    lines = metrics.splitlines()
+    assert metrics.endswith("\n# EOF\n"), metrics
+    labels: str = '{script="build",build_folder="default"'
+    for expected in [
+        "# TYPE cpp_template_build_duration_seconds gauge",
+        "# UNIT cpp_template_build_duration_seconds seconds",
+        "cpp_template_build_success" + labels + "} 1.0",
+        "cpp_template_build_packages" + labels + ',status="cache"} 2.0',
+        "cpp_template_build_packages" + labels + ',status="download"} 1.0',
+        "cpp_template_build_scheduled_compile_jobs" + labels + "} 4.0",
+        "cpp_template_build_scheduled_link_jobs" + labels + "} 2.0",
+        "cpp_template_build_compile_memory_estimate_bytes"
+        + labels
+        + "} "
+        + repr(float(1024**3)),
+    ]:
+        assert expected in lines, (expected, metrics)
+    for phase in recorder.phases:
+        assert any(
+            line.startswith(
+                "cpp_template_build_phase_seconds" + labels + ',phase="' + phase + '"} '
+            )
+            for line in lines
+        ), (phase, metrics)
+    # Every metric family is declared once before its samples
+    families = [line.split()[2] for line in lines if line.startswith("# TYPE ")]
+    assert len(families) == len(set(families)), families
+    for line in lines:
+        if not line.startswith("#"):
+            assert line.split("{")[0] in families, line
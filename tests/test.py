@@ -1,16 +1,57 @@
 """Test this template project"""
 
+import hashlib
+import importlib.util
+import json
 import os
 import shutil
 import stat
 import subprocess
+import sys
 from sys import argv
-from typing import List
+from typing import Dict, List
 
 
 this_dir: str = os.path.dirname(__file__)
 root_dir: str = os.path.abspath(os.path.join(this_dir, os.path.pardir))
 
+# Fingerprints of the tests that succeeded most recently (tests are skipped while their fingerprint is unchanged)
+results_path: str = os.path.join(this_dir, "results.json")
+
+# Files and directories (relative to the root of this template) that every test depends on
+shared_inputs: List[str] = [
+    "template_files",
+    "config.py",
+    "configure_templates.py",
+    os.path.join("tests", "test.py"),
+]
+
+# Files within the shared inputs that only affect the listed tests. Only these tests select profiles, so changes to 'profiles.py' do not rerun the tests that take the longest to build (e.g. 'library_glfw' and 'application_sdl')
+scoped_inputs: Dict[str, List[str]] = {
+    os.path.join("template_files", "profiles.py"): [
+        "application_profiles",
+        "library",
+        "library_optimized",
+    ],
+}
+
+# Commands that print the versions of the tools used by tests (other than those provided by Conan)
+tool_version_commands: List[List[str]] = [
+    [os.environ.get("CC", "cc"), "--version"],
+    [os.environ.get("CXX", "c++"), "--version"],
+    ["git", "--version"],
+    ["distcc", "--version"],
+]
+
+# Virtual environment shared by every test (so each test uses the same version of Conan)
+venv_path: str = os.path.join(this_dir, ".venv")
+
+# Tools that Conan provides to the tests (see the 'tool_requires' of 'conanfile.py.tmpl')
+conan_tools: List[str] = ["meson", "ninja", "pkgconf"]
+
+# Files and directories created within each test directory while a test runs
+test_outputs: List[str] = ["files", "logs", "__pycache__"]
+
 
 def _shutil_onerror(func, path, exc_info) -> None:
     """On access error, add write permissions and try again"""
@@ -124,6 +165,108 @@ class Test:
         shutil.copy(src_abs_path, dest_abs_path, follow_symlinks=False)
 
 
+def _hash_path(digest, path: str, ignored: List[str] = []) -> None:
+    """Add the relative path and contents of a file (or of every file within a directory except the ignored names) to a hash"""
+
+    if os.path.isfile(path):
+        digest.update(os.path.relpath(path, root_dir).encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+        return
+
+    for dir_path, dir_names, file_names in os.walk(path):
+        # Ignored names only apply to the top of the directory
+        top: bool = dir_path == path
+        dir_names[:] = sorted(
+            name
+            for name in dir_names
+            if name != "__pycache__" and not (top and name in ignored)
+        )
+        for file_name in sorted(file_names):
+            if not (top and file_name in ignored):
+                _hash_path(digest, os.path.join(dir_path, file_name))
+
+
+def _output(command: List[str]) -> str:
+    """Returns the standard output of a command (or an empty string if the command is not installed)"""
+
+    try:
+        return subprocess.run(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).stdout
+    except FileNotFoundError:
+        return ""
+
+
+def shared_venv():
+    """Create the virtual environment shared by every test (if it does not exist) and return the module that manages it"""
+
+    spec = importlib.util.spec_from_file_location(
+        "this_venv", os.path.join(root_dir, "template_files", "this_venv.py")
+    )
+    venv = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(venv)
+
+    # Tests inherit the environment of this script
+    os.environ[venv.shared_path_variable] = venv_path
+    if not venv.exists():
+        venv.create()
+    return venv
+
+
+def tool_versions(conan: str) -> List[str]:
+    """Returns the first line printed by each tool version command and by the given Conan executable, and the revisions of the tools provided by Conan"""
+
+    versions: List[str] = [sys.version]
+    for command in tool_version_commands + [[conan, "--version"]]:
+        versions.append(_output(command).strip().split("\n")[0])
+    for tool in conan_tools:
+        versions.append(_output([conan, "list", tool + "/*#latest:*#latest"]))
+    return versions
+
+
+def fingerprint(test_dir: str, versions: List[str]) -> str:
+    """Returns a hash of everything that determines the result of the test in the given directory"""
+
+    digest = hashlib.sha256()
+    for version in versions:
+        digest.update(version.encode() + b"\0")
+    for shared_input in shared_inputs:
+        # Scoped inputs are only hashed for the tests they affect
+        scoped: List[str] = [
+            os.path.basename(path)
+            for path in scoped_inputs
+            if os.path.dirname(path) == shared_input
+        ]
+        _hash_path(digest, os.path.join(root_dir, shared_input), scoped)
+    test_name: str = os.path.basename(os.path.normpath(test_dir))
+    for path, test_names in scoped_inputs.items():
+        if test_name in test_names:
+            _hash_path(digest, os.path.join(root_dir, path))
+    _hash_path(digest, test_dir, test_outputs)
+    return digest.hexdigest()
+
+
+def read_results() -> Dict[str, str]:
+    """Returns the fingerprint of each test when it last succeeded"""
+
+    try:
+        with open(results_path, "r") as results_file:
+            return json.load(results_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_results(results: Dict[str, str]) -> None:
+    """Record the fingerprint of each test when it last succeeded"""
+
+    with open(results_path, "w") as results_file:
+        json.dump(results, results_file, indent=4, sort_keys=True)
+
+
 if __name__ == "__main__":
     # Set the working directory to the project root so tests can be executed as modules and use relative importing to import from this script
     working_dir: str = os.path.dirname(this_dir)
@@ -132,6 +275,10 @@ if __name__ == "__main__":
     # Remove the name of this script from the argument list
     args: list = argv[1:]
 
+    # Search for the optional 'force' flag (tests run even if they succeeded since their inputs last changed)
+    forcing: bool = "-f" in args or "--force" in args
+    args = [arg for arg in args if arg not in ["-f", "--force"]]
+
     # Search for the optional 'clean' flag
     cleaning: bool = False
     if len(args) >= 1:
@@ -145,10 +292,14 @@ if __name__ == "__main__":
         if cleaning:
             # If cleaning, remove the '__pycache__' directory
             rmtree(os.path.join(this_dir, "__pycache__"))
+            if os.path.isfile(results_path):
+                os.remove(results_path)
 
         args = os.listdir(this_dir)
 
-    tests = {}
+    tests: Dict[str, str] = {}
+    results: Dict[str, str] = read_results()
+    versions: List[str] = [] if cleaning else tool_versions(shared_venv().conan())
 
     for dir_name in args:
         dir_abs_path = os.path.join(this_dir, dir_name)
@@ -165,6 +316,14 @@ if __name__ == "__main__":
             # Clean the test
             Test(os.path.join(this_dir, dir_name), prepare=False).clean()
         else:
+            # Skip the test if it succeeded since its inputs last changed
+            test_name: str = dir_name.removesuffix(os.sep)
+            test_fingerprint: str = fingerprint(dir_abs_path, versions)
+            if not forcing and results.get(test_name) == test_fingerprint:
+                print("\033[34;1m" + test_name + "\033[0m (cached)")
+                tests[dir_name] = "CACHED"
+                continue
+
             # Execute the test
             returncode = subprocess.run(
                 [
@@ -178,13 +337,21 @@ if __name__ == "__main__":
             ).returncode
 
             # Record whether the test succeeded or failed
-            tests[dir_name] = returncode == 0
+            tests[dir_name] = "SUCCESS" if returncode == 0 else "FAILURE"
+            if returncode == 0:
+                results[test_name] = test_fingerprint
+            else:
+                results.pop(test_name, None)
+            write_results(results)
 
     if not cleaning:
         # Report of the status of each executed test to stdout
         print("\n", end="")
-        for test, success in tests.items():
-            status_msg = (
-                "\033[32;1mSUCCESS\033[0m" if success else "\033[31;1mFAILURE\033[0m"
-            )
+        status_colors: Dict[str, str] = {
+            "SUCCESS": "32",
+            "CACHED": "36",
+            "FAILURE": "31",
+        }
+        for test, status in tests.items():
+            status_msg = "\033[" + status_colors[status] + ";1m" + status + "\033[0m"
             print("\033[34;1m" + test + "\033[0m: " + status_msg)
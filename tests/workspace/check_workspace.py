@@ -0,0 +1,63 @@
+"""Verify that both projects of the workspace were built with the versions in the workspace lockfile and that a manifest without projects is rejected"""
+
+from importlib import import_module
+import json
+import os
+import tempfile
+
+
+# Directory containing the workspace manifest (this script is copied into one of the projects)
+root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == "__main__":
+    workspace = import_module("workspace")
+
+    # The library was built before the application that depends on it
+    projects = workspace.read_projects(os.path.join(root, "workspace.json"))
+    stages = workspace.build_order(projects)
+    if stages != [["my_lib"], ["my_app"]]:
+        raise RuntimeError("Unexpected build order: " + str(stages))
+
+    # Every project reports its outcome in its own log
+    for name in ["my_lib", "my_app"]:
+        log_path: str = os.path.join(root, workspace.log_dir_name, name + ".log")
+        if not os.path.isfile(log_path):
+            raise RuntimeError("The workspace did not write a log for " + name)
+
+    # Both projects use the version of gtest in the workspace lockfile (projects of the workspace are not locked)
+    with open(os.path.join(root, workspace.lockfile_name), "r") as lockfile:
+        locked: list = json.load(lockfile)["requires"]
+    if any(ref.startswith("my_lib/") for ref in locked):
+        raise RuntimeError("The workspace lockfile locks a project of the workspace")
+    gtest: list = [ref.split("#")[0] for ref in locked if ref.startswith("gtest/")]
+    if len(gtest) != 1:
+        raise RuntimeError("The workspace lockfile does not lock gtest")
+    for name in ["my_lib", "my_app"]:
+        build_dir: str = os.path.join(root, name, "build")
+        lockfiles: list = [
+            os.path.join(dir_path, "conan.lock")
+            for dir_path, _, file_names in os.walk(build_dir)
+            if "conan.lock" in file_names
+        ]
+        if len(lockfiles) == 0:
+            raise RuntimeError(name + " was not built")
+        for lockfile_path in lockfiles:
+            with open(lockfile_path, "r") as lockfile:
+                requires: list = json.load(lockfile)["requires"]
+            if gtest[0] not in [ref.split("#")[0] for ref in requires]:
+                raise RuntimeError(
+                    name + " did not use the version of gtest in the workspace lockfile"
+                )
+
+    # A manifest must list at least one project
+    with tempfile.TemporaryDirectory() as temp_dir:
+        empty_manifest: str = os.path.join(temp_dir, workspace.manifest_file)
+        with open(empty_manifest, "w") as manifest:
+            json.dump({"projects": []}, manifest)
+        try:
+            workspace.read_projects(empty_manifest)
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("A manifest without projects was accepted")
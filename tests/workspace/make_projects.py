@@ -0,0 +1,44 @@
+"""Generate each project of the workspace from the copy of this template next to this script (named after its configuration file)"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+
+this_dir: str = os.path.dirname(os.path.abspath(__file__))
+
+# Names of the projects (each configured with '<name>.ini')
+project_names: list = ["my_lib", "my_app"]
+
+# Files of this test that are not part of this template
+test_files: list = [
+    "workspace.json",
+    "make_projects.py",
+    "__pycache__",
+] + [name + ".ini" for name in project_names]
+
+
+if __name__ == "__main__":
+    for name in project_names:
+        project_dir: str = os.path.join(this_dir, name)
+        os.mkdir(project_dir)
+        for file_name in os.listdir(this_dir):
+            if file_name in test_files or file_name in project_names:
+                continue
+            file_abs_path: str = os.path.join(this_dir, file_name)
+            if os.path.isdir(file_abs_path) and not os.path.islink(file_abs_path):
+                shutil.copytree(
+                    file_abs_path, os.path.join(project_dir, file_name), symlinks=True
+                )
+            else:
+                shutil.copy(
+                    file_abs_path,
+                    os.path.join(project_dir, file_name),
+                    follow_symlinks=False,
+                )
+        shutil.copy(
+            os.path.join(this_dir, name + ".ini"),
+            os.path.join(project_dir, "template_config.ini"),
+        )
+        subprocess.run([sys.executable, "config.py"], cwd=project_dir, check=True)
@@ -0,0 +1,23 @@
+from tests.test import Test
+import os
+
+
+this_dir: str = os.path.dirname(__file__)
+
+test = Test(this_dir)
+
+test.copy("my_lib.ini")
+test.copy("my_app.ini")
+test.copy("workspace.json")
+test.copy("make_projects.py")
+test.run("make_projects", "make_projects.py")
+test.copy("check_workspace.py", "my_app")
+manifest: str = os.path.join(test.files_dir, "workspace.json")
+test.run("workspace", os.path.join("my_app", "workspace.py"), ["--manifest", manifest])
+test.run("check_workspace", os.path.join("my_app", "check_workspace.py"))
+test.run(
+    "second_workspace",
+    os.path.join("my_lib", "workspace.py"),
+    ["--manifest", manifest],
+)
+test.run("second_check_workspace", os.path.join("my_app", "check_workspace.py"))